@@ -3,7 +3,27 @@
 # from dotenv import load_dotenv
 from Agents.config import LLM, base_temperature
 from abc import ABC, abstractmethod
+import contextvars
+from contextlib import contextmanager
 from llm_client import llm_client  
+from Agents.profiler import track_llm_call
+from Agents.llm_json import request_json
+
+# Receives completion text as it streams in (see stream_tokens); None = plain requests
+_token_sink = contextvars.ContextVar("token_sink", default=None)
+
+
+@contextmanager
+def stream_tokens(callback):
+    """
+    Inside this block every call_llm() streams its completion and passes each
+    text delta to `callback(text)`. The return value of call_llm is unchanged.
+    """
+    token = _token_sink.set(callback)
+    try:
+        yield
+    finally:
+        _token_sink.reset(token)
 
 class BaseAgent(ABC):
     """
@@ -25,7 +45,8 @@ class BaseAgent(ABC):
         """Each agent must implement this."""
         raise NotImplementedError
 
-    def call_llm(self, prompt=None, messages=None, model=LLM, temperature: float = base_temperature) -> str:
+    def call_llm(self, prompt=None, messages=None, model=LLM, temperature: float = base_temperature,
+                 response_format=None) -> str:
         """
         Small wrapper around OpenAI chat completions.
 
@@ -33,17 +54,42 @@ class BaseAgent(ABC):
         - Simple: call_llm(prompt="...")  → wraps into a single user message
         - Advanced: call_llm(messages=[...]) → you control the messages list
 
-        `model` defaults to Agents.config.LLM.
+        `model` defaults to Agents.config.LLM. `response_format` is passed
+        through when given (see call_llm_json).
         """
         if messages is None:
             if prompt is None:
                 raise ValueError("call_llm requires either `prompt` or `messages`.")
             messages = [{"role": "user", "content": prompt}]
 
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-        )
+        request = {"model": model, "messages": messages, "temperature": temperature}
+        if response_format is not None:
+            request["response_format"] = response_format
+        sink = _token_sink.get()
+        with track_llm_call(model):
+            if sink is not None:
+                return self._stream_llm(sink, **request)
+            response = self.client.chat.completions.create(**request)
         return response.choices[0].message.content
 
+    def call_llm_json(self, prompt: str, name: str, example: dict, model=LLM,
+                      temperature: float = base_temperature) -> dict:
+        """
+        call_llm() constrained to a JSON schema built from `example` (see Agents.llm_json).
+        Returns the parsed object, or {"raw_output": text} if the reply still is not JSON.
+        """
+        return request_json(
+            lambda response_format: self.call_llm(prompt=prompt, model=model, temperature=temperature,
+                                                  response_format=response_format),
+            name, example,
+        )
+
+    def _stream_llm(self, sink, **request) -> str:
+        pieces = []
+        for chunk in self.client.chat.completions.create(stream=True, **request):
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                pieces.append(delta)
+                sink(delta)
+        return "".join(pieces)
+
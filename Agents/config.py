@@ -1,2 +1,31 @@
+import os
+
 LLM = "gpt-4o-mini"
 base_temperature = 0.9
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Influencer profile folders, keyed by platform
+STYLE_DIRS = {
+    "youtube": os.path.join(PROJECT_ROOT, "influencer_styles"),
+    "instagram": os.path.join(PROJECT_ROOT, "IG_influencer_styles"),
+}
+
+# style_match_score below this sends a draft back for revision
+QUALITY_THRESHOLD = 0.85
+
+# QualityAgent.evaluate_batch: scripts per request and prompt token budget per request
+QUALITY_BATCH_SIZE = int(os.getenv("QUALITY_BATCH_SIZE", "8"))
+QUALITY_BATCH_TOKENS = int(os.getenv("QUALITY_BATCH_TOKENS", "12000"))
+
+# Local caches (merged styles, transcripts, jobs, ...). Safe to delete.
+CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache")
+
+# Shared generation pool (per server process). Size it to the API quota:
+# each running generation makes one LLM call at a time.
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "4"))
+GENERATION_MAX_PENDING = int(os.getenv("GENERATION_MAX_PENDING", "20"))
+
+# run_fanout: concurrent writer → editor → quality branches per fan-out request
+# (each fan-out running in the generation pool can add this many LLM calls at once)
+FANOUT_WORKERS = int(os.getenv("FANOUT_WORKERS", "4"))
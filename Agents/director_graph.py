@@ -6,6 +6,14 @@ from Agents.quality_agent import QualityAgent
 from Agents.state_schema import ScriptState
 from Agents.shortform_agent import ShortFormAgent
 from Agents.postprocessor_agent import PostProcessorAgent
+from Agents.profiler import RunProfiler
+from Agents.config import FANOUT_WORKERS, QUALITY_THRESHOLD
+from Agents.base_agent import stream_tokens
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import sqlite3
+import time
+from Scripts.history_store import record_run
 
 research = ResearchAgent()
 writer = ScriptWriterAgent()
@@ -14,55 +22,72 @@ quality = QualityAgent()
 postprocessor = PostProcessorAgent()
 shortform = ShortFormAgent()
 
-def build_script_graph():
+def build_script_graph(profiler: RunProfiler | None = None, with_research: bool = True):
+    """
+    Builds the director graph.
+    Pass a RunProfiler to record a per-node timeline for this graph's executions.
+    With `with_research=False` the graph starts at the writers and expects
+    `research_notes` in the input state (shared or reused research).
+    """
     # graph = StateGraph[ScriptState]()
     graph = StateGraph(ScriptState)
 
-    graph.add_node(
-        "research",
-        research.run,
-        input_keys=["topic"],
-        output_keys=["research_notes"],
-    )
+    def node(name, fn):
+        return profiler.wrap(name, fn) if profiler else fn
+
+    if with_research:
+        graph.add_node(
+            "research",
+            node("research", research.run),
+            input_keys=["topic"],
+            output_keys=["research_notes"],
+        )
 
     graph.add_node(
         "write_script",
-        writer.run,
+        node("write_script", writer.run),
         input_keys=["topic", "research_notes"],
         output_keys=["draft_script"],
     )
 
     graph.add_node(
         "edit_script",
-        editor.run,
+        node("edit_script", editor.run),
         input_keys=["draft_script"],
         output_keys=["edited_script"],
     )
 
     graph.add_node(
         "shortform_script",
-        shortform.run,
+        node("shortform_script", shortform.run),
         input_keys=["topic", "style_profile", "duration"],
         output_keys=["draft_script"],
     )
     graph.add_node(
         "post_process",
-        postprocessor.run,
+        node("post_process", postprocessor.run),
         input_keys=["edited_script"],
         output_keys=["processed_script"],
     )
 
     graph.add_node(
         "evaluate_quality",
-        quality.run,
+        node("evaluate_quality", quality.run),
         input_keys=["processed_script", "style_profile"],
         output_keys=["quality_report"],
     )
 
+    def revise(state):
+        # Revision bookkeeping lives in a node: changes a router makes to `state` are discarded
+        report = state.get("quality_report") or {}
+        state["revision_feedback"] = report.get("feedback", "")
+        state["revision_count"] = state.get("revision_count", 0) + 1
+        return writer.run(state)
+
     #new node
     graph.add_node(
         "revise_script",
-        writer.run,   # WriterAgent refines script
+        node("revise_script", revise),   # WriterAgent refines script
         input_keys=["edited_script", "revision_feedback", "style_profile"],
         output_keys=["draft_script"],
 )
@@ -86,24 +111,22 @@ def build_script_graph():
             print(f"⚠️ Max revisions reached. Accepting output (score={score}).")
             return "finish"
 
-        if score < 0.85:
+        if score < QUALITY_THRESHOLD:
             print(f"🔁 Quality low (score={score}). Sending back for refinement...")
-            state["revision_feedback"] = report.get("feedback", "")
-            state["revision_count"] = revision_count + 1
             return "revise"
         else:
             print(f"✅ Quality good (score={score}). Finishing pipeline.")
             return "finish"
         
-    graph.set_entry_point("research")
-    graph.add_conditional_edges(
-        "research",
-        choose_writer,
-        {
-            "shortform": "shortform_script",
-            "writer": "write_script",
-        },
-    )
+    writers = {
+        "shortform": "shortform_script",
+        "writer": "write_script",
+    }
+    if with_research:
+        graph.set_entry_point("research")
+        graph.add_conditional_edges("research", choose_writer, writers)
+    else:
+        graph.set_conditional_entry_point(choose_writer, writers)
     graph.add_edge("write_script", "edit_script")
     graph.add_edge("shortform_script", "edit_script")
     graph.add_edge("edit_script", "post_process")
@@ -120,4 +143,87 @@ def build_script_graph():
 )
     return graph.compile()
 
+# JSON-safe parts of the final state kept as a job result (style_profile is left out)
+RESULT_KEYS = (
+    "topic", "influencer", "content_type", "duration", "research_notes", "hooks",
+    "draft_script", "processed_script", "quality_report", "revision_count",
+)
+
+def run_script_graph(state: dict, progress=None, profile: bool = False) -> dict:
+    """
+    Runs the graph for one request, reporting every finished node as a stage
+    through `progress(node_name, **info)` (the JobQueue callback).
+    Returns the final script fields, plus the run timeline when `profile` is set.
+    """
+    progress = progress or (lambda stage, **info: None)
+    profiler = RunProfiler() if profile else None
+    # Research handed in by the caller (fan-out, reuse) is not done again
+    graph = build_script_graph(profiler=profiler, with_research=not state.get("research_notes"))
+
+    result = dict(state)
+    started = time.perf_counter()
+    for update in graph.stream(state, stream_mode="updates"):
+        for node_name, node_state in update.items():
+            result.update(node_state or {})
+            info = {"elapsed": round(time.perf_counter() - started, 2)}
+            if node_name == "research":
+                info["preview"] = result.get("research_notes", "")
+            elif node_name in ("write_script", "shortform_script", "revise_script"):
+                info["preview"] = result.get("draft_script", "")
+            elif node_name == "evaluate_quality":
+                info["score"] = (result.get("quality_report") or {}).get("style_match_score")
+                info["lap"] = result.get("revision_count", 0) + 1
+            progress(node_name, **info)
+
+    output = {k: result.get(k) for k in RESULT_KEYS}
+    output["seconds"] = round(time.perf_counter() - started, 2)
+    if profiler:
+        output["timeline"] = profiler.to_dict()
+    try:
+        output["history_id"] = record_run(output)
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not save run to history: {e}")
+    return output
+
+def run_fanout(topic: str, targets: list[dict], progress=None, on_token=None,
+               profile: bool = False, max_workers: int | None = None) -> dict:
+    """
+    One topic for several targets ({"influencer", "style_profile", "content_type", "duration"}).
+    Research runs once and is shared; the writer → editor → quality branches then
+    run concurrently, one per target. Stages are reported with `target=<index>`;
+    `on_token(index, text)` receives streamed LLM text per branch.
+    A failing branch is reported in its own result and does not stop the others.
+    """
+    progress = progress or (lambda stage, **info: None)
+    started = time.perf_counter()
+
+    print(f"🔱 Fan-out → researching '{topic}' once for {len(targets)} target(s)")
+    research_notes = research.run({"topic": topic})["research_notes"]
+    progress("research", elapsed=round(time.perf_counter() - started, 2), preview=research_notes)
+
+    def run_target(index, target):
+        state = {**target, "topic": topic, "research_notes": research_notes}
+        report = lambda stage, **info: progress(stage, target=index, **info)
+        try:
+            if on_token is None:
+                return run_script_graph(state, progress=report, profile=profile)
+            with stream_tokens(lambda text: on_token(index, text)):
+                return run_script_graph(state, progress=report, profile=profile)
+        except Exception as e:
+            print(f"❌ Fan-out target {index} ({target.get('influencer')}) failed: {e}")
+            return {k: target.get(k) for k in ("influencer", "content_type", "duration")} | {"error": str(e)}
+
+    workers = max(1, min(len(targets), max_workers or FANOUT_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fanout") as pool:
+        # Each branch gets a copy of the caller's context (token sinks, profiler spans)
+        futures = [pool.submit(contextvars.copy_context().run, run_target, i, t) for i, t in enumerate(targets)]
+        results = [f.result() for f in futures]
+
+    return {
+        "topic": topic,
+        "research_notes": research_notes,
+        "results": results,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
 #refine cycle will be: revise_script → edit_script → post_process → evaluate_quality → maybe revise again
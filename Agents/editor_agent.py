@@ -1,10 +1,11 @@
 from Agents.base_agent import BaseAgent
+from Agents.style_digest import get_style_digest
 
 
 class EditorAgent(BaseAgent):
     def run(self, state):
         draft = state.get("draft_script", "")
-        style_profile = state.get("style_profile", {})
+        style_profile = get_style_digest(state.get("style_profile", {}), "editor")
         #naming convention update
         prompt = f"""
         You are a professional script editor specializing in *style-preserving editing*.
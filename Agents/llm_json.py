@@ -0,0 +1,134 @@
+"""
+JSON output from the LLM: schema-constrained requests and one shared parser.
+
+There used to be four copies of `safe_json_loads` (a greedy `\\{.*\\}` regex
+that breaks on any text after the object) and a bare `json.loads` for hooks,
+so fenced or chatty replies silently became `{"raw_output": ...}` and, for the
+quality check, a 0.5 score that could trigger a needless revision lap.
+
+- request_json() asks for `response_format={"type": "json_schema", ...}` built
+  from an example of the expected object, parses the reply and retries once
+  when parsing still fails. Servers that reject json_schema are asked again
+  without it (and not asked with it again).
+- safe_json_loads() is the one fallback parser: orjson on the whole reply,
+  then a `raw_decode` scan from every "{" (handles ```json fences, prose
+  around the object and trailing text).
+- parse_stats() reports, per output kind, how replies were parsed, failures,
+  retries and schema fallbacks.
+"""
+import json
+import threading
+import orjson
+import openai
+
+JSON_RETRIES = 1
+
+_decoder = json.JSONDecoder()
+_stats = {}
+_stats_lock = threading.Lock()
+_schema_unsupported = False
+
+
+def _count(kind: str, field: str):
+    with _stats_lock:
+        counters = _stats.setdefault(kind, {"replies": 0, "direct": 0, "extracted": 0, "failed": 0,
+                                            "retries": 0, "schema_fallbacks": 0})
+        counters[field] += 1
+
+
+def parse_stats() -> dict:
+    """Per-kind counters: replies, direct / extracted parses, failed, retries, schema_fallbacks."""
+    with _stats_lock:
+        return {kind: dict(counters) for kind, counters in _stats.items()}
+
+
+def extract_json(text: str) -> tuple[dict | None, str]:
+    """(object, how) — how is "direct", "extracted" or "failed"."""
+    if not isinstance(text, str):
+        return None, "failed"
+    try:
+        value = orjson.loads(text)
+        if isinstance(value, dict):
+            return value, "direct"
+    except orjson.JSONDecodeError:
+        pass
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = _decoder.raw_decode(text, start)
+            if isinstance(value, dict):
+                return value, "extracted"
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+    return None, "failed"
+
+
+def safe_json_loads(text, kind: str = "other") -> dict:
+    """Parsed object, or {"raw_output": text} when the reply holds no JSON object."""
+    value, how = extract_json(text)
+    _count(kind, "replies")
+    _count(kind, how)
+    if value is None:
+        print(f"⚠️ Could not parse {kind} JSON ({len(text or '')} chars)")
+        return {"raw_output": text}
+    return value
+
+
+def schema_from_example(example):
+    """Strict JSON schema for an example value: all keys required, no extra keys, lists of strings."""
+    if isinstance(example, dict):
+        return {
+            "type": "object",
+            "properties": {k: schema_from_example(v) for k, v in example.items()},
+            "required": list(example),
+            "additionalProperties": False,
+        }
+    if isinstance(example, list):
+        return {"type": "array", "items": schema_from_example(example[0]) if example else {"type": "string"}}
+    if isinstance(example, bool):
+        return {"type": "boolean"}
+    if isinstance(example, (int, float)):
+        return {"type": "number"}
+    return {"type": "string"}
+
+
+def json_schema_format(name: str, example: dict) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": schema_from_example(example), "strict": True},
+    }
+
+
+def _rejects_schema(error: openai.BadRequestError) -> bool:
+    """True when a 400 is about response_format / json_schema itself."""
+    text = " ".join(str(part) for part in (error.param, error.code, error.message) if part).lower()
+    return "response_format" in text or "json_schema" in text
+
+
+def request_json(complete, name: str, example: dict, retries: int = JSON_RETRIES) -> dict:
+    """
+    `complete(response_format)` sends the request and returns the reply text.
+    Returns the parsed object, or {"raw_output": last reply} after `retries` failed retries.
+    """
+    global _schema_unsupported
+    response_format = None if _schema_unsupported else json_schema_format(name, example)
+    parsed = {}
+    for attempt in range(retries + 1):
+        if attempt:
+            _count(name, "retries")
+        try:
+            text = complete(response_format)
+        except openai.BadRequestError as e:
+            # Only a rejected response_format turns schema mode off; context length,
+            # content filter and other bad requests are the caller's to handle
+            if response_format is None or not _rejects_schema(e):
+                raise
+            print("⚠️ Server rejected json_schema response_format, continuing without it")
+            _schema_unsupported, response_format = True, None
+            _count(name, "schema_fallbacks")
+            text = complete(None)
+        parsed = safe_json_loads(text, kind=name)
+        if "raw_output" not in parsed:
+            return parsed
+    return parsed
@@ -0,0 +1,204 @@
+import json
+import threading
+import time
+import contextvars
+from contextlib import contextmanager
+
+# Span of the graph node currently executing in this thread/context.
+# BaseAgent.call_llm reads it to attribute LLM time to the right node.
+_active_span = contextvars.ContextVar("active_span", default=None)
+
+
+@contextmanager
+def track_llm_call(model: str = ""):
+    """
+    Records one LLM round-trip against the node that is currently running.
+    Does nothing when the graph is not being profiled.
+    """
+    span = _active_span.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if span is not None:
+            span["llm_calls"].append({"model": model, "start": start, "end": time.perf_counter()})
+
+
+class RunProfiler:
+    """
+    Collects a per-node timeline for one execution of build_script_graph().
+
+    Every node execution becomes a span with:
+    - queued_at / start / end (queued = time between the node becoming runnable and starting)
+    - llm_seconds vs. local_seconds (wall time outside LLM calls) and cpu_seconds
+    - lap (revision lap number, 0 = first pass)
+
+    The timeline can be rendered as a Gantt chart (altair) or exported as
+    Chrome trace-event JSON (chrome://tracing, https://ui.perfetto.dev).
+    """
+
+    def __init__(self):
+        self.run_start = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._last_end = self.run_start
+        self._lap = 0
+
+    def wrap(self, name: str, fn):
+        """Return a node callable that records a span around `fn`."""
+        def profiled(state):
+            with self._lock:
+                if name == "revise_script":
+                    self._lap += 1
+                span = {
+                    "node": name,
+                    "lap": self._lap,
+                    "queued_at": self._last_end,
+                    "start": time.perf_counter(),
+                    "end": None,
+                    "cpu_seconds": 0.0,
+                    "llm_calls": [],
+                }
+                self.spans.append(span)
+
+            token = _active_span.set(span)
+            cpu_start = time.thread_time()
+            try:
+                return fn(state)
+            finally:
+                _active_span.reset(token)
+                span["cpu_seconds"] = time.thread_time() - cpu_start
+                span["end"] = time.perf_counter()
+                with self._lock:
+                    self._last_end = max(self._last_end, span["end"])
+
+        profiled.__name__ = getattr(fn, "__name__", name)
+        return profiled
+
+    # ---------- Reports ----------
+    def summary(self) -> list[dict]:
+        """One row per node execution, times in seconds relative to run start."""
+        rows = []
+        for span in self.spans:
+            if span["end"] is None:
+                continue
+            duration = span["end"] - span["start"]
+            llm_seconds = sum(c["end"] - c["start"] for c in span["llm_calls"])
+            rows.append({
+                "node": span["node"],
+                "lap": span["lap"],
+                "queued_at": round(span["queued_at"] - self.run_start, 4),
+                "start": round(span["start"] - self.run_start, 4),
+                "end": round(span["end"] - self.run_start, 4),
+                "queued_seconds": round(span["start"] - span["queued_at"], 4),
+                "duration_seconds": round(duration, 4),
+                "llm_calls": len(span["llm_calls"]),
+                "llm_seconds": round(llm_seconds, 4),
+                "local_seconds": round(max(duration - llm_seconds, 0.0), 4),
+                "cpu_seconds": round(span["cpu_seconds"], 4),
+            })
+        return rows
+
+    def totals(self) -> dict:
+        rows = self.summary()
+        wall = max((r["end"] for r in rows), default=0.0)
+        return {
+            "wall_seconds": round(wall, 4),
+            "llm_seconds": round(sum(r["llm_seconds"] for r in rows), 4),
+            "local_seconds": round(sum(r["local_seconds"] for r in rows), 4),
+            "queued_seconds": round(sum(r["queued_seconds"] for r in rows), 4),
+            "revision_laps": max((r["lap"] for r in rows), default=0),
+        }
+
+    def segments(self) -> list[dict]:
+        """
+        Splits every span into queued / llm / local segments.
+        This is the long-form table the Gantt chart is drawn from.
+        """
+        out = []
+        for span in self.spans:
+            if span["end"] is None:
+                continue
+            label = f"{span['node']} (lap {span['lap']})"
+            rel = lambda t: round(t - self.run_start, 4)
+
+            if span["start"] > span["queued_at"]:
+                out.append({"task": label, "kind": "queued", "start": rel(span["queued_at"]), "end": rel(span["start"])})
+
+            cursor = span["start"]
+            for call in sorted(span["llm_calls"], key=lambda c: c["start"]):
+                if call["start"] > cursor:
+                    out.append({"task": label, "kind": "local", "start": rel(cursor), "end": rel(call["start"])})
+                out.append({"task": label, "kind": "llm", "start": rel(call["start"]), "end": rel(call["end"])})
+                cursor = max(cursor, call["end"])
+            if span["end"] > cursor:
+                out.append({"task": label, "kind": "local", "start": rel(cursor), "end": rel(span["end"])})
+        return out
+
+    def gantt_chart(self):
+        """Gantt-style altair chart of the run (one row per node execution)."""
+        return gantt_chart(self.segments())
+
+    def to_dict(self) -> dict:
+        """Everything the timeline view needs, as plain JSON (kept with background job results)."""
+        return {
+            "totals": self.totals(),
+            "summary": self.summary(),
+            "segments": self.segments(),
+            "chrome_trace": self.to_chrome_trace(),
+        }
+
+    def to_chrome_trace(self) -> dict:
+        """Chrome trace-event format (complete 'X' events, microseconds)."""
+        us = lambda t: int((t - self.run_start) * 1_000_000)
+        events = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "director_graph"}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "nodes"}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": 2, "args": {"name": "queue"}},
+        ]
+        for span in self.spans:
+            if span["end"] is None:
+                continue
+            args = {"lap": span["lap"], "cpu_seconds": round(span["cpu_seconds"], 4)}
+            events.append({
+                "name": span["node"], "cat": "node", "ph": "X", "pid": 1, "tid": 1,
+                "ts": us(span["start"]), "dur": us(span["end"]) - us(span["start"]), "args": args,
+            })
+            if span["start"] > span["queued_at"]:
+                events.append({
+                    "name": f"queued:{span['node']}", "cat": "queue", "ph": "X", "pid": 1, "tid": 2,
+                    "ts": us(span["queued_at"]), "dur": us(span["start"]) - us(span["queued_at"]), "args": args,
+                })
+            for call in span["llm_calls"]:
+                events.append({
+                    "name": f"llm:{call['model']}", "cat": "llm", "ph": "X", "pid": 1, "tid": 1,
+                    "ts": us(call["start"]), "dur": us(call["end"]) - us(call["start"]), "args": args,
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_chrome_trace_json(self) -> str:
+        return json.dumps(self.to_chrome_trace())
+
+
+def gantt_chart(segments: list[dict]):
+    """Gantt-style altair chart from RunProfiler.segments() rows."""
+    import altair as alt
+    import pandas as pd
+
+    df = pd.DataFrame(segments, columns=["task", "kind", "start", "end"])
+    order = list(dict.fromkeys(df["task"]))
+    return (
+        alt.Chart(df)
+        .mark_bar()
+        .encode(
+            x=alt.X("start:Q", title="seconds since run start"),
+            x2="end:Q",
+            y=alt.Y("task:N", sort=order, title=None),
+            color=alt.Color(
+                "kind:N",
+                scale=alt.Scale(domain=["queued", "llm", "local"], range=["#bbbbbb", "#e4572e", "#4c78a8"]),
+                title="time spent",
+            ),
+            tooltip=["task", "kind", "start", "end"],
+        )
+    )
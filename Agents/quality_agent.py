@@ -1,20 +1,24 @@
-import json
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 from Agents.base_agent import BaseAgent
-from Scripts.youtube_influencer_profile import safe_json_loads
+from Agents.config import QUALITY_BATCH_SIZE, QUALITY_BATCH_TOKENS
+from Agents.style_digest import get_style_digest
+from Agents.tokens import count_tokens
+from Scripts.style_similarity import prefilter
 
-class QualityAgent(BaseAgent):
-    def run(self, state):
-        edited_script = state.get("processed_script", "")
-        style_profile = json.dumps(state["style_profile"], indent=2)
+QUALITY_EXAMPLE = {"style_match_score": 0.0, "clarity_score": 0.0, "storytelling_score": 0.0, "feedback": ""}
+BATCH_EXAMPLE = {"reports": [dict(index=0, **QUALITY_EXAMPLE)]}
 
-        prompt = f"""
+
+def _single_prompt(style_profile: str, script: str) -> str:
+    return f"""
         Evaluate how well this script matches the influencer’s style.
 
-        Influencer style: 
+        Influencer style:
         {style_profile}
 
         Script:
-        {edited_script}
+        {script}
 
         Return JSON with:
         {{
@@ -24,33 +28,158 @@ class QualityAgent(BaseAgent):
           "feedback": "short qualitative notes"
         }}
         """
-        print("🧠 QualityAgent → evaluating output ...")
-        raw_result = self.call_llm(prompt, temperature=0.0)
-        default_report = {
-            "style_match_score": 0.5,
-            "clarity_score": 0.5,
-            "storytelling_score": 0.5,
-            "feedback": "No structured feedback available.",
-            "raw_output": raw_result
-        }
-
-        parsed = safe_json_loads(raw_result)
-
-        if "raw_output" in parsed:
-            # safe_json_loads indicates extraction failed
-            print("⚠️ Failed to parse quality JSON. Using fallback.")
-            state["quality_report"] = default_report
-            return state
-
-        # Build clean quality report with defaults for missing fields
-        state["quality_report"] = {
-            "style_match_score": parsed.get("style_match_score", 0.5),
-            "clarity_score": parsed.get("clarity_score", 0.5),
-            "storytelling_score": parsed.get("storytelling_score", 0.5),
-            "feedback": parsed.get("feedback", "Unable to parse feedback."),
-            "raw_output": raw_result,
-        }
 
+
+def _batch_prompt(style_profile: str, scripts: list[str]) -> str:
+    blocks = "\n\n".join(f"=== SCRIPT {i} ===\n{script}" for i, script in enumerate(scripts))
+    return f"""
+        Evaluate how well EACH script below matches the influencer’s style.
+        Judge every script on its own; do not compare or rank them against each other.
+
+        Influencer style:
+        {style_profile}
+
+        Scripts:
+        {blocks}
+
+        Return exactly {len(scripts)} reports, one per script, as JSON:
+        {{
+          "reports": [
+            {{
+              "index": script number,
+              "style_match_score": float (0–1),
+              "clarity_score": float (0–1),
+              "storytelling_score": float (0–1),
+              "feedback": "short qualitative notes"
+            }}
+          ]
+        }}
+        """
+
+
+def _report(parsed: dict, local_style: dict | None) -> dict:
+    # Build clean quality report with defaults for missing fields
+    report = {
+        "style_match_score": parsed.get("style_match_score", 0.5),
+        "clarity_score": parsed.get("clarity_score", 0.5),
+        "storytelling_score": parsed.get("storytelling_score", 0.5),
+        "feedback": parsed.get("feedback", "Unable to parse feedback."),
+        "judge": "llm",
+    }
+    if local_style:
+        report["local_style"] = local_style
+    return report
+
+
+def plan_batches(scripts: list[str], style_profile: str, batch_size: int = QUALITY_BATCH_SIZE,
+                 token_budget: int = QUALITY_BATCH_TOKENS) -> list[list[int]]:
+    """
+    Script indices grouped into requests of at most `batch_size` scripts whose
+    prompt stays within `token_budget` tokens. A script that alone exceeds the
+    budget still gets its own request.
+    """
+    overhead = count_tokens(_batch_prompt(style_profile, []))
+    batches, current, used = [], [], overhead
+    for i, script in enumerate(scripts):
+        tokens = count_tokens(script) + 8   # + the "=== SCRIPT n ===" separator
+        if current and (len(current) >= batch_size or used + tokens > token_budget):
+            batches.append(current)
+            current, used = [], overhead
+        current.append(i)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class QualityAgent(BaseAgent):
+    def run(self, state):
+        state["quality_report"] = self.evaluate_batch(
+            [state.get("processed_script", "")], state["style_profile"],
+            influencer=state.get("influencer"), platform=(state.get("content_type") or "youtube").lower(),
+        )[0]
         return state
 
-#changed: quality report into dictionary from a string.
\ No newline at end of file
+    def evaluate_batch(self, scripts: list[str], style_profile: dict, influencer: str | None = None,
+                       platform: str = "youtube", batch_size: int = QUALITY_BATCH_SIZE,
+                       token_budget: int = QUALITY_BATCH_TOKENS) -> list[dict]:
+        """
+        One quality report per script, all judged against the same influencer style.
+        Scripts the local scorer cannot decide are sent to the LLM together, up to
+        `batch_size` per request and within `token_budget` prompt tokens; larger
+        sets are split into several requests that run concurrently.
+        """
+        reports = [None] * len(scripts)
+        local_styles = {}
+        for i, script in enumerate(scripts):
+            # ✅ Clearly good / clearly off-style drafts are decided locally against the
+            # influencer's own transcripts; only the ambiguous band costs an LLM call
+            local_report, local_styles[i] = prefilter(platform, influencer, script)
+            if local_report is not None:
+                print(f"🧠 QualityAgent → decided locally ({local_styles[i]['decision']}, "
+                      f"score={local_report['style_match_score']})")
+                reports[i] = local_report
+
+        pending = [i for i, report in enumerate(reports) if report is None]
+        if not pending:
+            return reports
+
+        style_digest = get_style_digest(style_profile, "quality")
+        batches = [[pending[j] for j in batch]
+                   for batch in plan_batches([scripts[i] for i in pending], style_digest, batch_size, token_budget)]
+        if len(pending) > 1:
+            print(f"🧠 QualityAgent → evaluating {len(pending)} scripts in {len(batches)} request(s) ...")
+
+        def evaluate(batch):
+            if len(batch) == 1:
+                return [self._evaluate_one(style_digest, scripts[batch[0]])]
+            return self._evaluate_many(style_digest, [scripts[i] for i in batch])
+
+        if len(batches) == 1:
+            results = [evaluate(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=len(batches), thread_name_prefix="quality") as pool:
+                # Copies of the caller's context keep token sinks and profiler spans working
+                futures = [pool.submit(contextvars.copy_context().run, evaluate, batch) for batch in batches]
+                results = [f.result() for f in futures]
+        for batch, parsed_reports in zip(batches, results):
+            for i, parsed in zip(batch, parsed_reports):
+                reports[i] = parsed
+
+        for i in pending:
+            if "raw_output" in reports[i]:
+                print("⚠️ Failed to parse quality JSON. Using fallback.")
+                reports[i] = {
+                    "style_match_score": 0.5,
+                    "clarity_score": 0.5,
+                    "storytelling_score": 0.5,
+                    "feedback": "No structured feedback available.",
+                    "raw_output": reports[i]["raw_output"],
+                }
+            else:
+                reports[i] = _report(reports[i], local_styles[i])
+        return reports
+
+    def _evaluate_one(self, style_digest: str, script: str) -> dict:
+        print("🧠 QualityAgent → evaluating output ...")
+        # ✅ Schema-constrained reply, parsed by Agents.llm_json (retried once if it still is not JSON)
+        return self.call_llm_json(_single_prompt(style_digest, script), "quality_report", QUALITY_EXAMPLE,
+                                  temperature=0.0)
+
+    def _evaluate_many(self, style_digest: str, scripts: list[str]) -> list[dict]:
+        """Parsed reports in script order; scripts the batch reply missed are re-asked one by one."""
+        parsed = self.call_llm_json(_batch_prompt(style_digest, scripts), "quality_batch", BATCH_EXAMPLE,
+                                    temperature=0.0)
+        by_index = {}
+        for item in parsed.get("reports") or []:
+            index = item.get("index") if isinstance(item, dict) else None
+            if isinstance(index, (int, float)) and 0 <= int(index) < len(scripts):
+                by_index.setdefault(int(index), item)
+        missing = [i for i in range(len(scripts)) if i not in by_index]
+        if missing:
+            print(f"⚠️ Batch quality reply covered {len(by_index)}/{len(scripts)} scripts, re-asking the rest")
+            for i in missing:
+                by_index[i] = self._evaluate_one(style_digest, scripts[i])
+        return [by_index[i] for i in range(len(scripts))]
+
+#changed: quality report into dictionary from a string.
@@ -1,5 +1,8 @@
-import json
 from Agents.base_agent import BaseAgent
+from Agents.style_digest import get_style_digest
+
+HOOKS_EXAMPLE = {"curiosity_hook": "", "emotional_hook": "", "story_hook": "", "data_hook": ""}
+
 
 class ScriptWriterAgent(BaseAgent):
     def run(self, state):
@@ -36,7 +39,8 @@ class ScriptWriterAgent(BaseAgent):
             return state
 #  2) NORMAL: First-pass script generation
         topic = state["topic"]
-        style_profile = json.dumps(state["style_profile"], indent=2)
+        style_profile = get_style_digest(state["style_profile"], "writer")
+        hook_style = get_style_digest(state["style_profile"], "hooks")
         research = state.get("research_notes", "")
         duration = state.get("duration", 180)  # default 3 min if not provided
 
@@ -50,7 +54,7 @@ class ScriptWriterAgent(BaseAgent):
         "{topic}"
 
         Follow the influencer's tone:
-        {style_profile}
+        {hook_style}
 
         Return JSON ONLY:
         {{
@@ -61,12 +65,12 @@ class ScriptWriterAgent(BaseAgent):
         }}
         """
 
-        hooks_raw = self.call_llm(hook_prompt, temperature=1.0)
-
-        try:
-            hooks = json.loads(hooks_raw)
-        except:
-            hooks = {"raw_output": hooks_raw}
+        if state.get("hooks") and "raw_output" not in state["hooks"]:
+            # Hooks reused from an earlier run on a related topic (see Scripts/history_store.py)
+            print("♻️ ScriptWriterAgent → reusing hooks from a previous run")
+            hooks = state["hooks"]
+        else:
+            hooks = self.call_llm_json(hook_prompt, "hooks", HOOKS_EXAMPLE, temperature=1.0)
 
         # Store them for later agents or UI if needed
         state["hooks"] = hooks
@@ -1,5 +1,5 @@
-import json
 from Agents.base_agent import BaseAgent
+from Agents.style_digest import get_style_digest
 
 class ShortFormAgent(BaseAgent):
     """
@@ -7,7 +7,7 @@ class ShortFormAgent(BaseAgent):
     """
     def run(self, state):
         topic = state["topic"]
-        style_profile = json.dumps(state["style_profile"], indent=2)
+        style_profile = get_style_digest(state["style_profile"], "shortform")
         duration = state.get("duration", 60)  # typical short-form 30–90s
 
         # Aim for ~2.5 words/sec
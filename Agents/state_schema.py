@@ -9,7 +9,8 @@ class ScriptState(TypedDict, total=False):
     research_notes: Optional[str]
     draft_script: Optional[str]
     edited_script: Optional[str]
-    quality_report: Optional[str]
+    quality_report: Optional[Dict]
     processed_script: Optional[str]
     revision_count: Optional[int]
     revision_feedback: Optional[str]
+    hooks: Optional[Dict]
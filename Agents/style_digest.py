@@ -0,0 +1,213 @@
+"""
+Precompiled, token-minimized style digests.
+
+Agents used to inject `json.dumps(style_profile, indent=2)` into every prompt,
+which for YouTube profiles repeats the whole `analyses` history next to
+`merged_profile`. A digest keeps only the effective style (merged profile, or
+the analyses when nothing is merged yet), only the fields a role actually
+needs, and compact JSON separators.
+
+Digests are stored inside each profile under "style_digest" together with a
+hash of the profile, so they are only recompiled when the profile changes.
+
+    python -m Agents.style_digest      # refresh all digests + token savings report
+"""
+import os
+import json
+import hashlib
+from Agents.config import STYLE_DIRS
+from Agents.tokens import count_tokens
+from Agents.llm_json import extract_json
+from Scripts.stylometry import describe_for_prompt
+
+DIGEST_KEY = "style_digest"
+DIGEST_VERSION = 2
+
+# Keys that are bookkeeping, not style
+_NON_STYLE_KEYS = {
+    "name", "analyses", "merged_profile", DIGEST_KEY, "raw_output", "merge_note", "raw_merge_output", "merge_key",
+}
+
+# Which style fields each agent role needs (None = everything but the full stylometry block)
+ROLE_FIELDS = {
+    "writer": None,
+    "hooks": ["tone", "energy_level", "hook_style", "signature_phrases", "persona", "content_archetype"],
+    "editor": [
+        "tone", "structure", "sentence_pattern", "delivery_style", "linguistic_fingerprint",
+        "signature_phrases", "forbidden_phrases", "persona",
+        "vocabulary_patterns", "sentence_rhythm", "emotional_markers",
+    ],
+    "shortform": [
+        "tone", "energy_level", "structure", "sentence_pattern", "delivery_style", "hook_style",
+        "signature_phrases", "forbidden_phrases", "persona", "emotional_beats",
+        "vocabulary_patterns", "sentence_rhythm",
+    ],
+    "quality": [
+        "tone", "structure", "sentence_pattern", "delivery_style", "linguistic_fingerprint",
+        "signature_phrases", "forbidden_phrases", "persona",
+        "vocabulary_patterns", "sentence_rhythm",
+    ],
+}
+
+MAX_LIST_ITEMS = 10
+
+
+def profile_hash(profile: dict) -> str:
+    """Stable content hash of a profile (ignores the stored digest itself)."""
+    body = {k: v for k, v in profile.items() if k != DIGEST_KEY}
+    raw = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _compact(value):
+    """Drop empty values, trim strings, dedupe and cap lists."""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            v = _compact(v)
+            if v not in ("", [], {}, None):
+                out[k] = v
+        return out
+    if isinstance(value, list):
+        seen, out = set(), []
+        for item in value:
+            item = _compact(item)
+            key = json.dumps(item, sort_keys=True, ensure_ascii=False)
+            if item in ("", [], {}, None) or key in seen:
+                continue
+            seen.add(key)
+            out.append(item)
+        return out[:MAX_LIST_ITEMS]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def _recover_raw(text) -> dict | None:
+    """Merged profiles saved as unparsed model output (e.g. ```json fenced) are still usable."""
+    return extract_json(text)[0]
+
+
+def effective_style(profile: dict) -> dict:
+    """
+    The style an agent should follow, for any profile shape in the repo:
+    - ingested profiles: merged_profile["style_profile"], else the analyses
+    - personalized / creator-merged profiles: the flat dict itself
+    """
+    merged = profile.get("merged_profile")
+    if isinstance(merged, dict) and set(merged) & {"raw_merge", "raw_output"}:
+        merged = _recover_raw(merged.get("raw_merge") or merged.get("raw_output"))
+    if isinstance(merged, dict):
+        style = merged.get("style_profile", merged)
+        if isinstance(style, dict) and "raw_output" not in style:
+            return {k: v for k, v in style.items() if k != "consistency_score"}
+
+    analyses = [a for a in profile.get("analyses", []) if isinstance(a, dict) and "raw_output" not in a]
+    if analyses:
+        # Latest analysis wins for scalar fields, list fields are unioned
+        style = {}
+        for analysis in analyses:
+            for k, v in analysis.items():
+                if isinstance(v, list) and isinstance(style.get(k), list):
+                    style[k] = style[k] + v
+                else:
+                    style[k] = v
+        return style
+
+    return {k: v for k, v in profile.items() if k not in _NON_STYLE_KEYS}
+
+
+def compile_digest(profile: dict, role: str) -> str:
+    fields = ROLE_FIELDS[role]
+    style = effective_style(profile)
+    if fields is not None:
+        style = {k: style[k] for k in fields if k in style}
+    elif isinstance(style.get("stylometry"), dict):
+        # The measured numbers as one summary line instead of the whole nested block
+        style = dict(style, stylometry=describe_for_prompt(style["stylometry"]))
+    return json.dumps(_compact(style), ensure_ascii=False, separators=(",", ":"))
+
+
+def attach_style_digest(profile: dict) -> dict:
+    """(Re)compile the per-role digests into the profile if it changed. Returns the profile."""
+    current = profile_hash(profile)
+    stored = profile.get(DIGEST_KEY) or {}
+    if stored.get("source_hash") == current and stored.get("version") == DIGEST_VERSION:
+        return profile
+    profile[DIGEST_KEY] = {
+        "version": DIGEST_VERSION,
+        "source_hash": current,
+        "roles": {role: compile_digest(profile, role) for role in ROLE_FIELDS},
+    }
+    return profile
+
+
+def get_style_digest(profile: dict, role: str) -> str:
+    """
+    Prompt-ready style text for `role`.
+    Uses the precompiled digest when it was built from this exact profile, otherwise
+    compiles on the fly (profiles edited after saving, freshly merged creator styles, ...).
+    """
+    stored = (profile.get(DIGEST_KEY) or {})
+    if (stored.get("version") == DIGEST_VERSION and role in stored.get("roles", {})
+            and stored.get("source_hash") == profile_hash(profile)):
+        return stored["roles"][role]
+    return compile_digest(profile, role)
+
+
+def token_savings(profile: dict) -> dict:
+    """Tokens of the old full `json.dumps(indent=2)` injection vs. each role's digest."""
+    body = {k: v for k, v in profile.items() if k != DIGEST_KEY}
+    full_tokens = count_tokens(json.dumps(body, indent=2))
+    report = {"full_profile_tokens": full_tokens, "roles": {}}
+    for role in ROLE_FIELDS:
+        digest_tokens = count_tokens(get_style_digest(profile, role))
+        report["roles"][role] = {
+            "digest_tokens": digest_tokens,
+            "saved_tokens": full_tokens - digest_tokens,
+            "saved_pct": round(100 * (full_tokens - digest_tokens) / full_tokens, 1) if full_tokens else 0.0,
+        }
+    return report
+
+
+def _digest_stamp(profile: dict) -> tuple:
+    stored = profile.get(DIGEST_KEY) or {}
+    return stored.get("version"), stored.get("source_hash")
+
+
+def refresh_all_digests() -> list[dict]:
+    """Recompile stale digests for every saved profile and report token savings per influencer."""
+    results = []
+    for platform, styles_dir in STYLE_DIRS.items():
+        if not os.path.isdir(styles_dir):
+            continue
+        for file_name in sorted(os.listdir(styles_dir)):
+            if not file_name.endswith(".json"):
+                continue
+            path = os.path.join(styles_dir, file_name)
+            with open(path, "r", encoding="utf-8") as f:
+                profile = json.load(f)
+
+            # A DIGEST_VERSION bump recompiles too, even when the profile itself is unchanged
+            before = _digest_stamp(profile)
+            attach_style_digest(profile)
+            recompiled = _digest_stamp(profile) != before
+            if recompiled:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(profile, f, indent=2, ensure_ascii=False)
+
+            results.append({
+                "platform": platform,
+                "influencer": os.path.splitext(file_name)[0],
+                "recompiled": recompiled,
+                **token_savings(profile),
+            })
+    return results
+
+
+if __name__ == "__main__":
+    for r in refresh_all_digests():
+        flag = "🔄 recompiled" if r["recompiled"] else "✅ up to date"
+        print(f"\n{r['platform']}/{r['influencer']} ({flag}) — full profile: {r['full_profile_tokens']} tokens")
+        for role, s in r["roles"].items():
+            print(f"   {role:<10} {s['digest_tokens']:>5} tokens  (saves {s['saved_tokens']}, {s['saved_pct']}%)")
@@ -0,0 +1,25 @@
+from functools import lru_cache
+from Agents.config import LLM
+
+
+@lru_cache(maxsize=4)
+def _encoder(model: str):
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        # tiktoken missing or its BPE file can't be downloaded (offline)
+        return None
+
+
+def count_tokens(text: str, model: str = LLM) -> int:
+    """
+    Token count for `text` under `model`'s tokenizer.
+    Falls back to the ~4 chars/token rule of thumb when tiktoken is unavailable.
+    """
+    if not text:
+        return 0
+    enc = _encoder(model)
+    if enc is None:
+        return max(1, len(text) // 4)
+    return len(enc.encode(text, disallowed_special=()))
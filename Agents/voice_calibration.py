@@ -1,19 +1,70 @@
+import os
 import json
+import hashlib
+import threading
 from Agents.base_agent import BaseAgent
-import re
-
-def safe_json_loads(text):
-        try:
-            return json.loads(text)
-        except:
-            match = re.search(r"\{.*\}", text, re.DOTALL)
-            if match:
-                try:
-                    return json.loads(match.group())
-                except:
-                    return {"raw_output": text}
-            return {"raw_output": text}
-        
+from Agents.config import CACHE_DIR
+from Scripts.stylometry import analyze_text, combine_stats, describe_for_prompt
+
+MERGE_CACHE_DIR = os.path.join(CACHE_DIR, "style_merges")
+CREATOR_STYLE_CACHE_DIR = os.path.join(CACHE_DIR, "creator_styles")
+_cache_memo = {}
+_cache_memo_lock = threading.Lock()
+
+# Shapes of the JSON replies (response_format schemas, see Agents/llm_json.py)
+CREATOR_STYLE_EXAMPLE = {
+    "tone": "", "structure": "", "sentence_pattern": "", "signature_phrases": [""], "persona": "",
+    "vocabulary_patterns": [""], "sentence_rhythm": "", "emotional_markers": [""], "forbidden_phrases": [""],
+}
+MERGED_STYLE_EXAMPLE = {
+    "tone": "", "structure": "", "sentence_pattern": "", "signature_phrases": [""], "persona": "",
+    "vocabulary_patterns": [""], "emotional_markers": [""], "sentence_rhythm": "",
+}
+
+def style_fingerprint(style: dict) -> str:
+    """Content hash of a style dict; changes whenever the style changes."""
+    body = {k: v for k, v in style.items() if k not in ("raw_output", "merge_key", "style_digest")}
+    raw = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def samples_key(samples: list[str]) -> str:
+    """Content hash of a set of writing samples (order-independent)."""
+    h = hashlib.sha1()
+    for sample in sorted(s.strip() for s in samples):
+        h.update(sample.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+def _read_cached(cache_dir: str, key: str) -> dict | None:
+    path = os.path.join(cache_dir, f"{key}.json")
+    with _cache_memo_lock:
+        if path in _cache_memo:
+            return dict(_cache_memo[path])
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    with _cache_memo_lock:
+        _cache_memo[path] = cached
+    return dict(cached)
+
+
+def _write_cached(cache_dir: str, key: str, data: dict):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.json")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    with _cache_memo_lock:
+        _cache_memo[path] = data
+
+
 class VoiceCalibrationAgent(BaseAgent):
     """
     Analyzes creator-provided writing samples and extracts a personalized style profile.
@@ -41,7 +92,12 @@ class VoiceCalibrationAgent(BaseAgent):
         state["creator_style"] = profile
         return state
 
-    def analyze_creator_style(self, samples: list[str]) -> dict:
+    @staticmethod
+    def cached_creator_style(samples: list[str]) -> dict | None:
+        """Previously extracted style for exactly these samples, or None."""
+        return _read_cached(CREATOR_STYLE_CACHE_DIR, samples_key(samples))
+
+    def analyze_creator_style(self, samples: list[str], use_cache: bool = True) -> dict:
         """
         Analyze 1-3 writing samples and extract creator's voice fingerprint.
         
@@ -57,10 +113,21 @@ class VoiceCalibrationAgent(BaseAgent):
         - sentence_rhythm
         - emotional_markers
         - forbidden_phrases
+
+        Results are cached on disk by a hash of the samples, so uploading the
+        same files again skips the LLM call.
         """
-        
+        key = samples_key(samples)
+        if use_cache:
+            cached = _read_cached(CREATOR_STYLE_CACHE_DIR, key)
+            if cached is not None:
+                print("♻️ VoiceCalibrationAgent → reusing cached creator style")
+                return cached
+
         # Combine samples with clear separation
         joined_samples = "\n\n--- SAMPLE BREAK ---\n\n".join(samples)
+        # Numbers are measured locally; the LLM describes the qualitative voice
+        stats = analyze_text("\n\n".join(samples))
 
         prompt = f"""
             You are an expert writing style analyst.
@@ -84,6 +151,9 @@ class VoiceCalibrationAgent(BaseAgent):
             "forbidden_phrases": ["clichés", "or", "expressions", "the", "creator", "avoids"]
             }}
 
+            MEASURED (do not re-estimate, stay consistent with these numbers):
+            {describe_for_prompt(stats)}
+
             RULES:
             - Be specific and concrete
             - Base everything on actual patterns in the text
@@ -95,15 +165,10 @@ class VoiceCalibrationAgent(BaseAgent):
             """
 
         print("🔬 VoiceCalibrationAgent → analyzing creator's writing style...")
-        response = self.call_llm(prompt, temperature=0.3)
-
-        try:
-            style_profile = json.loads(response)
-            print("✅ Creator style profile extracted successfully")
-            return style_profile
-        except json.JSONDecodeError as e:
-            print(f"⚠️ JSON parsing failed: {e}")
-            print(f"Raw response: {response[:500]}")
+        style_profile = self.call_llm_json(prompt, "creator_style", CREATOR_STYLE_EXAMPLE, temperature=0.3)
+
+        if "raw_output" in style_profile:
+            print(f"Raw response: {style_profile['raw_output'][:500]}")
             # Return a minimal valid structure
             return {
                 "tone": "unable to parse",
@@ -111,10 +176,15 @@ class VoiceCalibrationAgent(BaseAgent):
                 "sentence_pattern": "unable to parse",
                 "signature_phrases": [],
                 "persona": "unable to parse",
-                "raw_output": response
+                "raw_output": style_profile["raw_output"]
             }
+        if stats.get("word_count"):
+            style_profile["stylometry"] = stats
+        _write_cached(CREATOR_STYLE_CACHE_DIR, key, style_profile)
+        print("✅ Creator style profile extracted successfully")
+        return style_profile
 
-    def merge_styles(self, creator_style: dict, influencer_style: dict) -> dict:
+    def merge_styles(self, creator_style: dict, influencer_style: dict, use_cache: bool = True) -> dict:
         """
         Merge creator's voice fingerprint with influencer's macro style.
         
@@ -123,6 +193,10 @@ class VoiceCalibrationAgent(BaseAgent):
         - Creator provides: micro vocabulary, rhythm nuances, emotional markers
         
         Result: Influencer's framework + Creator's voice fingerprint
+
+        Results are cached on disk by (creator fingerprint, influencer profile version),
+        so repeat generations with the same inputs skip the LLM round-trip.
+        The cache key is returned in the profile as "merge_key".
         """
 
         # Clean creator style (remove analysis artifacts)
@@ -137,6 +211,13 @@ class VoiceCalibrationAgent(BaseAgent):
         else:
             influencer_clean = influencer_style
 
+        merge_key = self.merge_cache_key(creator_style, influencer_style)
+        if use_cache:
+            cached = _read_cached(MERGE_CACHE_DIR, merge_key)
+            if cached is not None:
+                print("♻️ VoiceCalibrationAgent → reusing cached merged style")
+                return cached
+
         prompt = f"""
         You are a style synthesis expert.
 
@@ -153,10 +234,10 @@ class VoiceCalibrationAgent(BaseAgent):
         The result should FEEL like the influencer but have the creator's subtle voice markers.
 
         --- INFLUENCER STYLE (PRIMARY - MACRO) ---
-        {json.dumps(influencer_clean, indent=2)}
+        {json.dumps({k: v for k, v in influencer_clean.items() if k != "stylometry"}, indent=2)}
 
         --- CREATOR STYLE (SECONDARY - MICRO) ---
-        {json.dumps(creator_clean, indent=2)}
+        {json.dumps({k: v for k, v in creator_clean.items() if k != "stylometry"}, indent=2)}
 
         MERGE STRATEGY:
         - Keep influencer's: overall tone category, structure type, persona identity
@@ -185,23 +266,32 @@ class VoiceCalibrationAgent(BaseAgent):
         """
 
         print("🔀 VoiceCalibrationAgent → merging styles (70% influencer, 30% creator)...")
-        response = self.call_llm(prompt, temperature=0.3)
-
-        try:
-            merged_profile = json.loads(response)
-            if "signature_phrases" not in merged_profile or not isinstance(merged_profile["signature_phrases"], list):
-                merged_profile["signature_phrases"] = []
-            print("✅ Styles merged successfully")
-            return merged_profile
-        
-        except json.JSONDecodeError as e:
-            print(f"⚠️ Merge JSON parsing failed: {e}")
-            print(f"Raw response: {response[:500]}")
-            
+        merged_profile = self.call_llm_json(prompt, "merged_style", MERGED_STYLE_EXAMPLE, temperature=0.3)
+
+        if "raw_output" in merged_profile:
+            print(f"Raw response: {merged_profile['raw_output'][:500]}")
             # Fallback: Return influencer style with creator note
             print("⚠️ Falling back to influencer style")
             fallback = influencer_clean.copy()
             fallback["merge_note"] = "Merge failed - using influencer style only"
-            fallback["raw_merge_output"] = response
+            fallback["raw_merge_output"] = merged_profile["raw_output"]
             return fallback
-        
+
+        if "signature_phrases" not in merged_profile or not isinstance(merged_profile["signature_phrases"], list):
+            merged_profile["signature_phrases"] = []
+        # Measured numbers are blended locally with the same 70/30 priority
+        influencer_stats = (influencer_clean.get("style_profile") or influencer_clean).get("stylometry")
+        blended = combine_stats([influencer_stats, creator_clean.get("stylometry")], [0.7, 0.3])
+        if blended:
+            merged_profile["stylometry"] = blended
+        merged_profile["merge_key"] = merge_key
+        _write_cached(MERGE_CACHE_DIR, merge_key, merged_profile)
+        print("✅ Styles merged successfully")
+        return merged_profile
+
+    @staticmethod
+    def merge_cache_key(creator_style: dict, influencer_style: dict) -> str:
+        """(creator fingerprint, influencer profile version) → cache key."""
+        if "merged_profile" in influencer_style:
+            influencer_style = influencer_style["merged_profile"]
+        return f"{style_fingerprint(creator_style)}_{style_fingerprint(influencer_style)}"
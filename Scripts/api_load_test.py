@@ -0,0 +1,169 @@
+"""
+Load test for the generation API (api_server.py).
+
+    python -m Scripts.api_load_test --requests 40 --clients 8 --workers 4
+
+By default everything runs in this process against the fake LLM server
+(Scripts/fake_llm_server.py), so no API quota is used: the fake server and
+the API server each get a background thread. Pass --api-url to target an
+API server that is already running instead.
+
+Every virtual client submits generations one after another, follows the SSE
+stream to the end and retries on 429/503. Reported: throughput, end-to-end
+latency (p50/p95), time to first token and the number of rejected submits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError, HTTPRequest
+
+RETRY_SECONDS = 0.5
+
+
+def serve_api_in_background(workers: int, client_concurrency: int, chat_latency: float) -> str:
+    """Fake LLM + API server on daemon threads. Returns the API base URL."""
+    from Scripts.fake_llm_server import serve_in_background
+    llm_url, _ = serve_in_background(chat_latency=chat_latency)
+    # llm_client reads these at import time, so they must be set before api_server is imported
+    os.environ.update(OPENAI_BASE_URL=llm_url, OPENAI_API_KEY="fake")
+    import tornado.ioloop
+    import tornado.netutil
+    from tornado.httpserver import HTTPServer
+    import api_server
+
+    started = threading.Event()
+    state = {}
+
+    def run():
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        service = api_server.Service(workers=workers, max_pending=10_000, client_concurrency=client_concurrency)
+        sockets = tornado.netutil.bind_sockets(0, "127.0.0.1")
+        HTTPServer(api_server.make_app(service)).add_sockets(sockets)
+        state["port"] = sockets[0].getsockname()[1]
+        started.set()
+        tornado.ioloop.IOLoop.current().start()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return f"http://127.0.0.1:{state['port']}/v1"
+
+
+async def follow_events(http, events_url: str) -> dict:
+    """Reads an SSE stream to its final event. Returns first-token time, counts and outcome."""
+    stats = {"first_token": None, "tokens": 0, "stages": 0, "outcome": None}
+    buffer = ""
+
+    def on_chunk(chunk: bytes):
+        nonlocal buffer
+        buffer += chunk.decode("utf-8")
+        while "\n\n" in buffer:
+            message, buffer = buffer.split("\n\n", 1)
+            fields = dict(line.split(": ", 1) for line in message.splitlines() if ": " in line and not line.startswith(":"))
+            event = fields.get("event")
+            if event == "token":
+                stats["tokens"] += 1
+                if stats["first_token"] is None:
+                    stats["first_token"] = time.perf_counter()
+            elif event == "stage":
+                stats["stages"] += 1
+            elif event in ("done", "failed"):
+                stats["outcome"] = event
+
+    await http.fetch(HTTPRequest(events_url, streaming_callback=on_chunk, request_timeout=3600))
+    return stats
+
+
+async def virtual_client(http, api_url: str, client: str, jobs: asyncio.Queue, body: dict, results: list, rejected: dict):
+    while True:
+        try:
+            n = jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        request = dict(body, topic=f"{body['topic']} #{n}")
+        start = time.perf_counter()
+        while True:
+            try:
+                response = await http.fetch(f"{api_url}/generations", method="POST", body=json.dumps(request),
+                                            headers={"X-Client-Id": client, "Content-Type": "application/json"})
+                break
+            except HTTPClientError as e:
+                if e.code not in (429, 503):
+                    raise
+                rejected[e.code] = rejected.get(e.code, 0) + 1
+                await asyncio.sleep(RETRY_SECONDS)
+        job = json.loads(response.body)
+        stats = await follow_events(http, api_url.rsplit("/v1", 1)[0] + job["events_url"])
+        end = time.perf_counter()
+        results.append({
+            "latency": end - start,
+            "ttft": (stats["first_token"] - start) if stats["first_token"] else None,
+            **stats,
+        })
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+
+async def run_load(api_url: str, requests: int, clients: int, per_client: int, body: dict) -> dict:
+    AsyncHTTPClient.configure(None, max_clients=clients * per_client * 2 + 10)
+    http = AsyncHTTPClient()
+    if not body.get("influencer"):
+        profiles = json.loads((await http.fetch(f"{api_url}/profiles")).body)
+        body["influencer"] = profiles[body["platform"]][0]
+
+    jobs = asyncio.Queue()
+    for n in range(requests):
+        jobs.put_nowait(n)
+    results, rejected = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        virtual_client(http, api_url, f"load-{c}", jobs, body, results, rejected)
+        for c in range(clients) for _ in range(per_client)
+    ))
+    wall = time.perf_counter() - start
+
+    latencies = [r["latency"] for r in results]
+    ttfts = [r["ttft"] for r in results if r["ttft"] is not None]
+    return {
+        "requests": len(results),
+        "failed": sum(1 for r in results if r["outcome"] != "done"),
+        "wall_seconds": round(wall, 2),
+        "throughput_per_min": round(60 * len(results) / wall, 1) if wall else 0.0,
+        "latency_p50": round(statistics.median(latencies), 2) if latencies else 0.0,
+        "latency_p95": round(percentile(latencies, 0.95), 2),
+        "ttft_p50": round(statistics.median(ttfts), 2) if ttfts else None,
+        "tokens_streamed": sum(r["tokens"] for r in results),
+        "rejected_429": rejected.get(429, 0),
+        "rejected_503": rejected.get(503, 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the generation API.")
+    parser.add_argument("--api-url", help="Existing API base URL, e.g. http://127.0.0.1:8000/v1 (default: start one on the fake LLM)")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=4, help="Distinct X-Client-Id values")
+    parser.add_argument("--per-client", type=int, default=2, help="Parallel submitters per client")
+    parser.add_argument("--workers", type=int, default=4, help="Generation pool size of the in-process server")
+    parser.add_argument("--client-concurrency", type=int, default=2)
+    parser.add_argument("--chat-latency", type=float, default=0.2, help="Fake LLM seconds per completion")
+    parser.add_argument("--influencer")
+    parser.add_argument("--platform", default="youtube")
+    parser.add_argument("--topic", default="Why most people never finish what they start")
+    args = parser.parse_args()
+
+    api_url = args.api_url or serve_api_in_background(args.workers, args.client_concurrency, args.chat_latency)
+    body = {"topic": args.topic, "influencer": args.influencer, "platform": args.platform}
+    print(f"🚀 {args.requests} generations, {args.clients} clients × {args.per_client} → {api_url}")
+    report = asyncio.run(run_load(api_url, args.requests, args.clients, args.per_client, body))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Audio pre-stage for video transcription.
+
+Uploading a whole MP4/MOV to the transcription endpoint is slow, hits the
+upload size cap and runs as one long call. Instead the audio track is demuxed
+with ffmpeg to compact mono 16 kHz MP3 and split on silence into chunks of
+bounded duration. The chunks are transcribed concurrently, and their segments
+are stitched back together with timestamps offset by each chunk's start.
+
+Without ffmpeg on PATH the original file is uploaded as before.
+"""
+import glob
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from llm_client import llm_client
+
+TRANSCRIBE_MODEL = "gpt-4o-mini-transcribe"
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_BITRATE = "32k"
+MAX_CHUNK_SECONDS = 300        # upper bound per transcription call
+MIN_CHUNK_SECONDS = 60         # don't cut shorter chunks than this at a silence
+SILENCE_DB = -35               # silencedetect noise floor
+SILENCE_MIN_SECONDS = 0.4
+MAX_WORKERS = 4
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# Models that can return per-segment timestamps
+_SEGMENT_MODELS = {"whisper-1"}
+
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?[\d.]+)")
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):([\d.]+)")
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def _run_ffmpeg(args: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostdin", "-y", *args],
+        capture_output=True, text=True, check=True
+    )
+
+
+def extract_audio(video_path: str, out_dir: str) -> str:
+    """Demux the audio track to mono 16 kHz MP3 (a fraction of the video size)."""
+    audio_path = os.path.join(out_dir, "audio.mp3")
+    _run_ffmpeg([
+        "-i", video_path, "-vn", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE),
+        "-c:a", "libmp3lame", "-b:a", AUDIO_BITRATE, audio_path,
+    ])
+    return audio_path
+
+
+def detect_silences(audio_path: str) -> tuple[float, list[tuple[float, float]]]:
+    """Total duration and (start, end) of every silence, from ffmpeg's silencedetect filter."""
+    result = _run_ffmpeg([
+        "-i", audio_path,
+        "-af", f"silencedetect=noise={SILENCE_DB}dB:d={SILENCE_MIN_SECONDS}",
+        "-f", "null", "-",
+    ])
+    log = result.stderr
+    duration = 0.0
+    match = _DURATION_RE.search(log)
+    if match:
+        h, m, s = match.groups()
+        duration = int(h) * 3600 + int(m) * 60 + float(s)
+
+    starts = [max(float(s), 0.0) for s in _SILENCE_START_RE.findall(log)]
+    ends = [float(e) for e in _SILENCE_END_RE.findall(log)]
+    # A trailing silence has a start but no end
+    ends += [duration] * (len(starts) - len(ends))
+    return duration, list(zip(starts, ends))
+
+
+def plan_cuts(duration: float, silences: list[tuple[float, float]],
+              max_seconds: float = MAX_CHUNK_SECONDS, min_seconds: float = MIN_CHUNK_SECONDS) -> list[float]:
+    """
+    Cut points (seconds) so that no chunk is longer than `max_seconds`.
+    Each cut lands in the middle of the latest silence that keeps the chunk
+    under the limit; with no usable silence the chunk is cut hard at the limit.
+    """
+    midpoints = [(s + e) / 2 for s, e in silences]
+    cuts, chunk_start = [], 0.0
+    while duration - chunk_start > max_seconds:
+        window = [m for m in midpoints if chunk_start + min_seconds <= m <= chunk_start + max_seconds]
+        cut = window[-1] if window else chunk_start + max_seconds
+        cuts.append(round(cut, 3))
+        chunk_start = cut
+    return cuts
+
+
+def split_audio(audio_path: str, cuts: list[float], out_dir: str) -> list[tuple[float, str]]:
+    """Split at `cuts` without re-encoding. Returns (start_seconds, path) per chunk."""
+    if not cuts:
+        return [(0.0, audio_path)]
+    pattern = os.path.join(out_dir, "chunk_%03d.mp3")
+    _run_ffmpeg([
+        "-i", audio_path, "-f", "segment",
+        "-segment_times", ",".join(f"{c:.3f}" for c in cuts),
+        "-c", "copy", "-reset_timestamps", "1", pattern,
+    ])
+    starts = [0.0] + cuts
+    # ffmpeg skips cuts past the end of the stream, so trust the files it actually wrote
+    chunks = []
+    for path in sorted(glob.glob(os.path.join(out_dir, "chunk_*.mp3"))):
+        index = int(os.path.basename(path)[len("chunk_"):-len(".mp3")])
+        if index < len(starts) and os.path.getsize(path) > 0:
+            chunks.append((starts[index], path))
+    return chunks or [(0.0, audio_path)]
+
+
+def _transcribe_file(path: str, model: str) -> dict:
+    """One transcription call. Returns {"text", "segments"} with chunk-relative times."""
+    with open(path, "rb") as audio_file:
+        if model in _SEGMENT_MODELS:
+            response = llm_client.audio.transcriptions.create(
+                model=model, file=audio_file, response_format="verbose_json"
+            )
+            segments = [
+                {"start": s.start, "end": s.end, "text": s.text.strip()}
+                for s in (response.segments or [])
+            ]
+            return {"text": response.text.strip(), "segments": segments}
+
+        text = llm_client.audio.transcriptions.create(
+            model=model, file=audio_file, response_format="text"
+        )
+        return {"text": str(text).strip(), "segments": []}
+
+
+def stitch_transcripts(parts: list[dict]) -> dict:
+    """Join chunk transcripts in order, offsetting segment times by each chunk's start."""
+    text = " ".join(p["text"] for p in parts if p["text"])
+    segments = []
+    for p in parts:
+        if p["segments"]:
+            segments += [
+                {"start": round(s["start"] + p["offset"], 3), "end": round(s["end"] + p["offset"], 3), "text": s["text"]}
+                for s in p["segments"]
+            ]
+        elif p["text"]:
+            # Text-only models: one segment per chunk
+            segments.append({"start": p["offset"], "end": p["offset"] + p["duration"], "text": p["text"]})
+    return {"text": text, "segments": segments}
+
+
+def transcribe_chunks(chunks: list[tuple[float, str]], duration: float, model: str = TRANSCRIBE_MODEL,
+                      max_workers: int = MAX_WORKERS) -> list[dict]:
+    """Transcribe (start_seconds, path) chunks concurrently. Returns parts for stitch_transcripts()."""
+    bounds = [s for s, _ in chunks] + [duration]
+
+    def transcribe(indexed):
+        i, (offset, path) = indexed
+        t = time.perf_counter()
+        part = _transcribe_file(path, model)
+        print(f"   chunk {i + 1}/{len(chunks)} transcribed in {time.perf_counter() - t:.1f}s")
+        return dict(part, offset=offset, duration=bounds[i + 1] - offset)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        return list(pool.map(transcribe, enumerate(chunks)))
+
+
+def transcribe_video(video_path: str, model: str = TRANSCRIBE_MODEL, max_workers: int = MAX_WORKERS,
+                     stats: dict | None = None) -> dict:
+    """
+    Transcribe a local video via the audio pre-stage.
+    Returns {"text", "segments"}; `stats` (optional) receives bytes uploaded and timings.
+    """
+    start = time.perf_counter()
+    video_bytes = os.path.getsize(video_path)
+
+    def upload_whole(reason: str) -> dict:
+        print(f"⚠️ {reason}, uploading the full video for transcription.")
+        if video_bytes > MAX_UPLOAD_BYTES:
+            print(f"⚠️ {video_bytes / 1e6:.1f} MB is above the {MAX_UPLOAD_BYTES / 1e6:.0f} MB upload limit.")
+        part = _transcribe_file(video_path, model)
+        result = stitch_transcripts([dict(part, offset=0.0, duration=0.0)])
+        if stats is not None:
+            stats.update(video_bytes=video_bytes, uploaded_bytes=video_bytes, chunks=1,
+                         wall_seconds=round(time.perf_counter() - start, 3))
+        return result
+
+    if not ffmpeg_available():
+        return upload_whole("ffmpeg not found")
+
+    with tempfile.TemporaryDirectory(prefix="audio_prep_") as work_dir:
+        t0 = time.perf_counter()
+        try:
+            audio_path = extract_audio(video_path, work_dir)
+            duration, silences = detect_silences(audio_path)
+            chunks = split_audio(audio_path, plan_cuts(duration, silences), work_dir)
+        except subprocess.CalledProcessError:
+            return upload_whole("ffmpeg could not extract the audio track")
+        prep_seconds = time.perf_counter() - t0
+
+        uploaded = sum(os.path.getsize(p) for _, p in chunks)
+        print(
+            f"🎧 Audio {video_bytes / 1e6:.1f} MB → {uploaded / 1e6:.1f} MB, "
+            f"{duration:.0f}s in {len(chunks)} chunk(s) ({prep_seconds:.1f}s prep)"
+        )
+
+        parts = transcribe_chunks(chunks, duration, model, max_workers)
+
+    result = stitch_transcripts(parts)
+    if stats is not None:
+        stats.update(video_bytes=video_bytes, uploaded_bytes=uploaded, chunks=len(chunks),
+                     audio_seconds=round(duration, 1), prep_seconds=round(prep_seconds, 3),
+                     wall_seconds=round(time.perf_counter() - start, 3))
+    return result
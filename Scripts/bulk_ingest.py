@@ -0,0 +1,196 @@
+"""
+Bulk ingestion of many videos for one influencer.
+
+    python -m Scripts.bulk_ingest "Alex Hormozi" URL_OR_FILE ... [--from-file urls.txt] [--workers 4]
+
+Sources are YouTube URLs or local video files. They are deduplicated (by
+video ID, or by content hash for files, see Scripts/source_cache.py) and
+fetched, cleaned and analyzed through a bounded worker pool. Every stage change is recorded in a manifest
+under .cache/bulk_ingest/, so an interrupted run picks up where it stopped
+when started again with the same influencer. Analyses are only appended
+while the pool runs; merged_profile is updated once at the end.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Agents.config import CACHE_DIR, STYLE_DIRS
+from Scripts.profile_store import atomic_write_json, has_source, influencer_slug, load_profile
+from Scripts.transcript_api import get_youtube_transcript
+from Scripts.audio_prep import transcribe_video
+from Scripts.transcript_cleaning import clean_transcript
+from Scripts.source_cache import cached_transcript, source_key
+from Scripts.style_analysis import ingest_style
+from Scripts.style_merge import refresh_merged_profile
+
+MANIFEST_DIR = os.path.join(CACHE_DIR, "bulk_ingest")
+DEFAULT_WORKERS = 3
+INVALID_PREFIX = "invalid:"     # manifest key of a source that could not be resolved
+
+
+class Manifest:
+    """Per-influencer progress file; every update is written atomically."""
+
+    def __init__(self, platform: str, influencer_name: str):
+        os.makedirs(MANIFEST_DIR, exist_ok=True)
+        self.path = os.path.join(MANIFEST_DIR, f"{platform}_{influencer_slug(influencer_name)}.json")
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        else:
+            self.data = {"platform": platform, "influencer": influencer_name, "items": {}, "pending_merge": False}
+
+    def add(self, key: str, source: str):
+        with self._lock:
+            self.data["items"].setdefault(key, {"source": source, "status": "pending"})
+
+    def update(self, key: str, **fields):
+        with self._lock:
+            self.data["items"][key].update(fields, updated=time.time())
+            self.save()
+
+    def set(self, **fields):
+        with self._lock:
+            self.data.update(fields)
+            self.save()
+
+    def save(self):
+        atomic_write_json(self.path, self.data)
+
+    def todo(self) -> list[str]:
+        # Unresolvable sources are recorded for the report, and retried only by resolving them again
+        return [k for k, item in self.data["items"].items()
+                if item["status"] != "done" and not k.startswith(INVALID_PREFIX)]
+
+
+def resolve_sources(sources: list[str]) -> tuple[dict, dict]:
+    """Deduplicated {key: source} in input order, plus {source: error} for sources that could not be resolved."""
+    resolved, invalid = {}, {}
+    for source in sources:
+        source = source.strip()
+        if not source or source.startswith("#"):
+            continue
+        try:
+            resolved.setdefault(source_key(source), source)
+        except (ValueError, KeyError, OSError) as e:
+            # OSError: an unreadable file, or one deleted between listing and hashing
+            print(f"⚠️ Skipping {source}: {e}")
+            invalid[source] = str(e)
+    return resolved, invalid
+
+
+def ingest_one(platform: str, influencer_name: str, key: str, source: str, manifest: Manifest):
+    """Fetch → clean → analyze → append for one source, recording each stage."""
+    start = time.perf_counter()
+    if has_source(platform, influencer_name, key):
+        manifest.update(key, status="done", stage="done", error=None, seconds=0.0)
+        return
+
+    def fetch_raw():
+        manifest.update(key, status="running", stage="fetching")
+        if key.startswith("youtube:"):
+            return get_youtube_transcript(source)
+        return transcribe_video(source)["text"]
+
+    def clean(raw_text):
+        manifest.update(key, stage="cleaning")
+        return clean_transcript(raw_text)
+
+    # Transcripts are cached per source, so a resumed run never re-fetches or re-cleans
+    transcript_text = cached_transcript(key, fetch_raw, clean)
+    if not transcript_text:
+        raise RuntimeError("no transcript")
+
+    manifest.update(key, status="running", stage="analyzing")
+    ingest_style(platform, influencer_name, transcript_text, source_id=key, merge=False)
+
+    manifest.set(pending_merge=True)
+    manifest.update(key, status="done", stage="done", error=None, seconds=round(time.perf_counter() - start, 2))
+
+
+def bulk_ingest(platform: str, influencer_name: str, sources: list[str],
+                workers: int = DEFAULT_WORKERS, merge: bool = True) -> dict:
+    """Ingest `sources` with a bounded pool, resuming from the manifest. Returns a summary."""
+    if platform not in STYLE_DIRS:
+        raise ValueError(f"Unknown platform: {platform}")
+
+    manifest = Manifest(platform, influencer_name)
+    resolved, invalid = resolve_sources(sources)
+    for key, source in resolved.items():
+        manifest.add(key, source)
+        manifest.data["items"].pop(f"{INVALID_PREFIX}{source}", None)
+    for source, error in invalid.items():
+        key = f"{INVALID_PREFIX}{source}"
+        manifest.add(key, source)
+        manifest.update(key, status="failed", stage="resolving", error=error)
+    manifest.save()
+
+    todo = manifest.todo()
+    total = sum(1 for k in manifest.data["items"] if not k.startswith(INVALID_PREFIX))
+    print(f"📦 {influencer_name}: {total} unique source(s), {total - len(todo)} already done, "
+          f"{len(todo)} to ingest with {workers} worker(s)")
+
+    failed = []
+    start = time.perf_counter()
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {
+                pool.submit(ingest_one, platform, influencer_name, key, manifest.data["items"][key]["source"], manifest): key
+                for key in todo
+            }
+            try:
+                for n, future in enumerate(as_completed(futures), 1):
+                    key = futures[future]
+                    try:
+                        future.result()
+                        print(f"✅ [{n}/{len(todo)}] {manifest.data['items'][key]['source']}")
+                    except Exception as e:
+                        failed.append(key)
+                        manifest.update(key, status="failed", error=str(e))
+                        print(f"❌ [{n}/{len(todo)}] {manifest.data['items'][key]['source']}: {e}")
+            except KeyboardInterrupt:
+                print("⏸️ Interrupted — run the same command again to resume.")
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    profile = None
+    if merge and manifest.data.get("pending_merge"):
+        # ✅ One merge for the whole batch instead of one per video
+        profile = refresh_merged_profile(platform, influencer_name, load_profile(platform, influencer_name))
+        manifest.set(pending_merge=False)
+
+    summary = {
+        "sources": total,
+        "ingested": len(todo) - len(failed),
+        "failed": [manifest.data["items"][k]["source"] for k in failed],
+        "invalid": list(invalid),
+        "seconds": round(time.perf_counter() - start, 2),
+        "analysis_count": (profile or load_profile(platform, influencer_name)).get("analysis_count", 0),
+    }
+    print(f"🏁 Done in {summary['seconds']}s: {summary['ingested']} ingested, {len(failed)} failed, "
+          f"{summary['analysis_count']} analyses in profile")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest many videos for one influencer.")
+    parser.add_argument("influencer", help='Influencer name, e.g. "Alex Hormozi"')
+    parser.add_argument("sources", nargs="*", help="YouTube URLs or local video files")
+    parser.add_argument("--from-file", help="Text file with one URL or path per line")
+    parser.add_argument("--platform", choices=sorted(STYLE_DIRS), default="youtube")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--no-merge", action="store_true", help="Skip the final merged_profile update")
+    args = parser.parse_args()
+
+    sources = list(args.sources)
+    if args.from_file:
+        with open(args.from_file, "r", encoding="utf-8") as f:
+            sources += f.read().splitlines()
+    bulk_ingest(args.platform, args.influencer, sources, workers=args.workers, merge=not args.no_merge)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Local stand-in for the OpenAI endpoints this project uses, for offline
+testing and load tests. No real model is called.
+
+    python -m Scripts.fake_llm_server --port 8765
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake streamlit run app.py
+
+- POST /v1/chat/completions: prompts that ask for JSON get an object with the
+  keys of the schema in the prompt (scores as floats, the rest as
+  placeholders); cleaning prompts echo the transcript back; everything else
+  gets placeholder prose of roughly the requested length. A json_schema
+  `response_format` is answered with an object of exactly that schema.
+  --fenced-json wraps free-form JSON replies in ```json fences and chatter,
+  like chat models often do. `stream: true` is answered with server-sent
+  events like the real API.
+- POST /v1/audio/transcriptions: a placeholder transcript whose latency grows
+  with the uploaded size, so chunked/parallel transcription can be measured.
+"""
+import argparse
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+import tornado.ioloop
+import tornado.netutil
+import tornado.web
+from tornado.httpserver import HTTPServer
+
+DEFAULT_CHAT_LATENCY = 0.2          # seconds per chat completion
+DEFAULT_TRANSCRIBE_BASE = 0.3       # seconds per transcription call
+DEFAULT_TRANSCRIBE_PER_MB = 1.0     # extra seconds per uploaded MB
+AUDIO_BYTES_PER_SECOND = 4000       # 32 kbps mono, as produced by Scripts/audio_prep.py
+MAX_BODY_BYTES = 200 * 1024 * 1024    # accept whole-video uploads too
+
+_KEY_RE = re.compile(r'"(\w+)"\s*:')
+_WORDS_RE = re.compile(r"approx\.\s*(\d+)\s*words")
+_ITEMS_RE = re.compile(r"exactly\s*(\d+)\s*\w+")
+_FILLER = (
+    "Here is the thing most people miss. You do not need more motivation, you need a system. "
+    "Start small, repeat it daily, and measure what matters. "
+)
+
+
+def _schema_block(prompt: str) -> str | None:
+    """First balanced {...} block after the word JSON in the prompt."""
+    at = prompt.find("JSON")
+    start = prompt.find("{", at) if at != -1 else -1
+    if start == -1:
+        return None
+    depth = 0
+    for i in range(start, len(prompt)):
+        if prompt[i] == "{":
+            depth += 1
+        elif prompt[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return prompt[start:i + 1]
+    return None
+
+
+def _fill(value, key: str = ""):
+    if isinstance(value, dict):
+        return {k: _fill(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [f"fake {key}".strip()]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return 0.82
+    return f"fake {key}".strip()
+
+
+def fake_json_reply(schema: str) -> str:
+    try:
+        return json.dumps(_fill(json.loads(schema)))
+    except json.JSONDecodeError:
+        # Schemas written as prose ("float (0–1)") — fill the keys we can see
+        keys = dict.fromkeys(_KEY_RE.findall(schema))
+        return json.dumps({k: 0.82 if k.endswith("_score") else f"fake {k}" for k in keys})
+
+
+def _from_schema(schema: dict, key: str = "", items: int = 1, position: int = 0):
+    kind = schema.get("type")
+    if kind == "object":
+        return {k: _from_schema(v, k, items, position) for k, v in schema.get("properties", {}).items()}
+    if kind == "array":
+        # Lists of objects get as many entries as the prompt asks for ("exactly N reports")
+        count = items if schema.get("items", {}).get("type") == "object" else 1
+        return [_from_schema(schema.get("items", {}), key, position=n) for n in range(count)]
+    if kind in ("number", "integer"):
+        return position if key == "index" else 0.82
+    if kind == "boolean":
+        return True
+    return f"fake {key}".strip()
+
+
+def fake_chat_reply(prompt: str, response_format: dict | None = None, fenced_json: bool = False) -> str:
+    if response_format and response_format.get("type") == "json_schema":
+        counts = _ITEMS_RE.findall(prompt)
+        return json.dumps(_from_schema(response_format["json_schema"]["schema"], items=int(counts[-1]) if counts else 1))
+    if "Clean the transcript" in prompt and "Transcript:" in prompt:
+        return prompt.split("Transcript:", 1)[1].strip()
+    schema = _schema_block(prompt)
+    if schema:
+        reply = fake_json_reply(schema)
+        return f"Sure! Here it is:\n```json\n{reply}\n```\nLet me know if you need changes." if fenced_json else reply
+    match = _WORDS_RE.search(prompt)
+    target_words = int(match.group(1)) if match else 120
+    words = []
+    while len(words) < target_words:
+        words += _FILLER.split()
+    return " ".join(words[:target_words])
+
+
+class ChatCompletionsHandler(tornado.web.RequestHandler):
+    async def post(self):
+        body = json.loads(self.request.body or b"{}")
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        content = fake_chat_reply(prompt, body.get("response_format"), self.settings["fenced_json"])
+        await asyncio.sleep(self.settings["chat_latency"])
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "fake")
+        created = int(time.time())
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                 "total_tokens": (len(prompt) + len(content)) // 4}
+
+        if body.get("stream"):
+            self.set_header("Content-Type", "text/event-stream")
+            self.set_header("Cache-Control", "no-cache")
+            pieces = re.findall(r"\S+\s*", content) or [""]
+            for i, piece in enumerate(pieces):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"role": "assistant", "content": piece} if i == 0 else {"content": piece},
+                                 "finish_reason": None}],
+                }
+                self.write(f"data: {json.dumps(chunk)}\n\n")
+                await self.flush()
+            done = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            self.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n")
+            return
+
+        self.write({
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+
+class TranscriptionsHandler(tornado.web.RequestHandler):
+    async def post(self):
+        upload = self.request.files["file"][0]
+        size = len(upload["body"])
+        response_format = self.get_body_argument("response_format", "json")
+        await asyncio.sleep(self.settings["transcribe_base"] + self.settings["transcribe_per_mb"] * size / 1e6)
+
+        seconds = round(size / AUDIO_BYTES_PER_SECOND, 2)
+        text = f"Fake transcript of {upload['filename']} ({size} bytes). " + _FILLER.strip()
+        if response_format == "text":
+            self.set_header("Content-Type", "text/plain; charset=utf-8")
+            self.write(text)
+        elif response_format == "verbose_json":
+            self.write({"task": "transcribe", "language": "english", "duration": seconds, "text": text,
+                        "segments": [{"id": 0, "start": 0.0, "end": seconds, "text": text}]})
+        else:
+            self.write({"text": text})
+
+
+def make_app(chat_latency: float = DEFAULT_CHAT_LATENCY, transcribe_base: float = DEFAULT_TRANSCRIBE_BASE,
+             transcribe_per_mb: float = DEFAULT_TRANSCRIBE_PER_MB, fenced_json: bool = False) -> tornado.web.Application:
+    return tornado.web.Application(
+        [
+            (r"/v1/chat/completions", ChatCompletionsHandler),
+            (r"/v1/audio/transcriptions", TranscriptionsHandler),
+        ],
+        chat_latency=chat_latency, transcribe_base=transcribe_base, transcribe_per_mb=transcribe_per_mb,
+        fenced_json=fenced_json,
+    )
+
+
+def serve_in_background(port: int = 0, **settings) -> tuple[str, callable]:
+    """Start the fake server on a daemon thread. Returns (base_url, stop)."""
+    started = threading.Event()
+    state = {}
+
+    def run():
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        server = HTTPServer(make_app(**settings), max_buffer_size=MAX_BODY_BYTES, max_body_size=MAX_BODY_BYTES)
+        sockets = tornado.netutil.bind_sockets(port, "127.0.0.1")
+        server.add_sockets(sockets)
+        state["port"] = sockets[0].getsockname()[1]
+        state["loop"] = tornado.ioloop.IOLoop.current()
+        started.set()
+        state["loop"].start()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+
+    def stop():
+        state["loop"].add_callback(state["loop"].stop)
+
+    return f"http://127.0.0.1:{state['port']}/v1", stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI endpoints for local testing.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chat-latency", type=float, default=DEFAULT_CHAT_LATENCY)
+    parser.add_argument("--transcribe-base", type=float, default=DEFAULT_TRANSCRIBE_BASE)
+    parser.add_argument("--transcribe-per-mb", type=float, default=DEFAULT_TRANSCRIBE_PER_MB)
+    parser.add_argument("--fenced-json", action="store_true", help="Wrap free-form JSON replies in ```json fences")
+    args = parser.parse_args()
+
+    app = make_app(args.chat_latency, args.transcribe_base, args.transcribe_per_mb, args.fenced_json)
+    HTTPServer(app, max_buffer_size=MAX_BODY_BYTES, max_body_size=MAX_BODY_BYTES).listen(args.port, "127.0.0.1")
+    print(f"🧪 Fake LLM server on http://127.0.0.1:{args.port}/v1")
+    print(f"   export OPENAI_BASE_URL=http://127.0.0.1:{args.port}/v1 OPENAI_API_KEY=fake")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+History of generated scripts in a local SQLite database (.cache/history.sqlite3).
+
+Outputs used to live only in the Streamlit text area. Every finished
+generation is now stored with its inputs, research notes, hooks, final script,
+quality report and timings. An FTS5 index over topic, influencer, research and
+script powers search in the app, and related_runs() finds earlier runs on a
+similar topic whose research (and hooks) can be reused instead of regenerated.
+
+Each call opens its own connection (WAL mode), so the store is safe to use from
+the generation pool threads and the API server at the same time.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from Agents.config import CACHE_DIR
+
+HISTORY_DB = os.path.join(CACHE_DIR, "history.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    topic TEXT NOT NULL,
+    influencer TEXT,
+    platform TEXT,
+    duration INTEGER,
+    research_notes TEXT,
+    hooks TEXT,
+    final_script TEXT,
+    quality_report TEXT,
+    style_score REAL,
+    revision_count INTEGER,
+    seconds REAL,
+    timings TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_created ON runs(created);
+CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(
+    topic, influencer, research_notes, final_script,
+    content='runs', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS runs_ai AFTER INSERT ON runs BEGIN
+    INSERT INTO runs_fts(rowid, topic, influencer, research_notes, final_script)
+    VALUES (new.id, new.topic, new.influencer, new.research_notes, new.final_script);
+END;
+CREATE TRIGGER IF NOT EXISTS runs_ad AFTER DELETE ON runs BEGIN
+    INSERT INTO runs_fts(runs_fts, rowid, topic, influencer, research_notes, final_script)
+    VALUES ('delete', old.id, old.topic, old.influencer, old.research_notes, old.final_script);
+END;
+"""
+_JSON_COLUMNS = ("hooks", "quality_report", "timings")
+# Dropped from "related topic" queries, where any shared word counts
+_STOPWORDS = {"a", "an", "and", "are", "for", "from", "how", "i", "in", "is", "it", "of", "on", "or",
+              "the", "this", "that", "to", "what", "why", "with", "you", "your"}
+_ready = set()
+_ready_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(HISTORY_DB), exist_ok=True)
+    conn = sqlite3.connect(HISTORY_DB, timeout=10)
+    conn.row_factory = sqlite3.Row
+    with _ready_lock:
+        if HISTORY_DB not in _ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _ready.add(HISTORY_DB)
+    return conn
+
+
+def _row(row: sqlite3.Row) -> dict:
+    run = dict(row)
+    for column in _JSON_COLUMNS:
+        if run.get(column):
+            run[column] = json.loads(run[column])
+    return run
+
+
+def _fts_query(text: str, any_term: bool = False) -> str | None:
+    """Free text → safe FTS5 query: every word quoted, AND-ed (or OR-ed)."""
+    words = re.findall(r"\w+", text.lower())
+    if any_term:
+        words = [w for w in words if w not in _STOPWORDS]
+    if not words:
+        return None
+    return (" OR " if any_term else " ").join(f'"{w}"' for w in dict.fromkeys(words))
+
+
+def record_run(result: dict) -> int:
+    """Stores one run_script_graph() result. Returns the history id."""
+    report = result.get("quality_report") or {}
+    timeline = result.get("timeline") or {}
+    timings = {"seconds": result.get("seconds"), **({"totals": timeline["totals"], "nodes": timeline["summary"]}
+                                                    if timeline else {})}
+    score = report.get("style_match_score") if isinstance(report, dict) else None
+    with _connect() as conn:
+        cursor = conn.execute(
+            "INSERT INTO runs (created, topic, influencer, platform, duration, research_notes, hooks, final_script,"
+            " quality_report, style_score, revision_count, seconds, timings)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                time.time(), result.get("topic") or "", result.get("influencer"), result.get("content_type"),
+                result.get("duration"), result.get("research_notes"),
+                json.dumps(result.get("hooks"), ensure_ascii=False) if result.get("hooks") else None,
+                result.get("processed_script"), json.dumps(report, ensure_ascii=False),
+                score if isinstance(score, (int, float)) else None,
+                result.get("revision_count"), result.get("seconds"), json.dumps(timings),
+            ),
+        )
+        run_id = cursor.lastrowid
+    conn.close()
+    return run_id
+
+
+def get_run(run_id: int) -> dict | None:
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+    conn.close()
+    return _row(row) if row else None
+
+
+def recent_runs(limit: int = 20) -> list[dict]:
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM runs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+    conn.close()
+    return [_row(r) for r in rows]
+
+
+def search_runs(text: str, limit: int = 20, platform: str | None = None,
+                influencer: str | None = None, any_term: bool = False) -> list[dict]:
+    """
+    Best matches first (bm25; topic weighs most, then influencer, script, research).
+    Each run gets a `snippet` of the matching script text.
+    """
+    query = _fts_query(text, any_term)
+    if query is None:
+        return []
+    sql = (
+        "SELECT runs.*, snippet(runs_fts, 3, '**', '**', ' … ', 24) AS snippet,"
+        " bm25(runs_fts, 10.0, 5.0, 1.0, 2.0) AS rank"
+        " FROM runs_fts JOIN runs ON runs.id = runs_fts.rowid"
+        " WHERE runs_fts MATCH ?"
+    )
+    params = [query]
+    if platform:
+        sql += " AND runs.platform = ?"
+        params.append(platform)
+    if influencer:
+        sql += " AND runs.influencer = ?"
+        params.append(influencer)
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    with _connect() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return [_row(r) for r in rows]
+
+
+def related_runs(topic: str, limit: int = 5) -> list[dict]:
+    """Earlier runs on a similar topic that have research notes to reuse."""
+    return [r for r in search_runs(topic, limit=limit * 2, any_term=True) if r.get("research_notes")][:limit]
@@ -4,47 +4,19 @@ import json
 from openai import OpenAI
 from dotenv import load_dotenv
 from llm_client import llm_client
+from Scripts.transcript_cleaning import clean_transcript
+from Scripts.style_analysis import ingest_style
+from Scripts.source_cache import cached_transcript, source_key
+from Scripts.profile_store import has_source, load_profile
+from Scripts.audio_prep import transcribe_video
 import os
-import re 
 
 load_dotenv()
 
-def safe_json_loads(text):
-    try:
-        return json.loads(text)
-    except:
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group())
-            except:
-                return {"raw_output": text}
-        return {"raw_output": text}
-
-def clean_transcript(raw_text: str) -> str:
-    # client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    prompt = f"""
-    Clean the transcript by:
-    - removing filler words
-    - fixing broken/incomplete sentences
-    - normalizing punctuation
-    - removing repeated or duplicated segments
-    - keeping ONLY what the speaker actually says
-
-    Return clean text only.
-    Transcript:
-    {raw_text}
-    """
-    cleaned = llm_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.0
-    ).choices[0].message.content
-    return cleaned.strip()  
-
 def generate_transcript_from_video(video_path: str, model: str = "gpt-4o-mini-transcribe") -> str:
     """
     Generates a transcript from a local video file using OpenAI's Whisper model.
+    The audio track is extracted and split on silence first (see Scripts/audio_prep.py).
 
     Parameters:
     -----------
@@ -59,190 +31,58 @@ def generate_transcript_from_video(video_path: str, model: str = "gpt-4o-mini-tr
     str
         The full transcribed text from the video.
     """
-    # client = openai.OpenAI()
-
     # Ensure file exists
     file_path = Path(video_path)
     if not file_path.exists():
         raise FileNotFoundError(f"Video file not found: {video_path}")
 
-    # Open and send the file to OpenAI
-    with open(file_path, "rb") as video_file:
-        response = llm_client.audio.transcriptions.create(
-            model=model,
-            file=video_file,
-            response_format="text"  # returns plain text
-        )
+    # ✅ Audio-only, silence-split chunks transcribed in parallel
+    return transcribe_video(str(file_path), model=model)["text"]
 
-    return response
 
-
-def generate_IG_style_profile(influencer_name: str, transcript_text: str):
+def generate_IG_style_profile(influencer_name: str, transcript_text: str, source_id: str | None = None, progress=None):
     """
     Generate or append style analysis for an influencer.
     Saves JSON inside the IG_influencer_styles/ folder located next to app.py.
     """
-    prompt = f"""
-        You are an expert linguistic profiler analyzing an Instagram/YouTube influencer’s communication style.
-    Extract a DEEP persona style profile.
-    Respond in pure JSON (no markdown).
-
-    Keep the output concise JSON with only these keys:
-
-    {{
-    "tone": "",
-    "energy_level": "",
-    "delivery_style": {{
-        "pacing": "",
-        "sentence_variation": "",
-        "story_usage": "",
-        "analogy_usage": "",
-        "directive_strength": ""
-    }},
-    "linguistic_fingerprint": {{
-        "average_sentence_length": "",
-        "common_sentence_types": [],
-        "rhetorical_devices": [],
-        "transition_patterns": []
-    }},
-    "hook_style": {{
-        "dominant_types": [],
-        "examples": []
-    }},
-    "signature_phrases": [],
-    "forbidden_phrases": [],
-    "persona": "",
-    "content_archetype": "",
-    "strength_indicators": [],
-    "emotional_beats": []
-    }}
-
-
-    Transcript sample:
-    {transcript_text[:7000]}
-    """
+    # ✅ Analysis (cached per video), corpus-wide phrases, append to the log, incremental merge
+    existing_data = ingest_style("instagram", influencer_name, transcript_text, source_id=source_id, progress=progress)
 
-    print("🧠 Analyzing style with OpenAI...")
-    # client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = llm_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
-    )
-
-    style_json = response.choices[0].message.content
-    new_style = safe_json_loads(style_json)
-
-    # ✅ Detect project root (one level up from Scripts/)
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.abspath(os.path.join(current_dir, os.pardir))
-
-    # ✅ Ensure influencer_styles exists inside root
-    influencer_dir = os.path.join(project_root, "IG_influencer_styles")
-    os.makedirs(influencer_dir, exist_ok=True)
-
-    # ✅ Build file path inside influencer_styles
-    influencer_file = os.path.join(
-        influencer_dir,
-        f"{influencer_name.lower().replace(' ', '_')}.json"
-    )
-
-    # ✅ Load existing or create new
-    if os.path.exists(influencer_file):
-        with open(influencer_file, "r", encoding="utf-8") as f:
-            existing_data = json.load(f)
-    else:
-        existing_data = {"name": influencer_name, "analyses": []}
-
-    # ✅ Append new analysis
-    existing_data["analyses"].append(new_style)
-
-    # ✅ Merge multiple analyses if exist
-    if len(existing_data["analyses"]) > 1:
-        merge_prompt = f"""
-        You are an expert style profiler. Merge multiple deep style analyses into one unified style profile.
-
-        Your tasks:
-        - Preserve ALL deep attributes from each sample.
-        - Identify traits consistent across most samples.
-        - Down-weight traits that appear only once.
-        - Extract averaged or representative values where relevant.
-        - Produce a SINGLE merged profile that fully reflects the influencer's communication style.
-
-        Return JSON ONLY in this structure:
-
-        {{
-        "style_profile": {{
-            "tone": "",
-            "energy_level": "",
-            "delivery_style": {{
-            "pacing": "",
-            "sentence_variation": "",
-            "story_usage": "",
-            "analogy_usage": "",
-            "directive_strength": ""
-            }},
-            "linguistic_fingerprint": {{
-            "average_sentence_length": "",
-            "common_sentence_types": [],
-            "rhetorical_devices": [],
-            "transition_patterns": []
-            }},
-            "hook_style": {{
-            "dominant_types": [],
-            "examples": []
-            }},
-            "signature_phrases": [],
-            "forbidden_phrases": [],
-            "persona": "",
-            "content_archetype": "",
-            "strength_indicators": [],
-            "emotional_beats": []
-        }},
-        "consistency_score": {{
-            "tone": 0.0,
-            "energy_level": 0.0,
-            "delivery_style": 0.0,
-            "linguistic_fingerprint": 0.0,
-            "persona": 0.0
-        }}
-        }}
-
-        Here are the analyses to merge:
-        {json.dumps(existing_data["analyses"])}
-        """
-        merged = llm_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": merge_prompt}],
-            temperature=0.3
-        ).choices[0].message.content
-
-        existing_data["merged_profile"] = safe_json_loads(merged)
-
-    # ✅ Save file in correct influencer_styles directory
-    with open(influencer_file, "w", encoding="utf-8") as f:
-        json.dump(existing_data, f, indent=2, ensure_ascii=False)
-
-    print(f"✅ Updated style profile saved at: {influencer_file}")
+    print(f"✅ Updated style profile for {influencer_name} ({existing_data['analysis_count']} analyses)")
     return existing_data
 
 
-def generate_influencer_style(influencer_name: str, video_path: str):
-    
+def generate_influencer_style(influencer_name: str, video_path: str, progress=None):
+    """
+    Transcribe, clean and analyze one video into the influencer's profile.
+    `progress(stage)` (optional) is called as the work moves through its stages.
+    """
+    progress = progress or (lambda stage, **info: None)
     print(f"🎥 Generating style for {influencer_name} from {video_path}")
 
-    # Step 1: Generate transcript
-    transcript_text = generate_transcript_from_video(video_path)
+    # ✅ Same video bytes as before → nothing to transcribe, clean or analyze again
+    source_id = source_key(video_path)
+    if has_source("instagram", influencer_name, source_id):
+        print(f"⚡ This video is already in {influencer_name}'s profile.")
+        return load_profile("instagram", influencer_name)
+
+    # Step 1: Generate + clean transcript (cached by content hash)
+    def transcribe():
+        progress("transcribing")
+        return generate_transcript_from_video(video_path)
+
+    def clean(raw_text):
+        progress("cleaning")
+        return clean_transcript(raw_text)
+
+    transcript_text = cached_transcript(source_id, transcribe, clean)
 
     if not transcript_text:
         print("❌ No transcript found, skipping style generation.")
         return None
-    
-    # 🔹 NEW: clean the transcript BEFORE style analysis
-    transcript_text = clean_transcript(transcript_text)
 
     # Step 2: Generate style profile
-    style_data = generate_IG_style_profile(influencer_name, transcript_text)
+    style_data = generate_IG_style_profile(influencer_name, transcript_text, source_id=source_id, progress=progress)
 
     print("\n🎯 Generated Style Summary:")
     print(json.dumps(style_data, indent=2, ensure_ascii=False))
@@ -0,0 +1,231 @@
+"""
+Corpus-wide signature-phrase mining with n-gram statistics (no LLM).
+
+For every influencer we keep 2–6 gram counts over all ingested transcripts in
+`<styles_dir>/_ngrams/<slug>.msgpack`, updated incrementally per video. Phrases
+are ranked by how distinctive they are against a background corpus (all other
+influencers) using the log-odds ratio with an informative Dirichlet prior
+(Monroe et al., "Fightin' Words").
+
+- signature_phrases: recurring n-grams with the highest z-scores
+- forbidden_phrases: generic phrases (common in the background, or stock
+  clichés) that this influencer never uses
+"""
+import os
+import tempfile
+import numpy as np
+import ormsgpack
+from Agents.config import STYLE_DIRS
+from Scripts.profile_store import influencer_slug, profile_lock
+from Scripts.stylometry import split_sentences, tokenize
+
+NGRAM_DIRNAME = "_ngrams"
+MIN_N, MAX_N = 2, 6
+MAX_STORED_NGRAMS = 300_000
+TOP_SIGNATURE = 15
+TOP_FORBIDDEN = 10
+PRIOR_STRENGTH = 500.0
+# Below this many transcripts the mined lists only add to the LLM's phrases instead of replacing them
+MIN_PHRASE_DOCS = 3
+
+# n-grams may not start or end on these (they glue phrases together, they aren't phrases)
+_EDGE_STOPWORDS = {
+    "the", "a", "an", "of", "to", "and", "or", "in", "on", "for", "with", "at", "by", "from",
+    "as", "that", "is", "are", "was", "be", "it", "its", "but", "so", "if", "uh", "um",
+}
+
+# Stock phrases a real voice rarely uses; forbidden unless the influencer actually says them
+STOCK_CLICHES = [
+    "in today's video", "without further ado", "let's dive in", "dive into", "delve into",
+    "game changer", "at the end of the day", "in conclusion", "unlock your potential",
+    "take it to the next level", "in this day and age", "it goes without saying",
+    "smash that like button", "don't forget to subscribe", "a testament to", "in the realm of",
+]
+
+_background_cache = {}   # path -> (mtime, store)
+
+
+def _store_path(platform: str, slug: str) -> str:
+    ngram_dir = os.path.join(STYLE_DIRS[platform], NGRAM_DIRNAME)
+    os.makedirs(ngram_dir, exist_ok=True)
+    return os.path.join(ngram_dir, f"{slug}.msgpack")
+
+
+def _empty_store() -> dict:
+    return {"docs": 0, "tokens": 0, "counts": {}, "doc_freq": {}, "cliches": {}}
+
+
+def _load_store(path: str) -> dict:
+    if not os.path.exists(path):
+        return _empty_store()
+    with open(path, "rb") as f:
+        return ormsgpack.unpackb(f.read())
+
+
+def _save_store(path: str, store: dict):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(ormsgpack.packb(store))
+    os.replace(tmp_path, path)
+
+
+def extract_ngrams(text: str) -> tuple[dict, int]:
+    """2–6 gram counts for one text (never spanning sentence boundaries) and its token count."""
+    counts, total = {}, 0
+    for sentence in split_sentences(text):
+        tokens = tokenize(sentence)
+        total += len(tokens)
+        for n in range(MIN_N, MAX_N + 1):
+            for i in range(len(tokens) - n + 1):
+                gram = tokens[i:i + n]
+                if gram[0] in _EDGE_STOPWORDS or gram[-1] in _EDGE_STOPWORDS:
+                    continue
+                key = " ".join(gram)
+                counts[key] = counts.get(key, 0) + 1
+    return counts, total
+
+
+def update_counts(platform: str, influencer_name: str, transcript_text: str, locked: bool = False) -> dict:
+    """
+    Fold one transcript into the influencer's n-gram store. Returns the updated store.
+    Pass `locked=True` when the caller already holds the influencer's profile_lock.
+    """
+    slug = influencer_slug(influencer_name)
+    if locked:
+        return _fold_counts(_store_path(platform, slug), transcript_text)
+    with profile_lock(platform, slug):
+        return _fold_counts(_store_path(platform, slug), transcript_text)
+
+
+def _fold_counts(path: str, transcript_text: str) -> dict:
+    """update_counts() body; the caller holds the profile lock."""
+    doc_counts, doc_tokens = extract_ngrams(transcript_text)
+    store = _load_store(path)
+    counts, doc_freq = store["counts"], store["doc_freq"]
+    for gram, c in doc_counts.items():
+        counts[gram] = counts.get(gram, 0) + c
+        doc_freq[gram] = doc_freq.get(gram, 0) + 1
+    store["docs"] += 1
+    store["tokens"] += doc_tokens
+    lowered = " ".join(tokenize(transcript_text))
+    cliches = store.setdefault("cliches", {})
+    for phrase in STOCK_CLICHES:
+        hits = f" {lowered} ".count(f" {phrase} ")
+        if hits:
+            cliches[phrase] = cliches.get(phrase, 0) + hits
+
+    if len(counts) > MAX_STORED_NGRAMS:
+        # Drop one-off n-grams first; they can never become signature phrases on their own
+        for gram in [g for g, c in counts.items() if c == 1]:
+            del counts[gram]
+            doc_freq.pop(gram, None)
+
+    _save_store(path, store)
+    return store
+
+
+def _background_stores(exclude_path: str) -> list[dict]:
+    stores = []
+    for platform in STYLE_DIRS:
+        ngram_dir = os.path.join(STYLE_DIRS[platform], NGRAM_DIRNAME)
+        if not os.path.isdir(ngram_dir):
+            continue
+        for file_name in os.listdir(ngram_dir):
+            path = os.path.join(ngram_dir, file_name)
+            if not file_name.endswith(".msgpack") or os.path.abspath(path) == os.path.abspath(exclude_path):
+                continue
+            mtime = os.path.getmtime(path)
+            cached = _background_cache.get(path)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, _load_store(path))
+                _background_cache[path] = cached
+            stores.append(cached[1])
+    return stores
+
+
+def _log_odds_z(y_i, n_i, y_j, n_j) -> np.ndarray:
+    """z-scores of the log-odds ratio (influencer i vs. background j) with a pooled Dirichlet prior."""
+    pooled = (y_i + y_j) / max(n_i + n_j, 1)
+    alpha = PRIOR_STRENGTH * pooled + 0.01
+    a0 = alpha.sum() if len(alpha) else 1.0
+    li = np.log((y_i + alpha) / np.maximum(n_i + a0 - y_i - alpha, 1e-9))
+    lj = np.log((y_j + alpha) / np.maximum(n_j + a0 - y_j - alpha, 1e-9))
+    return (li - lj) / np.sqrt(1.0 / (y_i + alpha) + 1.0 / (y_j + alpha))
+
+
+def _drop_subsumed(phrases: list[str], counts: dict) -> list[str]:
+    """Drop a phrase when a longer kept phrase contains it with nearly the same count."""
+    kept = []
+    for phrase in sorted(phrases, key=lambda p: -len(p.split())):
+        if any(f" {phrase} " in f" {longer} " and counts[longer] >= 0.8 * counts[phrase] for longer in kept):
+            continue
+        kept.append(phrase)
+    order = {p: i for i, p in enumerate(phrases)}
+    return sorted(kept, key=order.get)
+
+
+def mine_phrases(platform: str, influencer_name: str, store: dict | None = None) -> dict:
+    """Signature and forbidden phrases from the influencer's n-gram store (milliseconds, no LLM)."""
+    path = _store_path(platform, influencer_slug(influencer_name))
+    store = store or _load_store(path)
+    if not store["docs"]:
+        return {"signature_phrases": [], "forbidden_phrases": []}
+
+    counts, doc_freq = store["counts"], store["doc_freq"]
+    min_count = 2 if store["docs"] == 1 else 3
+    min_docs = 2 if store["docs"] >= 3 else 1
+    candidates = [g for g, c in counts.items() if c >= min_count and doc_freq.get(g, 0) >= min_docs]
+
+    background = _background_stores(path)
+    n_j = float(sum(b["tokens"] for b in background))
+    n_i = float(store["tokens"])
+
+    signature = []
+    if candidates:
+        y_i = np.array([counts[g] for g in candidates], dtype=np.float64)
+        y_j = np.array([sum(b["counts"].get(g, 0) for b in background) for g in candidates], dtype=np.float64)
+        z = _log_odds_z(y_i, n_i, y_j, n_j)
+        # Longer phrases are more characteristic than frequent bigrams at equal z
+        lengths = np.array([len(g.split()) for g in candidates], dtype=np.float64)
+        score = z * (1.0 + 0.15 * (lengths - MIN_N))
+        ranked = [candidates[i] for i in np.argsort(-score, kind="stable") if z[i] > 0]
+        signature = _drop_subsumed(ranked[: TOP_SIGNATURE * 3], counts)[:TOP_SIGNATURE]
+
+    forbidden = []
+    if background:
+        # Phrases several other creators lean on that this influencer never says
+        bg_docs = {}
+        for b in background:
+            for g, c in b["doc_freq"].items():
+                if c >= 2:
+                    bg_docs[g] = bg_docs.get(g, 0) + c
+        common = [g for g, c in sorted(bg_docs.items(), key=lambda kv: -kv[1]) if counts.get(g, 0) == 0]
+        forbidden = [g for g in common if len(g.split()) >= 3][:TOP_FORBIDDEN // 2]
+    used = store.get("cliches", {})
+    forbidden += [p for p in STOCK_CLICHES if not used.get(p) and p not in forbidden]
+
+    return {"signature_phrases": signature, "forbidden_phrases": forbidden[:TOP_FORBIDDEN]}
+
+
+def apply_mined_phrases(style_profile: dict, platform: str, influencer_name: str,
+                        previous: dict | None = None) -> dict:
+    """
+    Put the mined phrases into `style_profile`. With too few transcripts in the store the
+    existing lists (from `style_profile`, else `previous`) are kept and the mined ones appended.
+    """
+    store = _load_store(_store_path(platform, influencer_slug(influencer_name)))
+    mined = mine_phrases(platform, influencer_name, store)
+    if store["docs"] >= MIN_PHRASE_DOCS:
+        style_profile.update(mined)
+        return style_profile
+    for key, limit in (("signature_phrases", TOP_SIGNATURE), ("forbidden_phrases", TOP_FORBIDDEN)):
+        existing = style_profile.get(key) or (previous or {}).get(key) or []
+        phrases = [p for p in existing if isinstance(p, str)] + mined[key]
+        style_profile[key] = list(dict.fromkeys(phrases))[:max(limit, len(existing))]
+    return style_profile
+
+
+def ingest_phrases(platform: str, influencer_name: str, transcript_text: str, locked: bool = False) -> dict:
+    """Update counts with a new transcript and return the corpus-wide phrases."""
+    store = update_counts(platform, influencer_name, transcript_text, locked=locked)
+    return mine_phrases(platform, influencer_name, store)
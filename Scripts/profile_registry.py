@@ -0,0 +1,143 @@
+"""
+Process-wide, in-memory registry of influencer style profiles.
+
+Profiles are read from disk once, indexed by platform ("youtube" / "instagram")
+and name, and served from memory on every Streamlit rerun. A watchdog observer
+drops entries whose file changes, so all sessions pick up new or updated
+profiles without a restart.
+"""
+import os
+import copy
+import json
+import threading
+import time
+from Agents.config import STYLE_DIRS
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # registry still works, just without live invalidation
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class ProfileReadError(ValueError):
+    """The profile file exists but cannot be read or is not valid JSON."""
+
+
+class _StyleDirHandler(FileSystemEventHandler):
+    def __init__(self, registry, platform):
+        self.registry = registry
+        self.platform = platform
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and path.endswith(".json"):
+                self.registry.invalidate(self.platform, os.path.splitext(os.path.basename(path))[0])
+
+
+class ProfileRegistry:
+    def __init__(self, style_dirs: dict = None):
+        self.style_dirs = dict(style_dirs or STYLE_DIRS)
+        self._lock = threading.RLock()
+        self._names = {}      # platform -> sorted list of names (None = needs listing)
+        self._profiles = {}   # (platform, name) -> profile dict
+        self._generation = 0  # bumped by invalidate(); a read that raced one is not cached
+        self._observer = None
+
+    # ---------- Reads ----------
+    def names(self, platform: str) -> list[str]:
+        with self._lock:
+            if self._names.get(platform) is None:
+                styles_dir = self.style_dirs[platform]
+                os.makedirs(styles_dir, exist_ok=True)
+                self._names[platform] = sorted(
+                    os.path.splitext(f)[0] for f in os.listdir(styles_dir) if f.endswith(".json")
+                )
+            return list(self._names[platform])
+
+    def get(self, platform: str, name: str) -> dict | None:
+        """
+        A private copy of the profile, or None if it doesn't exist.
+        Raises ProfileReadError when the file cannot be parsed.
+        """
+        key = (platform, name)
+        with self._lock:
+            if key in self._profiles:
+                return copy.deepcopy(self._profiles[key])
+            generation = self._generation
+        # Read (and possibly wait for a writer) without holding up every other session
+        profile = self._read(os.path.join(self.style_dirs[platform], f"{name}.json"))
+        if profile is None:
+            return None
+        with self._lock:
+            if self._generation == generation:
+                self._profiles.setdefault(key, profile)
+        return copy.deepcopy(profile)
+
+    @staticmethod
+    def _read(path: str) -> dict | None:
+        """Parsed profile, None if there is no such file. Call without holding the lock."""
+        for attempt in range(2):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return None   # never existed, or deleted between the watch event and the read
+            except (json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
+                if attempt == 0:
+                    time.sleep(0.2)   # may have caught a non-atomic writer mid-save
+                    continue
+                print(f"❌ Profile {path} could not be read: {e}")
+                raise ProfileReadError(f"{os.path.basename(path)} could not be read ({e})") from e
+
+    # ---------- Invalidation ----------
+    def invalidate(self, platform: str, name: str | None = None):
+        """Forget one profile (or a whole platform) so the next read hits disk."""
+        with self._lock:
+            self._generation += 1
+            self._names[platform] = None
+            if name is None:
+                for key in [k for k in self._profiles if k[0] == platform]:
+                    del self._profiles[key]
+            else:
+                self._profiles.pop((platform, name), None)
+
+    def start_watching(self):
+        if self._observer is not None or Observer is None:
+            return
+        observer = Observer()
+        for platform, styles_dir in self.style_dirs.items():
+            os.makedirs(styles_dir, exist_ok=True)
+            observer.schedule(_StyleDirHandler(self, platform), styles_dir, recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+
+    def stop_watching(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ProfileRegistry:
+    """The shared registry for this process (started and watching on first use)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ProfileRegistry()
+            _registry.start_watching()
+        return _registry
+
+
+def notify_profile_saved(platform: str, name: str):
+    """Writers call this so this process sees the change even before (or without) watchdog."""
+    if _registry is not None:
+        _registry.invalidate(platform, name)
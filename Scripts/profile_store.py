@@ -0,0 +1,283 @@
+"""
+Append-only storage for influencer style analyses.
+
+Every ingested video used to rewrite the whole `<name>.json` (all analyses,
+indent=2), so ingestion cost grew with history and concurrent ingestions lost
+writes. Now:
+
+- `<styles_dir>/_analyses/<slug>.jsonl`  append-only log, one analysis per line
+- `<styles_dir>/_analyses/<slug>.sources` ids of the videos already analyzed
+- `<styles_dir>/<slug>.json`             materialized current profile: name, counts,
+                                         the last few analyses and merged_profile
+
+Writers serialize on `<slug>.lock`, the profile is replaced atomically
+(write temp + os.replace) and the log is compacted every COMPACT_EVERY appends.
+"""
+import os
+import json
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+import orjson
+from Agents.config import STYLE_DIRS
+from Agents.style_digest import attach_style_digest
+from Scripts.profile_registry import notify_profile_saved
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOG_DIRNAME = "_analyses"
+RECENT_ANALYSES = 5     # analyses kept inline in the materialized profile
+COMPACT_EVERY = 50      # appends between log compactions
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+_sources_cache = {}     # .sources path -> (inode, bytes read, mtime_ns, ids)
+_sources_cache_guard = threading.Lock()
+
+
+def influencer_slug(influencer_name: str) -> str:
+    return influencer_name.lower().replace(" ", "_")
+
+
+def _paths(platform: str, slug: str) -> dict:
+    styles_dir = STYLE_DIRS[platform]
+    log_dir = os.path.join(styles_dir, LOG_DIRNAME)
+    os.makedirs(log_dir, exist_ok=True)
+    return {
+        "profile": os.path.join(styles_dir, f"{slug}.json"),
+        "log": os.path.join(log_dir, f"{slug}.jsonl"),
+        "lock": os.path.join(log_dir, f"{slug}.lock"),
+        "sources": os.path.join(log_dir, f"{slug}.sources"),
+    }
+
+
+@contextmanager
+def profile_lock(platform: str, slug: str):
+    """Exclusive lock across threads and processes for one influencer."""
+    lock_path = _paths(platform, slug)["lock"]
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(lock_path, threading.Lock())
+    with thread_lock, open(lock_path, "a+b") as fh:
+        if fcntl:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_json(path: str, data: dict):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_log(log_path: str) -> list[dict]:
+    """All log records; a torn last line from a crashed writer is skipped."""
+    if not os.path.exists(log_path):
+        return []
+    records = []
+    with open(log_path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                continue
+    return records
+
+
+def _append_records(log_path: str, records: list[dict]):
+    with open(log_path, "ab") as f:
+        for record in records:
+            f.write(orjson.dumps(record) + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_sources(sources_path: str) -> set[str]:
+    """
+    Source ids in a .sources file (do not modify the returned set). Cached per file and
+    checked against its inode, size and mtime: appends are read from where the last read
+    stopped, a compacted (replaced) file is read again in full.
+    """
+    try:
+        st = os.stat(sources_path)
+    except FileNotFoundError:
+        return set()
+    with _sources_cache_guard:
+        cached = _sources_cache.get(sources_path)
+    if cached and cached[:3] == (st.st_ino, st.st_size, st.st_mtime_ns):
+        return cached[3]
+
+    offset, ids = 0, set()
+    if cached and cached[0] == st.st_ino and cached[1] <= st.st_size:
+        offset, ids = cached[1], set(cached[3])
+    with open(sources_path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    # A line still being written is picked up by the next read
+    data = data[:data.rfind(b"\n") + 1]
+    ids.update(line.strip() for line in data.decode("utf-8").splitlines() if line.strip())
+    consumed = offset + len(data)
+    with _sources_cache_guard:
+        _sources_cache[sources_path] = (st.st_ino, consumed, st.st_mtime_ns if consumed == st.st_size else None, ids)
+    return ids
+
+
+def _load_profile(paths: dict, influencer_name: str) -> dict:
+    if os.path.exists(paths["profile"]):
+        with open(paths["profile"], "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    else:
+        profile = {"name": influencer_name, "analyses": []}
+
+    # One-time migration: profiles written before the log existed carry their full history inline
+    if not os.path.exists(paths["log"]):
+        _append_records(paths["log"], [{"ts": None, "analysis": a} for a in profile.get("analyses", [])])
+        profile["analysis_count"] = len(profile.get("analyses", []))
+        if "merged_profile" in profile:
+            profile["merged_through"] = profile["analysis_count"]
+    profile.setdefault("analysis_count", len(profile.get("analyses", [])))
+    return profile
+
+
+def _save_profile(platform: str, slug: str, paths: dict, profile: dict):
+    attach_style_digest(profile)
+    atomic_write_json(paths["profile"], profile)
+    notify_profile_saved(platform, slug)
+
+
+def compact_log(platform: str, influencer_name: str, merged_through: int = 0) -> tuple[int, int]:
+    """
+    Rewrite the log without torn lines or exact duplicates. Caller must hold the lock.
+    Returns (records kept, `merged_through` shifted by the records dropped before it),
+    so the merged profile keeps pointing at the same analyses.
+    """
+    paths = _paths(platform, influencer_slug(influencer_name))
+    seen, kept, dropped_merged = set(), [], 0
+    for position, record in enumerate(_read_log(paths["log"])):
+        # The same video analyzed twice counts once; without a source id, identical analyses do
+        key = record.get("source_id") or orjson.dumps(record.get("analysis"), option=orjson.OPT_SORT_KEYS)
+        if key in seen:
+            dropped_merged += position < merged_through
+            continue
+        seen.add(key)
+        kept.append(record)
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(paths["log"]), prefix=".", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        for record in kept:
+            f.write(orjson.dumps(record) + b"\n")
+    os.replace(tmp_path, paths["log"])
+
+    source_ids = [r["source_id"] for r in kept if r.get("source_id")]
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(paths["sources"]), prefix=".", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write("".join(f"{sid}\n" for sid in source_ids))
+    os.replace(tmp_path, paths["sources"])
+    return len(kept), min(max(merged_through - dropped_merged, 0), len(kept))
+
+
+def append_analysis(platform: str, influencer_name: str, analysis: dict, source_id: str | None = None,
+                    on_append=None) -> dict:
+    """
+    Append one analysis to the influencer's log and refresh the materialized profile.
+    Cost is constant in the number of previous analyses. Returns the new profile.
+    An analysis for a `source_id` that is already in the log is not added again.
+    `on_append()` (optional) runs under the lock only when the analysis is new;
+    the dict it returns is added to the analysis.
+    """
+    slug = influencer_slug(influencer_name)
+    paths = _paths(platform, slug)
+    with profile_lock(platform, slug):
+        profile = _load_profile(paths, influencer_name)
+        if source_id and source_id in _read_sources(paths["sources"]):
+            print(f"ℹ️ {source_id} is already in {influencer_name}'s profile, not adding it again.")
+            return profile
+        if on_append is not None:
+            analysis = dict(analysis, **on_append())
+
+        record = {"ts": time.time(), "analysis": analysis}
+        if source_id:
+            record["source_id"] = source_id
+        _append_records(paths["log"], [record])
+        if source_id:
+            with open(paths["sources"], "a", encoding="utf-8") as f:
+                f.write(f"{source_id}\n")
+
+        profile["analysis_count"] += 1
+        profile["analyses"] = (profile.get("analyses", []) + [analysis])[-RECENT_ANALYSES:]
+
+        if profile["analysis_count"] % COMPACT_EVERY == 0:
+            profile["analysis_count"], merged_through = compact_log(
+                platform, influencer_name, profile.get("merged_through", 0))
+            if "merged_through" in profile:
+                profile["merged_through"] = merged_through
+
+        _save_profile(platform, slug, paths, profile)
+        return profile
+
+
+def has_source(platform: str, influencer_name: str, source_id: str) -> bool:
+    """True if an analysis of this video is already in the influencer's profile."""
+    paths = _paths(platform, influencer_slug(influencer_name))
+    return source_id in _read_sources(paths["sources"])
+
+
+def list_sources(platform: str, influencer_name: str) -> list[str]:
+    """Ids of the videos analyzed into the influencer's profile (see Scripts/source_cache.py)."""
+    paths = _paths(platform, influencer_slug(influencer_name))
+    return sorted(_read_sources(paths["sources"]))
+
+
+def load_profile(platform: str, influencer_name: str) -> dict:
+    """Current materialized profile (a new one if the influencer has none yet)."""
+    slug = influencer_slug(influencer_name)
+    paths = _paths(platform, slug)
+    with profile_lock(platform, slug):
+        return _load_profile(paths, influencer_name)
+
+
+def read_analyses(platform: str, influencer_name: str) -> list[dict]:
+    """Full analysis history from the log (oldest first)."""
+    paths = _paths(platform, influencer_slug(influencer_name))
+    return [r["analysis"] for r in _read_log(paths["log"]) if "analysis" in r]
+
+
+def update_merged_profile(platform: str, influencer_name: str, merged_profile: dict, merged_through: int) -> dict:
+    """
+    Store a merged profile computed from the first `merged_through` analyses.
+    A slower concurrent merge never overwrites a newer one.
+    """
+    slug = influencer_slug(influencer_name)
+    paths = _paths(platform, slug)
+    with profile_lock(platform, slug):
+        profile = _load_profile(paths, influencer_name)
+        if profile.get("merged_through", 0) > merged_through:
+            print(f"ℹ️ A newer merged profile already exists for {influencer_name}, keeping it.")
+            return profile
+        profile["merged_profile"] = merged_profile
+        profile["merged_through"] = merged_through
+        _save_profile(platform, slug, paths, profile)
+        return profile
@@ -0,0 +1,78 @@
+"""
+Score many scripts against an influencer's style with batched quality checks.
+
+    python -m Scripts.score_scripts --influencer alex_hormozi drafts/*.txt
+    python -m Scripts.score_scripts --history "morning routine" --limit 20
+
+Files are scored against one --influencer / --platform. With --history, stored
+runs matching the search (Scripts/history_store.py) are re-scored against the
+influencer each was written for. Scripts of the same influencer go through
+QualityAgent.evaluate_batch, so they share requests instead of resending the
+style profile once per script.
+"""
+import argparse
+import json
+import time
+from collections import defaultdict
+from Agents.config import QUALITY_BATCH_SIZE, QUALITY_BATCH_TOKENS
+from Agents.quality_agent import QualityAgent
+from Scripts.history_store import search_runs
+from Scripts.profile_registry import get_registry
+
+
+def score_group(platform: str, influencer: str, scripts: list[str], batch_size: int = QUALITY_BATCH_SIZE,
+                token_budget: int = QUALITY_BATCH_TOKENS) -> list[dict]:
+    style_profile = get_registry().get(platform, influencer)
+    if style_profile is None:
+        raise ValueError(f"No {platform} profile named {influencer!r}")
+    return QualityAgent().evaluate_batch(scripts, style_profile, influencer=influencer, platform=platform,
+                                         batch_size=batch_size, token_budget=token_budget)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-score scripts against influencer styles.")
+    parser.add_argument("files", nargs="*", help="Script text files (with --influencer)")
+    parser.add_argument("--influencer")
+    parser.add_argument("--platform", default="youtube")
+    parser.add_argument("--history", help="Re-score stored runs matching this search instead of files")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=QUALITY_BATCH_SIZE)
+    parser.add_argument("--token-budget", type=int, default=QUALITY_BATCH_TOKENS)
+    parser.add_argument("--json", action="store_true", help="Print the full reports as JSON")
+    args = parser.parse_args()
+
+    # (platform, influencer) → [(label, script)]
+    groups = defaultdict(list)
+    if args.history:
+        for run in search_runs(args.history, limit=args.limit, platform=args.platform if args.influencer else None,
+                               influencer=args.influencer):
+            if run.get("final_script") and run.get("influencer"):
+                groups[(run["platform"] or "youtube", run["influencer"])].append((f"run {run['id']}", run["final_script"]))
+    else:
+        if not args.influencer or not args.files:
+            parser.error("pass --influencer and script files, or --history")
+        for path in args.files:
+            with open(path, "r", encoding="utf-8") as f:
+                groups[(args.platform, args.influencer)].append((path, f.read()))
+    if not groups:
+        print("🤷 Nothing to score.")
+        return
+
+    started = time.perf_counter()
+    results = []
+    for (platform, influencer), items in groups.items():
+        print(f"📊 Scoring {len(items)} script(s) against {platform}/{influencer}")
+        reports = score_group(platform, influencer, [script for _, script in items], args.batch_size, args.token_budget)
+        results += [{"script": label, "influencer": influencer, "platform": platform, **report}
+                    for (label, _), report in zip(items, reports)]
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for r in results:
+            print(f"{r['style_match_score']!s:>6}  [{r.get('judge', '?'):5}] {r['script']}  — {str(r['feedback'])[:80]}")
+    print(f"⏱️ {len(results)} script(s) in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
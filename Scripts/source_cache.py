@@ -0,0 +1,126 @@
+"""
+Content-addressed cache of transcripts and per-video analyses.
+
+Re-running ingestion on the same video used to re-fetch, re-transcribe,
+re-clean and re-analyze it. Every source now has a stable id: `youtube:<video
+id>` for URLs, or `file:<xxh3 of the bytes>` for uploads. Under
+.cache/transcripts/<kind>/<id>/ we keep:
+
+- raw.txt.zst      transcript as fetched / transcribed
+- clean.txt.zst    cleaned transcript
+- analysis.json    style analysis (before corpus-wide phrases are added)
+
+Texts are zstd-compressed; writes are atomic so concurrent ingestions are safe.
+"""
+import os
+import json
+import tempfile
+import xxhash
+import zstandard
+from urllib.parse import urlparse, parse_qs
+from Agents.config import CACHE_DIR
+
+TRANSCRIPT_CACHE_DIR = os.path.join(CACHE_DIR, "transcripts")
+ZSTD_LEVEL = 10
+HASH_BLOCK = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """xxh3 hash of a file's contents, read in blocks."""
+    h = xxhash.xxh3_64()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def extract_video_id(url: str) -> str:
+    """
+    Extract YouTube video ID from any valid YouTube URL.
+    """
+    parsed = urlparse(url)
+    if parsed.hostname in ["www.youtube.com", "youtube.com", "m.youtube.com"]:
+        return parse_qs(parsed.query)["v"][0]
+    elif parsed.hostname == "youtu.be":
+        return parsed.path[1:]
+    raise ValueError("Invalid YouTube URL provided.")
+
+
+def source_key(source: str) -> str:
+    """Stable identity of a source: YouTube video ID, or the content hash of a local file."""
+    if os.path.isfile(source):
+        return f"file:{file_digest(source)}"
+    if source.startswith(("http://", "https://")):
+        return f"youtube:{extract_video_id(source)}"
+    raise ValueError(f"Not a YouTube URL or an existing file: {source}")
+
+
+def _entry_dir(source_id: str) -> str:
+    kind, _, ident = source_id.partition(":")
+    # Video IDs are [A-Za-z0-9_-]; anything else is replaced so it stays a safe path
+    ident = "".join(c if c.isalnum() or c in "-_" else "_" for c in ident)
+    return os.path.join(TRANSCRIPT_CACHE_DIR, kind, ident)
+
+
+def _atomic_write_bytes(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_text(source_id: str, stage: str) -> str | None:
+    """Cached transcript for `stage` ("raw" or "clean"), or None."""
+    path = os.path.join(_entry_dir(source_id), f"{stage}.txt.zst")
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+
+
+def save_text(source_id: str, stage: str, text: str):
+    data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(text.encode("utf-8"))
+    _atomic_write_bytes(os.path.join(_entry_dir(source_id), f"{stage}.txt.zst"), data)
+
+
+def load_analysis(source_id: str) -> dict | None:
+    path = os.path.join(_entry_dir(source_id), "analysis.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def save_analysis(source_id: str, analysis: dict):
+    data = json.dumps(analysis, ensure_ascii=False).encode("utf-8")
+    _atomic_write_bytes(os.path.join(_entry_dir(source_id), "analysis.json"), data)
+
+
+def cached_transcript(source_id: str | None, fetch_raw, clean) -> str:
+    """
+    Cleaned transcript for a source, running `fetch_raw()` and `clean(raw)` only on a miss.
+    Without a source_id nothing is cached.
+    """
+    if source_id is None:
+        raw_text = fetch_raw()
+        return clean(raw_text) if raw_text else ""
+
+    cleaned = load_text(source_id, "clean")
+    if cleaned is not None:
+        print(f"⚡ Using cached transcript for {source_id}")
+        return cleaned
+
+    raw_text = load_text(source_id, "raw")
+    if raw_text is None:
+        raw_text = fetch_raw()
+        if not raw_text:
+            return ""
+        save_text(source_id, "raw", raw_text)
+
+    cleaned = clean(raw_text)
+    save_text(source_id, "clean", cleaned)
+    return cleaned
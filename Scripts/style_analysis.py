@@ -0,0 +1,122 @@
+"""
+Per-video style analysis shared by the YouTube and Instagram ingestion paths.
+
+Numeric fields are measured locally (Scripts.stylometry); the LLM only
+describes the qualitative style, grounded by the measured numbers.
+Analyses are cached per video (Scripts.source_cache), so a video that was
+already analyzed is never sent to the LLM or counted in a profile twice.
+"""
+import json
+from llm_client import llm_client
+from Agents.llm_json import request_json
+from Scripts.stylometry import analyze_text, describe_for_prompt, fill_numeric_fields
+from Scripts.transcript_sampler import sample_transcript
+from Scripts.source_cache import load_analysis, save_analysis
+from Scripts.phrase_miner import ingest_phrases
+from Scripts.profile_store import append_analysis, has_source, load_profile
+from Scripts.style_merge import refresh_merged_profile
+
+STYLE_MODEL = "gpt-4o-mini"
+
+ANALYSIS_SCHEMA = """
+{
+  "tone": "",
+  "energy_level": "",
+  "delivery_style": {
+    "pacing": "",
+    "sentence_variation": "",
+    "story_usage": "",
+    "analogy_usage": "",
+    "directive_strength": ""
+  },
+  "linguistic_fingerprint": {
+    "common_sentence_types": [],
+    "rhetorical_devices": [],
+    "transition_patterns": []
+  },
+  "hook_style": {
+    "dominant_types": [],
+    "examples": []
+  },
+  "persona": "",
+  "content_archetype": "",
+  "strength_indicators": [],
+  "emotional_beats": []
+}
+"""
+ANALYSIS_EXAMPLE = json.loads(ANALYSIS_SCHEMA)
+
+
+def analyze_style(transcript_text: str) -> dict:
+    """One style analysis for one (cleaned) transcript."""
+    stats = analyze_text(transcript_text)
+
+    prompt = f"""
+    You are an expert linguistic profiler analyzing an Instagram/YouTube influencer’s communication style.
+    Extract a DEEP persona style profile.
+    Respond in pure JSON (no markdown).
+
+    Sentence lengths, question/exclamation rates, pronoun use and readability were MEASURED
+    for the full transcript (below). Do not estimate numbers — describe the qualitative style
+    only, consistent with these measurements.
+
+    Measured: {describe_for_prompt(stats)}
+
+    Keep the output concise JSON with only these keys:
+    {ANALYSIS_SCHEMA}
+
+    Transcript excerpts (chosen from across the whole video, in order):
+    {sample_transcript(transcript_text)}
+    """
+
+    print("🧠 Analyzing style with OpenAI...")
+    new_style = request_json(
+        lambda response_format: llm_client.chat.completions.create(
+            model=STYLE_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            **({"response_format": response_format} if response_format else {}),
+        ).choices[0].message.content,
+        "style_analysis", ANALYSIS_EXAMPLE,
+    )
+    if "raw_output" not in new_style:
+        fill_numeric_fields(new_style, stats)
+    return new_style
+
+
+def ingest_style(platform: str, influencer_name: str, transcript_text: str,
+                 source_id: str | None = None, merge: bool = True, progress=None) -> dict:
+    """
+    Analyze one transcript and add it to the influencer's profile.
+    With a `source_id` the analysis is cached and a repeated video is skipped.
+    `progress(stage)` (optional) is called with "analyzing" and "merging".
+    Returns the updated profile.
+    """
+    progress = progress or (lambda stage, **info: None)
+    if source_id and has_source(platform, influencer_name, source_id):
+        print(f"⚡ {source_id} was already analyzed for {influencer_name}, skipping.")
+        return load_profile(platform, influencer_name)
+
+    progress("analyzing")
+    analysis = load_analysis(source_id) if source_id else None
+    if analysis is None:
+        # Numeric fields measured locally, qualitative style from the LLM
+        analysis = analyze_style(transcript_text)
+        if source_id and "raw_output" not in analysis:
+            save_analysis(source_id, analysis)
+    else:
+        print(f"⚡ Using cached analysis for {source_id}")
+
+    # ✅ Append new analysis to the influencer's log (constant cost, safe for concurrent ingestions).
+    # Signature / forbidden phrases come from corpus-wide n-gram statistics (no LLM); the counts
+    # are updated under the same lock and only when the source is new, so a re-ingest never double-counts
+    profile = append_analysis(
+        platform, influencer_name, analysis, source_id=source_id,
+        on_append=lambda: ingest_phrases(platform, influencer_name, transcript_text, locked=True),
+    )
+
+    # ✅ Fold the new analysis into merged_profile (constant-size prompt)
+    if merge:
+        progress("merging")
+        profile = refresh_merged_profile(platform, influencer_name, profile)
+    return profile
@@ -0,0 +1,180 @@
+"""
+Incremental merging of style analyses into `merged_profile`.
+
+The old merge sent every analysis ever ingested to the LLM, so merge latency
+and tokens grew without bound. Now each merge folds only the new analyses into
+the current merged profile, weighted by how many analyses it already covers
+(`merged_through`), so the prompt size stays constant. Every FULL_REMERGE_EVERY
+analyses an optional full re-merge over the most recent MAX_FULL_MERGE analyses
+corrects drift.
+
+Measured stylometry is never sent to the LLM; it is combined locally as a
+weighted average and written back into the merged profile. Signature and
+forbidden phrases come from the corpus-wide n-gram miner, not the LLM.
+"""
+import json
+from llm_client import llm_client
+from Agents.llm_json import request_json
+from Scripts.profile_store import RECENT_ANALYSES, read_analyses, update_merged_profile
+from Scripts.stylometry import combine_stats, fill_numeric_fields
+from Scripts.phrase_miner import apply_mined_phrases
+
+MERGE_MODEL = "gpt-4o-mini"
+FULL_REMERGE_EVERY = 25   # 0 disables periodic full re-merges
+MAX_FULL_MERGE = 30
+
+MERGED_SCHEMA = """
+{
+  "style_profile": {
+    "tone": "",
+    "energy_level": "",
+    "delivery_style": {
+      "pacing": "",
+      "sentence_variation": "",
+      "story_usage": "",
+      "analogy_usage": "",
+      "directive_strength": ""
+    },
+    "linguistic_fingerprint": {
+      "common_sentence_types": [],
+      "rhetorical_devices": [],
+      "transition_patterns": []
+    },
+    "hook_style": {
+      "dominant_types": [],
+      "examples": []
+    },
+    "persona": "",
+    "content_archetype": "",
+    "strength_indicators": [],
+    "emotional_beats": []
+  },
+  "consistency_score": {
+    "tone": 0.0,
+    "energy_level": 0.0,
+    "delivery_style": 0.0,
+    "linguistic_fingerprint": 0.0,
+    "persona": 0.0
+  }
+}
+"""
+MERGED_EXAMPLE = json.loads(MERGED_SCHEMA)
+
+
+def _without_stats(style: dict) -> dict:
+    return {k: v for k, v in style.items() if k != "stylometry"}
+
+
+def _call_merge_llm(prompt: str) -> dict:
+    return request_json(
+        lambda response_format: llm_client.chat.completions.create(
+            model=MERGE_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            **({"response_format": response_format} if response_format else {}),
+        ).choices[0].message.content,
+        "style_merge", MERGED_EXAMPLE,
+    )
+
+
+def merge_incremental(current: dict, weight: int, new_analyses: list[dict]) -> dict:
+    """Fold `new_analyses` into a merged profile that already summarizes `weight` analyses."""
+    current_clean = dict(current, style_profile=_without_stats(current["style_profile"]))
+    prompt = f"""
+    You are an expert style profiler maintaining a running merged style profile for one influencer.
+
+    The CURRENT MERGED PROFILE summarizes {weight} earlier analyses.
+    Fold in the {len(new_analyses)} NEW analyses below.
+
+    Your tasks:
+    - Treat the current profile as {weight} votes and each new analysis as 1 vote.
+    - Keep traits that the new analyses confirm; raise their consistency scores.
+    - Only change established traits when the new analyses clearly contradict them,
+      and lower the matching consistency score.
+    - Add new signature phrases or hook examples only if they fit the established persona.
+    - Keep lists short and representative (no duplicates).
+
+    Return JSON ONLY in this structure:
+    {MERGED_SCHEMA}
+
+    CURRENT MERGED PROFILE:
+    {json.dumps(current_clean, ensure_ascii=False, separators=(",", ":"))}
+
+    NEW ANALYSES:
+    {json.dumps([_without_stats(a) for a in new_analyses], ensure_ascii=False, separators=(",", ":"))}
+    """
+    print(f"🔀 Incremental merge: {weight} folded + {len(new_analyses)} new ({len(prompt)} chars)")
+    return _call_merge_llm(prompt)
+
+
+def merge_full(analyses: list[dict]) -> dict:
+    """Merge a list of analyses from scratch (used for drift correction)."""
+    prompt = f"""
+    You are an expert style profiler. Merge multiple deep style analyses into one unified style profile.
+
+    Your tasks:
+    - Preserve ALL deep attributes from each sample.
+    - Identify traits consistent across most samples.
+    - Down-weight traits that appear only once.
+    - Extract averaged or representative values where relevant.
+    - Produce a SINGLE merged profile that fully reflects the influencer's communication style.
+
+    Return JSON ONLY in this structure:
+    {MERGED_SCHEMA}
+
+    Here are the analyses to merge:
+    {json.dumps([_without_stats(a) for a in analyses], ensure_ascii=False, separators=(",", ":"))}
+    """
+    print(f"🔀 Full re-merge of {len(analyses)} analyses ({len(prompt)} chars)")
+    return _call_merge_llm(prompt)
+
+
+def refresh_merged_profile(platform: str, influencer_name: str, profile: dict) -> dict:
+    """
+    Bring `profile["merged_profile"]` up to date with `profile["analysis_count"]`.
+    `profile` is the snapshot returned by append_analysis(). Returns the saved profile.
+    """
+    count = profile.get("analysis_count", 0)
+    merged_through = profile.get("merged_through", 0)
+    if count < 2 or merged_through >= count:
+        return profile
+
+    current = profile.get("merged_profile")
+    if not (isinstance(current, dict) and isinstance(current.get("style_profile"), dict)):
+        current, merged_through = None, 0
+
+    crossed_full = FULL_REMERGE_EVERY and count // FULL_REMERGE_EVERY > merged_through // FULL_REMERGE_EVERY
+    # A bulk ingestion can leave more pending analyses than one incremental prompt should carry
+    too_far_behind = count - (merged_through or 1) > MAX_FULL_MERGE
+    if crossed_full or too_far_behind:
+        history = read_analyses(platform, influencer_name)[-MAX_FULL_MERGE:]
+        merged = merge_full(history)
+        stats = combine_stats([a.get("stylometry") for a in history])
+    else:
+        # Start from the first analysis when nothing has been merged yet
+        weight = merged_through or 1
+        pending_count = count - weight
+        if pending_count <= RECENT_ANALYSES and (current is not None or count <= RECENT_ANALYSES):
+            recent = profile.get("analyses", [])[-min(count, RECENT_ANALYSES):]
+            pending = recent[-pending_count:]
+            first = recent[0] if current is None else None
+        else:
+            history = read_analyses(platform, influencer_name)[:count]
+            pending = history[weight:]
+            first = history[0] if current is None else None
+
+        if current is None:
+            current = {"style_profile": first}
+        merged = merge_incremental(current, weight, pending)
+        stats = combine_stats(
+            [current["style_profile"].get("stylometry")] + [a.get("stylometry") for a in pending],
+            [weight] + [1] * len(pending),
+        )
+
+    if not isinstance(merged.get("style_profile"), dict):
+        print("⚠️ Merge output could not be parsed, keeping the previous merged profile.")
+        return profile
+    fill_numeric_fields(merged["style_profile"], stats)
+    apply_mined_phrases(merged["style_profile"], platform, influencer_name,
+                        previous=current["style_profile"] if current else None)
+    return update_merged_profile(platform, influencer_name, merged, merged_through=count)
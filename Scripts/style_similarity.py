@@ -0,0 +1,345 @@
+"""
+Local style-similarity scoring against an influencer's own transcripts.
+
+QualityAgent used to spend a full LLM call on every draft just to get
+`style_match_score`, which alone decides whether a four-call revision lap
+runs. This module scores a script locally, in milliseconds:
+
+- character 3–5-gram and word 1–2-gram TF-IDF (hashed into fixed-size numpy
+  vectors) compared with the centroid of the influencer's transcript passages;
+- stylometric distance (sentence length, questions, pronouns, vocabulary
+  variety, ...; see Scripts/stylometry.py) from the passages' average.
+
+Each measure is turned into a percentile against the influencer's own
+passages (each held out together with its video), so "as similar as a typical real passage" means the
+same thing for every influencer. Corpus vectors are built once from the cached
+cleaned transcripts of the ingested videos (Scripts/source_cache.py) and kept
+in .cache/style_vectors/ until the influencer's set of sources changes.
+
+prefilter() returns a local quality report when the draft is clearly in or
+clearly out of the influencer's style, and None when only the LLM judge can tell.
+"""
+import os
+import threading
+import zlib
+import numpy as np
+import xxhash
+from Agents.config import CACHE_DIR, QUALITY_THRESHOLD
+from Scripts.profile_store import influencer_slug, list_sources
+from Scripts.source_cache import load_text
+from Scripts.stylometry import analyze_text, tokenize
+from Scripts.transcript_cleaning import split_units
+
+VECTOR_CACHE_DIR = os.path.join(CACHE_DIR, "style_vectors")
+CORPUS_VERSION = 3
+DIMS = 2 ** 18              # hashed feature space per vectorizer
+CHAR_NGRAMS = (3, 4, 5)
+PASSAGE_WORDS = 200
+MIN_PASSAGES = 8            # fewer passages → percentiles are too coarse, always ask the LLM
+
+# Decision bands on the combined percentile score (0–1, 0.5 = typical real passage)
+LOCAL_ACCEPT = 0.5
+LOCAL_REJECT = 0.1
+WEIGHTS = {"char": 0.4, "word": 0.3, "stylometry": 0.3}
+
+# (label, path in analyze_text() output, feedback when the script is above / below the influencer)
+STYLO_FEATURES = [
+    ("sentence length", ("sentence_length", "mean"), "Shorten sentences", "Use longer, more developed sentences"),
+    ("sentence length variety", ("sentence_length", "std"), "Make sentence lengths more uniform", "Mix short punchy lines with longer ones"),
+    ("short sentences", ("sentence_length", "short_share"), "Use fewer fragment-style lines", "Add more short, punchy lines"),
+    ("long sentences", ("sentence_length", "long_share"), "Break up long sentences", "Allow a few longer explanatory sentences"),
+    ("vocabulary variety", ("mattr",), "Use simpler, more repetitive wording", "Vary the vocabulary more"),
+    ("questions", ("question_rate",), "Ask fewer rhetorical questions", "Ask more rhetorical questions"),
+    ("exclamations", ("exclamation_rate",), "Use fewer exclamations", "Add more emphatic lines"),
+    ("'I' statements", ("pronoun_ratios", "first_singular"), "Talk less about yourself", "Use more first-person stories ('I')"),
+    ("'we' statements", ("pronoun_ratios", "first_plural"), "Use 'we' less", "Use more inclusive 'we'"),
+    ("direct address", ("pronoun_ratios", "second"), "Address the viewer ('you') less", "Address the viewer directly ('you') more"),
+    ("word length", ("readability", "syllables_per_word"), "Use plainer, shorter words", "Use richer, longer words"),
+]
+FEEDBACK_Z = 1.5            # features further than this (in corpus std) get a feedback line
+
+_corpora = {}
+_corpora_lock = threading.Lock()
+
+
+# ---------- Feature hashing ----------
+def _mix(h: np.ndarray) -> np.ndarray:
+    h ^= h >> np.uint64(29)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(32)
+    return h
+
+
+def char_ngram_ids(text: str) -> np.ndarray:
+    """Hashed ids of all character n-grams (whitespace collapsed, lower-cased)."""
+    data = np.frombuffer(" ".join(text.lower().split()).encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    ids = []
+    with np.errstate(over="ignore"):
+        for n in CHAR_NGRAMS:
+            if len(data) < n:
+                continue
+            count = len(data) - n + 1
+            h = np.full(count, np.uint64(n))
+            for k in range(n):
+                h = h * np.uint64(1099511628211) + data[k:k + count]
+            ids.append(_mix(h) % np.uint64(DIMS))
+    return np.concatenate(ids).astype(np.int64) if ids else np.zeros(0, dtype=np.int64)
+
+
+def word_ngram_ids(text: str) -> np.ndarray:
+    """Hashed ids of word unigrams and bigrams."""
+    words = tokenize(text)
+    if not words:
+        return np.zeros(0, dtype=np.int64)
+    vocab, inverse = np.unique(np.array(words), return_inverse=True)
+    word_hash = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in vocab), dtype=np.uint64, count=len(vocab))[inverse]
+    with np.errstate(over="ignore"):
+        bigrams = _mix(word_hash[:-1] * np.uint64(0x9E3779B97F4A7C15) + word_hash[1:])
+        unigrams = _mix(word_hash.copy())
+    return (np.concatenate([unigrams, bigrams]) % np.uint64(DIMS)).astype(np.int64)
+
+
+def _term_freqs(ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    idx, counts = np.unique(ids, return_counts=True)
+    return idx, 1.0 + np.log(counts)        # sublinear tf
+
+
+def _tfidf(ids: np.ndarray, idf: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    idx, tf = _term_freqs(ids)
+    values = tf * idf[idx]
+    norm = np.linalg.norm(values)
+    return idx, values / norm if norm else values
+
+
+def _stylo_vector(text: str) -> np.ndarray | None:
+    stats = analyze_text(text)
+    if not stats.get("word_count"):
+        return None
+    values = []
+    for _, path, _, _ in STYLO_FEATURES:
+        value = stats
+        for key in path:
+            value = value[key]
+        values.append(value)
+    return np.array(values, dtype=np.float64)
+
+
+def split_passages(text: str, words_per_passage: int = PASSAGE_WORDS) -> list[str]:
+    passages, current, current_words = [], [], 0
+    for unit in split_units(text):
+        n = len(unit.split())
+        if current and current_words + n > words_per_passage:
+            passages.append(" ".join(current))
+            current, current_words = [], 0
+        current.append(unit)
+        current_words += n
+    if current and (current_words >= words_per_passage // 2 or not passages):
+        passages.append(" ".join(current))
+    return passages
+
+
+# ---------- Corpus ----------
+def _build_space(passages: list[str], groups: np.ndarray, extract) -> dict:
+    """
+    IDF, unit centroid and held-out passage similarities for one vectorizer.
+    Each passage is compared with the centroid of the *other* videos, so the
+    baseline is "new content in the same voice", not "another part of the same video".
+    """
+    term_freqs = [_term_freqs(extract(p)) for p in passages]
+    df = np.zeros(DIMS, dtype=np.float64)
+    for idx, _ in term_freqs:
+        df[idx] += 1
+    idf = np.log((1 + len(passages)) / (1 + df)) + 1.0
+
+    vectors, centroid = [], np.zeros(DIMS, dtype=np.float64)
+    for idx, tf in term_freqs:
+        values = tf * idf[idx]
+        values /= np.linalg.norm(values) or 1.0
+        vectors.append((idx, values))
+        centroid[idx] += values
+    centroid_sq = float(centroid @ centroid)
+
+    if len(np.unique(groups)) == 1:
+        groups = np.arange(len(passages))     # single video: leave out just the passage itself
+    sims = np.empty(len(passages))
+    group_sum = np.zeros(DIMS, dtype=np.float64)     # reused for every group
+    for g in np.unique(groups):
+        members = np.flatnonzero(groups == g)
+        for i in members:
+            idx, values = vectors[i]
+            group_sum[idx] += values
+        touched = np.unique(np.concatenate([vectors[i][0] for i in members]))
+        part = group_sum[touched]
+        rest_sq = centroid_sq - 2 * float(part @ centroid[touched]) + float(part @ part)
+        for i in members:
+            idx, values = vectors[i]
+            sims[i] = float(values @ (centroid[idx] - group_sum[idx])) / np.sqrt(max(rest_sq, 1e-12))
+        group_sum[touched] = 0.0
+
+    norm = np.linalg.norm(centroid) or 1.0
+    return {
+        "idf": idf.astype(np.float32),
+        "centroid": (centroid / norm).astype(np.float32),
+        "baseline": np.sort(sims),
+    }
+
+
+def build_corpus(passages: list[str], groups: list[int]) -> dict:
+    """Corpus vectors for passages; `groups` gives the source video of each passage."""
+    groups = np.asarray(groups)
+    char = _build_space(passages, groups, char_ngram_ids)
+    word = _build_space(passages, groups, word_ngram_ids)
+    stylo = np.array([v for v in map(_stylo_vector, passages) if v is not None])
+    mean, spread = stylo.mean(axis=0), stylo.std(axis=0)
+    spread = np.where(spread > 1e-6, spread, 1.0)
+    distances = np.sqrt((((stylo - mean) / spread) ** 2).mean(axis=1))
+    return {
+        "passages": np.array(len(passages)),
+        "char_idf": char["idf"], "char_centroid": char["centroid"], "char_baseline": char["baseline"],
+        "word_idf": word["idf"], "word_centroid": word["centroid"], "word_baseline": word["baseline"],
+        "stylo_mean": mean, "stylo_std": spread, "stylo_distances": np.sort(distances),
+    }
+
+
+def _corpus_key(source_ids: list[str]) -> str:
+    h = xxhash.xxh3_64(f"v{CORPUS_VERSION}|{PASSAGE_WORDS}|{DIMS}".encode())
+    for source_id in sorted(source_ids):
+        h.update(source_id.encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_corpus(platform: str, influencer_name: str) -> dict | None:
+    """
+    Precomputed vectors for an influencer (memory → .npz on disk → built from transcripts).
+    None when there are too few cached transcripts to judge locally.
+    """
+    source_ids = list_sources(platform, influencer_name)
+    if not source_ids:
+        return None
+    key = _corpus_key(source_ids)
+    slug = influencer_slug(influencer_name)
+
+    with _corpora_lock:
+        cached = _corpora.get((platform, slug))
+        if cached and cached[0] == key:
+            return cached[1]
+
+        path = os.path.join(VECTOR_CACHE_DIR, platform, f"{slug}.npz")
+        corpus = None
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if str(data["key"]) == key:
+                    corpus = {k: data[k] for k in data.files if k != "key"}
+        if corpus is None:
+            passages, groups = [], []
+            for i, text in enumerate(load_text(s, "clean") for s in source_ids):
+                for passage in split_passages(text or ""):
+                    passages.append(passage)
+                    groups.append(i)
+            if len(passages) < MIN_PASSAGES:
+                _corpora[(platform, slug)] = (key, None)
+                return None
+            print(f"📐 Building style vectors for {influencer_name} ({len(passages)} passages)")
+            corpus = build_corpus(passages, groups)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+            np.savez_compressed(tmp_path, key=np.array(key), **corpus)
+            os.replace(tmp_path, path)
+        _corpora[(platform, slug)] = (key, corpus)
+        return corpus
+
+
+# ---------- Scoring ----------
+def _percentile(sorted_values: np.ndarray, value: float) -> float:
+    """Share of corpus passages at or below `value`."""
+    return float(np.searchsorted(sorted_values, value, side="right") / len(sorted_values))
+
+
+def score_script(script: str, corpus: dict) -> dict | None:
+    """Percentile scores of a script against an influencer corpus (0.5 ≈ a typical real passage)."""
+    passages = split_passages(script)
+    if not passages:
+        return None
+
+    sims = {}
+    for space, extract in (("char", char_ngram_ids), ("word", word_ngram_ids)):
+        idf, centroid = corpus[f"{space}_idf"], corpus[f"{space}_centroid"]
+        per_passage = []
+        for passage in passages:
+            idx, values = _tfidf(extract(passage), idf)
+            per_passage.append(float(values @ centroid[idx]))
+        sims[space] = float(np.mean(per_passage))
+
+    vectors = [v for v in map(_stylo_vector, passages) if v is not None]
+    z = (np.array(vectors) - corpus["stylo_mean"]) / corpus["stylo_std"]
+    distance = float(np.sqrt((z ** 2).mean(axis=1)).mean())
+
+    percentiles = {
+        "char": _percentile(corpus["char_baseline"], sims["char"]),
+        "word": _percentile(corpus["word_baseline"], sims["word"]),
+        # smaller distance is better
+        "stylometry": 1.0 - _percentile(corpus["stylo_distances"], distance),
+    }
+    score = sum(WEIGHTS[k] * percentiles[k] for k in WEIGHTS)
+    return {
+        "score": round(score, 3),
+        "percentiles": {k: round(v, 3) for k, v in percentiles.items()},
+        "char_similarity": round(sims["char"], 4),
+        "word_similarity": round(sims["word"], 4),
+        "stylometric_distance": round(distance, 3),
+        "feature_z": z.mean(axis=0),
+    }
+
+
+def style_feedback(result: dict) -> str:
+    """Concrete revision notes from the features that deviate most from the influencer."""
+    notes = []
+    z = result["feature_z"]
+    for i in np.argsort(-np.abs(z)):
+        if abs(z[i]) < FEEDBACK_Z or len(notes) >= 4:
+            break
+        label, _, too_high, too_low = STYLO_FEATURES[i]
+        notes.append(f"{too_high if z[i] > 0 else too_low} ({label} is {abs(z[i]):.1f} std "
+                     f"{'above' if z[i] > 0 else 'below'} the influencer's transcripts).")
+    if result["percentiles"]["char"] < 0.2 or result["percentiles"]["word"] < 0.2:
+        notes.append("Wording drifts from how the influencer actually talks: reuse their phrasing, "
+                     "signature expressions and spoken rhythm.")
+    return " ".join(notes) or "Style is close to the influencer's transcripts."
+
+
+def to_match_score(local_score: float) -> float:
+    """Map the percentile score onto the judge's 0–1 scale, with LOCAL_ACCEPT landing on QUALITY_THRESHOLD."""
+    if local_score >= LOCAL_ACCEPT:
+        return round(QUALITY_THRESHOLD + (1 - QUALITY_THRESHOLD) * (local_score - LOCAL_ACCEPT) / (1 - LOCAL_ACCEPT), 3)
+    return round(QUALITY_THRESHOLD * local_score / LOCAL_ACCEPT, 3)
+
+
+def prefilter(platform: str, influencer_name: str, script: str) -> tuple[dict | None, dict | None]:
+    """
+    (report, local) — `report` is a quality report when the draft is clearly good or
+    clearly off-style, else None (ask the LLM). `local` holds the local scores, if any.
+    """
+    if not influencer_name or not script:
+        return None, None
+    corpus = load_corpus(platform, influencer_name)
+    if corpus is None:
+        return None, None
+    result = score_script(script, corpus)
+    if result is None:
+        return None, None
+
+    local = {k: v for k, v in result.items() if k != "feature_z"}
+    if LOCAL_REJECT < result["score"] < LOCAL_ACCEPT:
+        local["decision"] = "ambiguous"
+        return None, local
+
+    local["decision"] = "accept" if result["score"] >= LOCAL_ACCEPT else "revise"
+    report = {
+        "style_match_score": to_match_score(result["score"]),
+        "clarity_score": None,
+        "storytelling_score": None,
+        "feedback": style_feedback(result),
+        "judge": "local",
+        "local_style": local,
+    }
+    return report, local
@@ -0,0 +1,155 @@
+"""
+Local, vectorized stylometry.
+
+The LLM can only guess numbers like "average_sentence_length". These are
+measured directly from the transcript / writing samples with NumPy in a few
+milliseconds, so style prompts only need to ask the LLM for the qualitative parts.
+"""
+import re
+import numpy as np
+
+# A sentence ends at punctuation or at a line break (unpunctuated captions / notes)
+_SENTENCE_RE = re.compile(r"[^.!?…\n]+(?:[.!?…]+|\n|$)")
+_WORD_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+
+FUNCTION_WORDS = np.array([
+    "the", "a", "an", "and", "but", "or", "so", "because", "if", "then", "that", "this",
+    "of", "to", "in", "on", "for", "with", "at", "by", "from", "about", "as", "like",
+    "is", "are", "was", "were", "be", "been", "do", "does", "did", "have", "has", "had",
+    "not", "just", "really", "very", "actually", "all", "what", "which", "who", "when",
+    "can", "will", "would", "should",
+])
+
+PRONOUNS = {
+    "first_singular": ["i", "me", "my", "mine", "myself", "i'm", "i've", "i'll", "i'd"],
+    "first_plural": ["we", "us", "our", "ours", "ourselves", "we're", "we've", "we'll"],
+    "second": ["you", "your", "yours", "yourself", "you're", "you've", "you'll", "you'd"],
+    "third": ["he", "she", "they", "him", "her", "them", "his", "their", "it", "its"],
+}
+
+TOP_FUNCTION_WORDS = 12
+MATTR_WINDOW = 100
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_RE.findall(text or "") if _WORD_RE.search(s.lower())]
+
+
+def tokenize(text: str) -> list[str]:
+    return _WORD_RE.findall((text or "").lower().replace("’", "'"))
+
+
+def _syllables(words: np.ndarray) -> np.ndarray:
+    counts = np.fromiter((len(_VOWEL_GROUP_RE.findall(w)) for w in words), dtype=np.int32, count=len(words))
+    silent_e = np.char.endswith(words, "e") & ~np.char.endswith(words, "le") & (counts > 1)
+    return np.maximum(counts - silent_e, 1)
+
+
+def _mattr(word_ids: np.ndarray, window: int = MATTR_WINDOW) -> float:
+    """Moving-average type-token ratio (length-robust, unlike plain TTR)."""
+    if len(word_ids) <= window:
+        return float(len(np.unique(word_ids)) / max(len(word_ids), 1))
+    step = max(window // 4, 1)
+    starts = np.arange(0, len(word_ids) - window + 1, step)
+    return float(np.mean([len(np.unique(word_ids[s:s + window])) / window for s in starts]))
+
+
+def analyze_text(text: str) -> dict:
+    """Numeric style statistics for one text. All rates are fractions, frequencies per 1000 words."""
+    sentences = split_sentences(text)
+    # Word counts and per-sentence lengths come from the same split, so they always agree
+    sentence_words = [tokenize(s) for s in sentences]
+    words = np.array([w for ws in sentence_words for w in ws], dtype=str)
+    if len(sentences) == 0 or len(words) == 0:
+        return {"sentence_count": 0, "word_count": 0}
+
+    lengths = np.array([len(ws) for ws in sentence_words], dtype=np.float64)
+    enders = np.array([s.rstrip()[-1] for s in sentences])
+    vocab, word_ids, vocab_counts = np.unique(words, return_inverse=True, return_counts=True)
+    n_words, n_sentences = len(words), len(sentences)
+
+    pronouns = {k: round(float(np.isin(words, v).sum() / n_words), 4) for k, v in PRONOUNS.items()}
+
+    fw_mask = np.isin(vocab, FUNCTION_WORDS)
+    fw_vocab, fw_counts = vocab[fw_mask], vocab_counts[fw_mask]
+    top = np.argsort(-fw_counts, kind="stable")[:TOP_FUNCTION_WORDS]
+    function_words = {str(fw_vocab[i]): round(float(fw_counts[i] * 1000 / n_words), 2) for i in top}
+
+    syllables = _syllables(words)
+    words_per_sentence = n_words / n_sentences
+    syllables_per_word = float(syllables.mean())
+
+    return {
+        "sentence_count": int(n_sentences),
+        "word_count": int(n_words),
+        "sentence_length": {
+            "mean": round(float(lengths.mean()), 2),
+            "median": round(float(np.median(lengths)), 2),
+            "std": round(float(lengths.std()), 2),
+            "p10": round(float(np.percentile(lengths, 10)), 2),
+            "p90": round(float(np.percentile(lengths, 90)), 2),
+            "short_share": round(float((lengths < 8).mean()), 4),
+            "long_share": round(float((lengths > 20).mean()), 4),
+        },
+        "type_token_ratio": round(float(len(vocab) / n_words), 4),
+        "mattr": round(_mattr(word_ids), 4),
+        "question_rate": round(float((enders == "?").mean()), 4),
+        "exclamation_rate": round(float((enders == "!").mean()), 4),
+        "pronoun_ratios": pronouns,
+        "function_words_per_1000": function_words,
+        "readability": {
+            "flesch_reading_ease": round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 2),
+            "flesch_kincaid_grade": round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 2),
+            "syllables_per_word": round(syllables_per_word, 3),
+        },
+    }
+
+
+def combine_stats(stats_list: list[dict], weights: list[float] | None = None) -> dict:
+    """Weighted average of several analyze_text() results (numeric leaves only)."""
+    if weights is None:
+        weights = [1.0] * len(stats_list)
+    pairs = [(s, w) for s, w in zip(stats_list, weights) if s and s.get("word_count")]
+    if not pairs:
+        return {}
+    stats_list = [s for s, _ in pairs]
+    weights = np.asarray([w for _, w in pairs], dtype=np.float64)
+
+    def _avg(values, w):
+        if isinstance(values[0], dict):
+            keys = dict.fromkeys(k for v in values for k in v)
+            return {k: _avg([v.get(k, 0) for v in values], w) for k in keys}
+        return round(float(np.average(np.asarray(values, dtype=np.float64), weights=w)), 4)
+
+    combined = _avg(stats_list, weights)
+    combined["sentence_count"] = int(sum(s["sentence_count"] for s in stats_list))
+    combined["word_count"] = int(sum(s["word_count"] for s in stats_list))
+    return combined
+
+
+def describe_for_prompt(stats: dict) -> str:
+    """One compact line of measured numbers to ground the LLM's qualitative description."""
+    if not stats.get("word_count"):
+        return "n/a"
+    sl = stats["sentence_length"]
+    p = stats["pronoun_ratios"]
+    return (
+        f"sentences={stats['sentence_count']}, words/sentence mean={sl['mean']} "
+        f"(p10={sl['p10']}, p90={sl['p90']}, short<8={sl['short_share']:.0%}, long>20={sl['long_share']:.0%}), "
+        f"questions={stats['question_rate']:.0%}, exclamations={stats['exclamation_rate']:.0%}, "
+        f"I={p['first_singular']:.1%} we={p['first_plural']:.1%} you={p['second']:.1%}, "
+        f"MATTR={stats['mattr']}, Flesch={stats['readability']['flesch_reading_ease']}"
+    )
+
+
+def fill_numeric_fields(style: dict, stats: dict) -> dict:
+    """Overwrite the LLM's numeric guesses with measured values and attach the stats."""
+    if not stats.get("word_count"):
+        return style
+    fingerprint = style.get("linguistic_fingerprint")
+    if not isinstance(fingerprint, dict):
+        fingerprint = style["linguistic_fingerprint"] = {}
+    fingerprint["average_sentence_length"] = stats["sentence_length"]["mean"]
+    style["stylometry"] = stats
+    return style
@@ -1,43 +1,19 @@
 import os
 import json
 from youtube_transcript_api import YouTubeTranscriptApi
-from urllib.parse import urlparse, parse_qs
 from openai import OpenAI
 from dotenv import load_dotenv
 from llm_client import llm_client
-import re
+from Scripts.transcript_cleaning import clean_transcript
+from Scripts.style_analysis import ingest_style
+from Scripts.source_cache import cached_transcript, extract_video_id, source_key
+from Scripts.profile_store import has_source
 
 load_dotenv()
 
 # Initialize OpenAI client
 # client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def safe_json_loads(text):
-    """Extract JSON even if model returns extra text."""
-    try:
-        return json.loads(text)
-    except:
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group())
-            except:
-                return {"raw_output": text}
-        return {"raw_output": text}
-
-
-
-def extract_video_id(url: str) -> str:
-    """
-    Extract YouTube video ID from any valid YouTube URL.
-    """
-    parsed = urlparse(url)
-    if parsed.hostname in ["www.youtube.com", "youtube.com"]:
-        return parse_qs(parsed.query)["v"][0]
-    elif parsed.hostname == "youtu.be":
-        return parsed.path[1:]
-    else:
-        raise ValueError("Invalid YouTube URL provided.")
 
 
 def get_youtube_transcript(video_url: str) -> str:
@@ -57,159 +33,14 @@ def get_youtube_transcript(video_url: str) -> str:
         print(f"❌ Error fetching transcript: {e}")
         return ""
 
-def clean_transcript(raw_text: str) -> str:
-    # client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    prompt = f"""
-    Clean the transcript by:
-    - removing filler words
-    - fixing broken/incomplete sentences
-    - normalizing punctuation
-    - removing repeated or duplicated segments
-    - keeping ONLY what the speaker actually says
-
-    Return clean text only.
-    Transcript:
-    {raw_text}
-    """
-    cleaned = llm_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.0
-    ).choices[0].message.content
-    return cleaned.strip()
-
-def generate_style_profile(influencer_name: str, transcript_text: str):
+def generate_style_profile(influencer_name: str, transcript_text: str, source_id: str | None = None, progress=None):
     """
     Generate or append style analysis for an influencer.
     """
-    prompt = f"""
-    You are an expert linguistic profiler analyzing a YouTube/Instagram influencer.
-
-    Extract a DEEP style profile JSON ONLY in this structure:
-
-    {{
-      "tone": "",
-      "energy_level": "",
-      "delivery_style": {{
-        "pacing": "",
-        "sentence_variation": "",
-        "story_usage": "",
-        "analogy_usage": "",
-        "directive_strength": ""
-      }},
-      "linguistic_fingerprint": {{
-        "average_sentence_length": "",
-        "common_sentence_types": [],
-        "rhetorical_devices": [],
-        "transition_patterns": []
-      }},
-      "hook_style": {{
-        "dominant_types": [],
-        "examples": []
-      }},
-      "signature_phrases": [],
-      "forbidden_phrases": [],
-      "persona": "",
-      "content_archetype": "",
-      "strength_indicators": [],
-      "emotional_beats": []
-    }}
-    
-    Transcript sample:
-    {transcript_text[:7000]}
-    """
-
-    print("🧠 Analyzing style with OpenAI...")
-    # client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = llm_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
-    )
+    # ✅ Analysis (cached per video), corpus-wide phrases, append to the log, incremental merge
+    existing_data = ingest_style("youtube", influencer_name, transcript_text, source_id=source_id, progress=progress)
 
-    style_json = response.choices[0].message.content
-    new_style = safe_json_loads(style_json)
-
-    # influencer_file = f"../influencer_styles/{influencer_name.lower().replace(' ', '_')}.json"
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.abspath(os.path.join(current_dir, os.pardir))
-    influencer_dir = os.path.join(project_root, "influencer_styles")
-    os.makedirs(influencer_dir, exist_ok=True)
-    influencer_file = os.path.join(
-        influencer_dir, 
-        f"{influencer_name.lower().replace(' ', '_')}.json")
-    os.makedirs(os.path.dirname(influencer_file), exist_ok=True)
-
-    # ✅ Check if file already exists
-    if os.path.exists(influencer_file):
-        with open(influencer_file, "r", encoding="utf-8") as f:
-            existing_data = json.load(f)
-    else:
-        existing_data = {"name": influencer_name, "analyses": []}
-
-    # ✅ Append new analysis
-    existing_data["analyses"].append(new_style)
-
-    # ✅ (Optional) Generate merged summary using GPT
-    if len(existing_data["analyses"]) > 1:
-        merge_prompt = f"""
-        You are a summarizer agent.
-
-        Combine these analyses into ONE deep persona style summary.
-
-        Return JSON ONLY:
-
-        {{
-          "style_profile": {{
-            "tone": "",
-            "energy_level": "",
-            "delivery_style": {{
-              "pacing": "",
-              "sentence_variation": "",
-              "story_usage": "",
-              "analogy_usage": "",
-              "directive_strength": ""
-            }},
-            "linguistic_fingerprint": {{
-              "average_sentence_length": "",
-              "common_sentence_types": [],
-              "rhetorical_devices": [],
-              "transition_patterns": []
-            }},
-            "hook_style": {{
-              "dominant_types": [],
-              "examples": []
-            }},
-            "signature_phrases": [],
-            "forbidden_phrases": [],
-            "persona": "",
-            "content_archetype": "",
-            "strength_indicators": [],
-            "emotional_beats": []
-          }},
-          "consistency_score": {{
-            "tone": 0.0,
-            "sentence_pattern": 0.0,
-            "persona": 0.0
-          }}
-        }}
-
-    ANALYSES TO MERGE:
-        {json.dumps(existing_data["analyses"])}
-        """
-        merged = llm_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": merge_prompt}],
-            temperature=0.3
-        ).choices[0].message.content
-
-        existing_data["merged_profile"] = safe_json_loads(merged)
-
-    # ✅ Save file
-    with open(influencer_file, "w", encoding="utf-8") as f:
-        json.dump(existing_data, f, indent=2, ensure_ascii=False)
-
-    print(f"✅ Updated style profile saved at: {influencer_file}")
+    print(f"✅ Updated style profile for {influencer_name} ({existing_data['analysis_count']} analyses)")
     return existing_data
 
 
@@ -218,11 +49,18 @@ def main():
     influencer_name = input("Enter influencer name (e.g., Alex Hormozi): ").strip()
     youtube_url = input("Paste YouTube video URL: ").strip()
 
-    transcript_text = get_youtube_transcript(youtube_url)
+    # ✅ Same video ID as before → reuse the cached transcript / analysis, never count it twice
+    source_id = source_key(youtube_url)
+    if has_source("youtube", influencer_name, source_id):
+        print(f"⚡ This video is already in {influencer_name}'s profile.")
+        return
+
+    transcript_text = cached_transcript(
+        source_id, lambda: get_youtube_transcript(youtube_url), clean_transcript
+    )
 
     if transcript_text:
-        transcript_text = clean_transcript(transcript_text)
-        style_data = generate_style_profile(influencer_name, transcript_text)
+        style_data = generate_style_profile(influencer_name, transcript_text, source_id=source_id)
 
         print("\n🎯 Generated Style Summary:\n")
         print(json.dumps(style_data, indent=2, ensure_ascii=False))
@@ -0,0 +1,285 @@
+"""
+Map-reduce transcript cleaning.
+
+Sending an hour-long transcript in one prompt is slow, can exceed the model's
+output limit and silently truncates. Instead the transcript is split on
+sentence boundaries into token-budgeted chunks (with a few sentences of
+overlap), chunks are cleaned concurrently with bounded parallelism, and the
+cleaned chunks are stitched back together with the overlap removed.
+
+Before any of that a local pass removes the mechanical noise: filler words,
+stutters, caption tags like [Music] and segments repeated by overlapping
+caption fragments (rolling-hash match). Already punctuated transcripts
+(e.g. from the transcription endpoint) usually need nothing more, so the
+LLM is skipped for them.
+"""
+import re
+import time
+from difflib import SequenceMatcher
+from concurrent.futures import ThreadPoolExecutor
+from llm_client import llm_client
+from Agents.tokens import count_tokens
+from Scripts.stylometry import split_sentences
+
+CLEAN_MODEL = "gpt-4o-mini"
+CHUNK_TOKENS = 1500         # input budget per chunk
+OVERLAP_SENTENCES = 2       # sentences repeated at the start of the next chunk
+MAX_WORKERS = 4             # concurrent cleaning calls
+MAX_UNIT_WORDS = 40         # unpunctuated captions are split into pseudo-sentences
+STITCH_WINDOW = 80          # words compared when removing the overlap
+
+_NORMALIZE_RE = re.compile(r"[^a-z0-9']+")
+
+# Local pre-pass
+REPEAT_MIN_WORDS = 8        # shortest repeated segment that is dropped
+REPEAT_LOOKBACK = 300       # words back in which a repeat counts as a caption duplicate
+LLM_MAX_SENTENCE_WORDS = 35 # longer average "sentences" mean missing punctuation → needs the LLM
+LLM_MIN_UPPER_STARTS = 0.6  # fewer capitalized sentence starts → needs the LLM
+
+_CAPTION_TAG_RE = re.compile(r"\[[^\]]{0,30}\]|\([^)]*(?:music|applause|laughter|laughs|inaudible)[^)]*\)", re.I)
+_FILLER_WORD = r"(?:u+m+|u+h+m*|e+r+m+|h+m+|a+h+)(?![\w'])"
+# "mm" / "mhm" are also units ("5 mm thick"), so they only go when they are a whole utterance
+_BACKCHANNEL = r"(?:m+h*m+)[.!?]"
+# A filler takes the commas around it with it ("It was, um, fine" → "It was fine"); the period
+# after it ends the previous sentence ("I think, um. The") unless the filler is the whole
+# sentence ("Yes. Um. The")
+_FILLER_RE = re.compile(
+    rf"(?:(?:^|(?<=[.!?]\s))(?:{_FILLER_WORD}[,.!?]?|{_BACKCHANNEL})|(?:,\s*)?(?<![\w']){_FILLER_WORD},?)(?=[\s.!?]|$)",
+    re.I,
+)
+# Discourse fillers only when set off by commas, so "I like it" and "you know it" survive
+_DISCOURSE_RE = re.compile(r",\s*(?:you know|i mean|like|sort of|kind of|basically)\s*,", re.I)
+_PARTIAL_WORD_RE = re.compile(r"(?<![\w'])(\w{1,4})-\s+(?=\1)", re.I)
+# Stutters: the same word 3+ times, separated by whitespace only. Doubles ("very very",
+# "bye bye") and comma-separated repeats ("no, no, no.") are deliberate and kept
+_STUTTER_RE = re.compile(r"(?<![\w'])(\w+)(?:\s+\1){2,}(?![\w'])", re.I)
+_SENTENCE_START_RE = re.compile(r"(^|[.!?]\s+)([a-z])")
+# Legitimately doubled words ("that that", "had had") collapse to two, not one
+_LEGIT_DOUBLES = {"that", "had", "is", "do"}
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([,.!?])")
+_MULTI_PUNCT_RE = re.compile(r"([,.!?])(?:\s*,)+|,\s*([.!?])")
+_HASH_MOD = (1 << 61) - 1
+_HASH_BASE = 1_000_003
+
+
+def _drop_repeats(words: list[str]) -> tuple[list[str], int]:
+    """
+    Drop segments of at least REPEAT_MIN_WORDS words that repeat text from the
+    last REPEAT_LOOKBACK words (overlapping caption fragments, duplicated lines).
+    Rolling hash over normalized word windows, so this is linear in the text.
+    """
+    k = REPEAT_MIN_WORDS
+    if len(words) < 2 * k:
+        return words, 0
+
+    vocab = {}
+    ids = [vocab.setdefault(_normalize(w), len(vocab) + 1) for w in words]
+    top = pow(_HASH_BASE, k - 1, _HASH_MOD)
+
+    def window_hash(start):
+        h = 0
+        for t in ids[start:start + k]:
+            h = (h * _HASH_BASE + t) % _HASH_MOD
+        return h
+
+    kept, seen, removed = [], {}, 0
+    i, h = 0, window_hash(0)
+    while i < len(words):
+        if i + k <= len(words):
+            j = seen.get(h)
+            if j is not None and i - j <= REPEAT_LOOKBACK and j + k <= i and ids[j:j + k] == ids[i:i + k]:
+                # Extend the repeat as far as it goes and skip it
+                n = k
+                while i + n < len(words) and j + n < i and ids[j + n] == ids[i + n]:
+                    n += 1
+                removed += n
+                i += n
+                if i + k <= len(words):
+                    h = window_hash(i)
+                continue
+            seen[h] = i
+        kept.append(words[i])
+        if i + k < len(words):
+            h = ((h - ids[i] * top) * _HASH_BASE + ids[i + k]) % _HASH_MOD
+        i += 1
+    return kept, removed
+
+
+def _upper_start_share(text: str) -> float:
+    sentences = split_sentences(text)
+    return sum(s[0].isupper() for s in sentences) / len(sentences) if sentences else 0.0
+
+
+def local_clean(raw_text: str, stats: dict | None = None) -> str:
+    """Fast mechanical cleanup (no LLM): caption tags, fillers, stutters, repeated segments."""
+    text = _CAPTION_TAG_RE.sub(" ", raw_text or "")
+    capitalized = _upper_start_share(text) >= LLM_MIN_UPPER_STARTS
+    fillers = len(_FILLER_RE.findall(text)) + len(_DISCOURSE_RE.findall(text))
+    # Removed text becomes a space; whitespace is normalized when the words are re-joined below
+    text = _FILLER_RE.sub(" ", text)
+    text = _DISCOURSE_RE.sub(" ", text)
+    text = _PARTIAL_WORD_RE.sub("", text)
+    stutters = len(_STUTTER_RE.findall(text))
+    # Keep the speaker's own casing: the first occurrence(s) of the run, as written
+    text = _STUTTER_RE.sub(
+        lambda m: " ".join(m.group(0).split()[:2 if m.group(1).lower() in _LEGIT_DOUBLES else 1]), text
+    )
+
+    words, repeated = _drop_repeats(text.split())
+    text = " ".join(words)
+    text = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+    text = _MULTI_PUNCT_RE.sub(lambda m: m.group(2) or m.group(1), text).strip(" ,")
+
+    # Removing a leading "Um," leaves a lower-case start in otherwise capitalized text
+    if capitalized:
+        text = _SENTENCE_START_RE.sub(lambda m: m.group(1) + m.group(2).upper(), text)
+
+    if stats is not None:
+        tokens_in, tokens_out = count_tokens(raw_text or ""), count_tokens(text)
+        stats.update(tokens_in=tokens_in, tokens_out=tokens_out, tokens_removed=tokens_in - tokens_out,
+                     fillers=fillers, stutters=stutters, repeated_words=repeated)
+    return text
+
+
+def needs_llm_cleaning(text: str) -> bool:
+    """Unpunctuated or lower-cased text (typical auto-captions) still needs the LLM pass."""
+    sentences = split_sentences(text)
+    if not sentences:
+        return False
+    mean_words = sum(len(s.split()) for s in sentences) / len(sentences)
+    return mean_words > LLM_MAX_SENTENCE_WORDS or _upper_start_share(text) < LLM_MIN_UPPER_STARTS
+
+
+def split_units(text: str) -> list[str]:
+    """Sentences; run-on caption text without punctuation is cut into word windows."""
+    units = []
+    for sentence in split_sentences(text):
+        words = sentence.split()
+        for i in range(0, len(words), MAX_UNIT_WORDS):
+            units.append(" ".join(words[i:i + MAX_UNIT_WORDS]))
+    return units
+
+
+def chunk_transcript(text: str, max_tokens: int = CHUNK_TOKENS, overlap_sentences: int = OVERLAP_SENTENCES) -> list[str]:
+    units = split_units(text)
+    if not units:
+        return []
+
+    chunks, current, current_tokens = [], [], 0
+    unit_tokens = [count_tokens(u) for u in units]
+    i = 0
+    while i < len(units):
+        if current and current_tokens + unit_tokens[i] > max_tokens:
+            chunks.append(" ".join(current))
+            overlap = current[-overlap_sentences:] if overlap_sentences else []
+            # Never let the overlap alone fill the next chunk
+            if sum(count_tokens(u) for u in overlap) > max_tokens // 2:
+                overlap = []
+            current = list(overlap)
+            current_tokens = sum(count_tokens(u) for u in current)
+        current.append(units[i])
+        current_tokens += unit_tokens[i]
+        i += 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _clean_chunk(chunk: str) -> str:
+    prompt = f"""
+    Clean the transcript by:
+    - removing filler words
+    - fixing broken/incomplete sentences
+    - normalizing punctuation
+    - removing repeated or duplicated segments
+    - keeping ONLY what the speaker actually says
+
+    Return clean text only.
+    Transcript:
+    {chunk}
+    """
+    cleaned = llm_client.chat.completions.create(
+        model=CLEAN_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.0
+    ).choices[0].message.content
+    return cleaned.strip()
+
+
+def _normalize(word: str) -> str:
+    return _NORMALIZE_RE.sub("", word.lower())
+
+
+def stitch_chunks(chunks: list[str]) -> str:
+    """Join cleaned chunks, dropping the text duplicated by the chunk overlap."""
+    if not chunks:
+        return ""
+    words = chunks[0].split()
+    for nxt in chunks[1:]:
+        nxt_words = nxt.split()
+        tail = [_normalize(w) for w in words[-STITCH_WINDOW:]]
+        head = [_normalize(w) for w in nxt_words[:STITCH_WINDOW]]
+        match = SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(0, len(tail), 0, len(head))
+        if match.size >= 4:
+            cut_prev = len(words) - len(tail) + match.a + match.size
+            words = words[:cut_prev] + nxt_words[match.b + match.size:]
+        else:
+            words = words + nxt_words
+    return " ".join(words)
+
+
+def clean_transcript(raw_text: str, max_workers: int = MAX_WORKERS, stats: dict | None = None,
+                     use_llm: bool | None = None) -> str:
+    """
+    Clean a raw transcript: local pre-pass, then chunk-by-chunk LLM cleaning in parallel.
+    `use_llm=None` skips the LLM when the local pass leaves well-punctuated text.
+    If `stats` is given it is filled with the local pass counts and per-chunk latency.
+    """
+    start = time.perf_counter()
+    local_stats = {}
+    text = local_clean(raw_text, local_stats)
+    removed_share = local_stats["tokens_removed"] / max(local_stats["tokens_in"], 1)
+    print(
+        f"🧹 Local pass removed {local_stats['tokens_removed']} tokens ({removed_share:.0%}): "
+        f"{local_stats['fillers']} fillers, {local_stats['stutters']} stutters, "
+        f"{local_stats['repeated_words']} repeated words"
+    )
+    if stats is not None:
+        stats["local"] = local_stats
+
+    if use_llm is None:
+        use_llm = needs_llm_cleaning(text)
+    if not use_llm:
+        print("⚡ Transcript is already punctuated, skipping LLM cleaning.")
+        if stats is not None:
+            stats.update(chunks=[], wall_seconds=round(time.perf_counter() - start, 3))
+        return text
+
+    chunks = chunk_transcript(text)
+    if not chunks:
+        return ""
+
+    def timed(indexed_chunk):
+        index, chunk = indexed_chunk
+        t0 = time.perf_counter()
+        cleaned = _clean_chunk(chunk)
+        return {
+            "index": index,
+            "input_tokens": count_tokens(chunk),
+            "output_chars": len(cleaned),
+            "seconds": round(time.perf_counter() - t0, 3),
+            "text": cleaned,
+        }
+
+    print(f"🧽 Cleaning transcript in {len(chunks)} chunk(s), {min(max_workers, len(chunks))} at a time...")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        results = list(pool.map(timed, enumerate(chunks)))
+
+    for r in results:
+        print(f"   chunk {r['index'] + 1}/{len(chunks)}: {r['input_tokens']} tokens in {r['seconds']}s")
+
+    cleaned = stitch_chunks([r["text"] for r in results])
+    if stats is not None:
+        stats["chunks"] = [{k: v for k, v in r.items() if k != "text"} for r in results]
+        stats["wall_seconds"] = round(time.perf_counter() - start, 3)
+    return cleaned
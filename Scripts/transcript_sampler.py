@@ -0,0 +1,97 @@
+"""
+Representative transcript sampling for style analysis.
+
+The style prompt used to see `transcript_text[:7000]`: only the intro of long
+videos, which over-weights the hook. Instead the transcript is cut into short
+passages, each passage is scored locally (sentence-length variety, vocabulary
+variety, rhetorical questions, story markers, direct address), and the best
+passages are picked from evenly spaced sections of the video until the token
+budget is used. The opening passage is always kept for the hook.
+"""
+import re
+import numpy as np
+from Agents.tokens import count_tokens
+from Scripts.stylometry import tokenize
+from Scripts.transcript_cleaning import split_units
+
+SAMPLE_TOKENS = 1750        # about the size of the old 7000-character slice
+PASSAGE_TOKENS = 160
+EXCERPT_SEPARATOR = "\n[...]\n"
+
+_STORY_RE = re.compile(
+    r"\b(?:i remember|when i was|years ago|one day|back then|the first time|story|"
+    r"true story|imagine|picture this|let me tell you|so i|my first|last week|yesterday)\b",
+    re.I,
+)
+_DIRECT_RE = re.compile(r"\b(?:you|your|you're|you'll|you've)\b", re.I)
+
+# Relative weight of each passage feature
+WEIGHTS = {
+    "length_variety": 1.0,
+    "vocab_variety": 1.0,
+    "questions": 1.5,
+    "story": 1.5,
+    "direct_address": 0.5,
+}
+
+
+def _passages(text: str) -> list[str]:
+    passages, current, current_tokens = [], [], 0
+    for unit in split_units(text):
+        tokens = count_tokens(unit)
+        if current and current_tokens + tokens > PASSAGE_TOKENS:
+            passages.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def _features(passage: str) -> list[float]:
+    units = split_units(passage)
+    words = tokenize(passage)
+    lengths = np.array([len(tokenize(u)) for u in units] or [0], dtype=np.float64)
+    n_units, n_words = max(len(units), 1), max(len(words), 1)
+    return [
+        float(lengths.std() / max(lengths.mean(), 1.0)),          # coefficient of variation
+        len(set(words)) / n_words,
+        sum(u.rstrip().endswith("?") for u in units) / n_units,
+        len(_STORY_RE.findall(passage)) / n_units,
+        len(_DIRECT_RE.findall(passage)) / n_words,
+    ]
+
+
+def score_passages(passages: list[str]) -> np.ndarray:
+    """One informativeness score per passage (z-scored features, weighted sum)."""
+    features = np.array([_features(p) for p in passages], dtype=np.float64)
+    spread = features.std(axis=0)
+    z = (features - features.mean(axis=0)) / np.where(spread > 0, spread, 1.0)
+    return z @ np.array(list(WEIGHTS.values()))
+
+
+def sample_transcript(text: str, max_tokens: int = SAMPLE_TOKENS) -> str:
+    """Token-budgeted excerpts spread across the whole transcript, in original order."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    passages = _passages(text)
+    if len(passages) <= 1:
+        return text[: max_tokens * 4]
+
+    tokens = np.array([count_tokens(p) for p in passages])
+    scores = score_passages(passages)
+    n_sections = max(1, int(max_tokens // max(tokens.mean(), 1)))
+    sections = np.array_split(np.arange(len(passages)), n_sections)
+
+    # Opening for the hook, then the best passage of each section, then the best of the rest
+    chosen, budget = [0], max_tokens - tokens[0]
+    ranked_sections = [sorted(s, key=lambda i: -scores[i]) for s in sections]
+    leftovers = sorted(range(len(passages)), key=lambda i: -scores[i])
+    for candidate in [s[0] for s in ranked_sections if len(s)] + leftovers:
+        if candidate in chosen or tokens[candidate] > budget:
+            continue
+        chosen.append(candidate)
+        budget -= tokens[candidate]
+
+    return EXCERPT_SEPARATOR.join(passages[i] for i in sorted(chosen))
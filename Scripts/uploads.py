@@ -0,0 +1,102 @@
+"""
+Per-session temp files for uploaded videos.
+
+The enhancer tabs used to `read()` the whole upload into memory and write it
+to one fixed `temp_video.mp4`, so two sessions could overwrite each other's
+video mid-processing. Uploads are now copied in fixed-size blocks to a unique
+file under .cache/uploads/<session>/ and removed when processing ends, even
+on errors. Files left behind by a crashed process are swept on startup.
+
+ingest_uploaded_video() is the body of a background ingestion job (see
+job_queue.py). The request handler stores the upload before submitting, so a
+queued job only holds a path (not the upload in RAM), and the job deletes the
+file when done. The path is kept in the job meta, so the video of an
+interrupted job can still be found until the stale-upload sweep.
+"""
+import os
+import time
+import shutil
+import tempfile
+from contextlib import contextmanager
+from Agents.config import CACHE_DIR
+from Scripts.youtube_influencer_profile import generate_influencer_style as generate_youtube
+from Scripts.instagram_influencer_profile import generate_influencer_style as generate_instagram
+
+UPLOAD_DIR = os.path.join(CACHE_DIR, "uploads")
+COPY_BLOCK = 1024 * 1024        # bytes copied per write
+STALE_AFTER_SECONDS = 6 * 3600
+
+
+def store_upload(uploaded_file, session_id: str) -> str:
+    """Stream a file-like upload to a unique temp file and return its path."""
+    session_dir = os.path.join(UPLOAD_DIR, session_id)
+    os.makedirs(session_dir, exist_ok=True)
+    suffix = os.path.splitext(getattr(uploaded_file, "name", ""))[1].lower() or ".mp4"
+    fd, path = tempfile.mkstemp(dir=session_dir, prefix="upload_", suffix=suffix)
+    try:
+        if hasattr(uploaded_file, "seek"):
+            uploaded_file.seek(0)
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(uploaded_file, f, COPY_BLOCK)
+    except BaseException:
+        discard_upload(path)
+        raise
+    return path
+
+
+def discard_upload(path: str):
+    """Delete a stored upload, and its session folder once empty."""
+    if os.path.exists(path):
+        os.remove(path)
+    try:
+        os.rmdir(os.path.dirname(path))
+    except OSError:
+        pass  # another upload of this session is still in progress
+
+
+@contextmanager
+def saved_upload(uploaded_file, session_id: str):
+    """store_upload() as a context manager: the file is deleted on exit."""
+    path = store_upload(uploaded_file, session_id)
+    try:
+        yield path
+    finally:
+        discard_upload(path)
+
+
+def ingest_uploaded_video(platform: str, influencer_name: str, path: str, progress=None) -> dict:
+    """
+    Background-job body: add the stored upload at `path` (see store_upload) to the
+    influencer's profile, then delete it.
+    Returns a small summary (the job result is persisted as JSON).
+    """
+    generate = {"youtube": generate_youtube, "instagram": generate_instagram}[platform]
+    try:
+        profile = generate(influencer_name, path, progress=progress)
+    finally:
+        discard_upload(path)
+    if profile is None:
+        raise RuntimeError("No transcript found in the video.")
+    return {"influencer": influencer_name, "analysis_count": profile.get("analysis_count", 0)}
+
+
+def cleanup_stale_uploads(max_age_seconds: float = STALE_AFTER_SECONDS) -> int:
+    """Remove uploads older than `max_age_seconds` (left by crashed runs). Returns files removed."""
+    if not os.path.isdir(UPLOAD_DIR):
+        return 0
+    removed, cutoff = 0, time.time() - max_age_seconds
+    for root, dirs, files in os.walk(UPLOAD_DIR, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        if root != UPLOAD_DIR:
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+    return removed
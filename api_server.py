@@ -0,0 +1,319 @@
+"""
+Headless HTTP API for script generation (no Streamlit needed).
+
+    python api_server.py --port 8000
+
+- POST /v1/generations               {"topic", "influencer", "platform", "duration"} → 202 {"id", ...}
+                                     or {"topic", "targets": [{"influencer", "platform", "duration"}, ...]}:
+                                     research once, then one concurrent branch per target
+- GET  /v1/generations/<id>          job status, stages and (when done) the result
+- GET  /v1/generations/<id>/events   server-sent events: `stage` per finished graph node,
+                                     `token` per streamed LLM text delta, then `done` or `failed`
+- POST /v1/evaluations               {"influencer", "platform", "scripts": [...]} → {"reports": [...]}:
+                                     quality reports for up to MAX_EVALUATION_SCRIPTS scripts, scored in
+                                     batched requests (QualityAgent.evaluate_batch)
+- GET  /v1/profiles                  influencer profiles per platform
+- GET  /v1/metrics                   JSON reply parsing per output kind (see Agents/llm_json.py)
+
+Generations run on a JobQueue ("api"), so results are persisted under
+.cache/jobs/api/ like the Streamlit jobs. Each client (X-Client-Id header, or
+the remote address) may have API_CLIENT_CONCURRENCY generations in flight;
+beyond that, or when the queue is full, requests get 429 / 503.
+Token events are kept in memory only; after a restart, /events replays the
+persisted stages of a job and its final state.
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import tornado.ioloop
+import tornado.locks
+import tornado.web
+from tornado.iostream import StreamClosedError
+from Agents.base_agent import stream_tokens
+from Agents.config import GENERATION_MAX_PENDING, GENERATION_WORKERS
+from Agents.director_graph import run_fanout, run_script_graph
+from Agents.llm_json import parse_stats
+from Agents.quality_agent import QualityAgent
+from Scripts.profile_registry import ProfileReadError, get_registry
+from job_queue import ACTIVE_STATUSES, QueueFull, get_queue
+
+CLIENT_CONCURRENCY = int(os.getenv("API_CLIENT_CONCURRENCY", "2"))
+DEFAULT_DURATIONS = {"youtube": 180, "instagram": 60}
+MAX_FANOUT_TARGETS = 8
+MAX_EVALUATION_SCRIPTS = 50
+KEEP_EVENT_LOGS = 200       # finished jobs whose live events stay replayable
+KEEPALIVE_SECONDS = 15
+
+
+class EventLog:
+    """
+    Append-only events of one job. Worker threads append; SSE handlers on the
+    IOLoop read from a cursor and wait for more.
+    """
+
+    def __init__(self, loop: tornado.ioloop.IOLoop):
+        self.loop = loop
+        self.events = []
+        self.finished = False
+        self._lock = threading.Lock()
+        self._changed = tornado.locks.Condition()
+
+    def append(self, event: str, data, final: bool = False):
+        with self._lock:
+            self.events.append((event, data))
+            self.finished = self.finished or final
+        self.loop.add_callback(self._changed.notify_all)
+
+    def since(self, cursor: int) -> tuple[list, bool]:
+        with self._lock:
+            return self.events[cursor:], self.finished
+
+    async def wait(self, timeout: float) -> bool:
+        """True when new events arrived, False after `timeout` seconds."""
+        return await self._changed.wait(timeout=time.time() + timeout)
+
+
+def generate(request: dict, events: EventLog, profile: bool = False, progress=None) -> dict:
+    """
+    Job body: one generation (run_script_graph) or, when the request has
+    `targets`, a fan-out (run_fanout), mirroring stages and tokens into `events`.
+    """
+    def report(stage, **info):
+        progress(stage, **info)
+        events.append("stage", {"stage": stage, **info})
+
+    try:
+        if "targets" in request:
+            result = run_fanout(
+                request["topic"], request["targets"], progress=report, profile=profile,
+                on_token=lambda index, text: events.append("token", {"target": index, "text": text}),
+            )
+        else:
+            with stream_tokens(lambda text: events.append("token", {"text": text})):
+                result = run_script_graph(request, progress=report, profile=profile)
+    except Exception as e:
+        events.append("failed", {"error": str(e)}, final=True)
+        raise
+    events.append("done", result, final=True)
+    return result
+
+
+class Service:
+    """Queue + live event logs shared by all handlers."""
+
+    def __init__(self, workers: int = GENERATION_WORKERS, max_pending: int = GENERATION_MAX_PENDING,
+                 client_concurrency: int = CLIENT_CONCURRENCY):
+        self.queue = get_queue("api", max_workers=workers, max_pending=max_pending)
+        self.client_concurrency = client_concurrency
+        self.logs = OrderedDict()
+
+    def submit(self, client: str, request: dict, profile: bool = False) -> str:
+        # Handlers run on the IOLoop thread, so check + submit cannot interleave
+        if self.queue.pending(client=client) >= self.client_concurrency:
+            raise tornado.web.HTTPError(429, reason=f"At most {self.client_concurrency} generations in flight per client")
+        log = EventLog(tornado.ioloop.IOLoop.current())
+        targets = request.get("targets") or [request]
+        meta = {"client": client, "topic": request["topic"],
+                "influencer": ", ".join(t["influencer"] for t in targets),
+                "content_type": ", ".join(dict.fromkeys(t["content_type"] for t in targets))}
+        try:
+            job_id = self.queue.submit(generate, request, log, profile=profile, meta=meta)
+        except QueueFull as e:
+            raise tornado.web.HTTPError(503, reason=str(e))
+        self.logs[job_id] = log
+        while len(self.logs) > KEEP_EVENT_LOGS:
+            oldest = next(iter(self.logs))
+            if not self.logs[oldest].finished:
+                break
+            del self.logs[oldest]
+        return job_id
+
+
+class JsonHandler(tornado.web.RequestHandler):
+    def initialize(self, service: Service):
+        self.service = service
+
+    def client_id(self) -> str:
+        return self.request.headers.get("X-Client-Id") or self.request.remote_ip
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({"error": self._reason, "status": status_code})
+
+    def job_or_404(self, job_id: str) -> dict:
+        job = self.service.queue.get(job_id)
+        if job is None:
+            raise tornado.web.HTTPError(404, reason=f"Unknown generation: {job_id}")
+        return job
+
+
+class GenerationsHandler(JsonHandler):
+    def post(self):
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except json.JSONDecodeError:
+            raise tornado.web.HTTPError(400, reason="Body must be JSON")
+
+        topic = str(body.get("topic") or "").strip()
+        if not topic:
+            raise tornado.web.HTTPError(400, reason="`topic` is required")
+
+        if "targets" in body:
+            specs = body["targets"]
+            if not isinstance(specs, list) or not 1 <= len(specs) <= MAX_FANOUT_TARGETS:
+                raise tornado.web.HTTPError(400, reason=f"`targets` must list 1–{MAX_FANOUT_TARGETS} targets")
+            request = {"topic": topic, "targets": [self.parse_target(spec) for spec in specs]}
+        else:
+            request = {"topic": topic, **self.parse_target(body)}
+        job_id = self.service.submit(self.client_id(), request, profile=bool(body.get("profile")))
+        self.set_status(202)
+        self.write({
+            "id": job_id,
+            "status_url": f"/v1/generations/{job_id}",
+            "events_url": f"/v1/generations/{job_id}/events",
+        })
+
+    @staticmethod
+    def parse_target(spec: dict) -> dict:
+        """{"influencer", "platform", "duration"} → graph input for one target."""
+        if not isinstance(spec, dict):
+            raise tornado.web.HTTPError(400, reason="Each target must be an object")
+        influencer = spec.get("influencer")
+        platform = (spec.get("platform") or spec.get("content_type") or "youtube").lower()
+        if platform not in DEFAULT_DURATIONS:
+            raise tornado.web.HTTPError(400, reason=f"Unknown platform: {platform}")
+        try:
+            duration = int(spec.get("duration") or DEFAULT_DURATIONS[platform])
+        except (TypeError, ValueError):
+            raise tornado.web.HTTPError(400, reason="`duration` must be a number of seconds")
+        try:
+            style_profile = get_registry().get(platform, influencer) if influencer else None
+        except ProfileReadError as e:
+            raise tornado.web.HTTPError(500, reason=f"Profile {influencer!r} could not be read: {e}")
+        if style_profile is None:
+            raise tornado.web.HTTPError(404, reason=f"No {platform} profile named {influencer!r}")
+        return {
+            "influencer": influencer,
+            "style_profile": style_profile,
+            "duration": duration,
+            "content_type": platform,
+        }
+
+
+class EvaluationsHandler(JsonHandler):
+    async def post(self):
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except json.JSONDecodeError:
+            raise tornado.web.HTTPError(400, reason="Body must be JSON")
+        scripts = body.get("scripts")
+        if not isinstance(scripts, list) or not 1 <= len(scripts) <= MAX_EVALUATION_SCRIPTS \
+                or not all(isinstance(s, str) and s.strip() for s in scripts):
+            raise tornado.web.HTTPError(400, reason=f"`scripts` must list 1–{MAX_EVALUATION_SCRIPTS} non-empty strings")
+        target = GenerationsHandler.parse_target(body)
+        # LLM requests block; keep them off the IOLoop
+        reports = await tornado.ioloop.IOLoop.current().run_in_executor(
+            None, lambda: QualityAgent().evaluate_batch(
+                scripts, target["style_profile"], influencer=target["influencer"], platform=target["content_type"]),
+        )
+        self.write({"influencer": target["influencer"], "platform": target["content_type"], "reports": reports})
+
+
+class GenerationHandler(JsonHandler):
+    def get(self, job_id):
+        self.write(self.job_or_404(job_id))
+
+
+class GenerationEventsHandler(JsonHandler):
+    async def get(self, job_id):
+        job = self.job_or_404(job_id)
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Accel-Buffering", "no")
+
+        log = self.service.logs.get(job_id)
+        try:
+            if log is None:
+                await self.replay_persisted(job)
+                return
+            last_id = self.request.headers.get("Last-Event-ID", "")
+            cursor = int(last_id) + 1 if last_id.isdigit() else 0   # resume after a reconnect
+            while True:
+                events, finished = log.since(cursor)
+                for event, data in events:
+                    self.send(event, data, cursor)
+                    cursor += 1
+                await self.flush()
+                if finished and not events:
+                    return
+                if not events:
+                    await self.wait_or_ping(log)
+        except StreamClosedError:
+            pass  # client went away; the job keeps running
+
+    async def wait_or_ping(self, log: EventLog):
+        if not await log.wait(KEEPALIVE_SECONDS):
+            self.write(": ping\n\n")   # keeps proxies from closing an idle stream
+
+    async def replay_persisted(self, job: dict):
+        """Job from before a restart (or an evicted log): persisted stages, then the outcome."""
+        while job["status"] in ACTIVE_STATUSES:
+            # Another worker process owns it; poll the persisted state
+            await asyncio.sleep(1)
+            job = self.job_or_404(job["id"])
+        for i, stage in enumerate(job["stages"]):
+            self.send("stage", stage, i)
+        if job["status"] == "done":
+            self.send("done", job["result"], len(job["stages"]))
+        else:
+            self.send("failed", {"error": job["error"], "status": job["status"]}, len(job["stages"]))
+        await self.flush()
+
+    def send(self, event: str, data, event_id: int):
+        self.write(f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n")
+
+
+class ProfilesHandler(JsonHandler):
+    def get(self):
+        registry = get_registry()
+        self.write({platform: registry.names(platform) for platform in DEFAULT_DURATIONS})
+
+
+class MetricsHandler(JsonHandler):
+    def get(self):
+        self.write({"json_parsing": parse_stats()})
+
+
+def make_app(service: Service | None = None) -> tornado.web.Application:
+    args = {"service": service or Service()}
+    return tornado.web.Application([
+        (r"/v1/generations", GenerationsHandler, args),
+        (r"/v1/generations/(\w+)", GenerationHandler, args),
+        (r"/v1/generations/(\w+)/events", GenerationEventsHandler, args),
+        (r"/v1/evaluations", EvaluationsHandler, args),
+        (r"/v1/profiles", ProfilesHandler, args),
+        (r"/v1/metrics", MetricsHandler, args),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API for script generation.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--workers", type=int, default=GENERATION_WORKERS)
+    parser.add_argument("--max-pending", type=int, default=GENERATION_MAX_PENDING)
+    parser.add_argument("--client-concurrency", type=int, default=CLIENT_CONCURRENCY)
+    args = parser.parse_args()
+
+    service = Service(args.workers, args.max_pending, args.client_concurrency)
+    make_app(service).listen(args.port, args.host)
+    print(f"🛰️ Generation API on http://{args.host}:{args.port}/v1 "
+          f"({args.workers} workers, {args.client_concurrency} per client)")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 import streamlit as st
 import os
 import json
-from Agents.director_graph import build_script_graph
-from Scripts.youtube_influencer_profile import generate_influencer_style
-from Scripts.instagram_influencer_profile import generate_IG_style_profile
-from Agents.voice_calibration import VoiceCalibrationAgent
+from Agents.director_graph import run_script_graph
+from Agents.config import GENERATION_WORKERS, GENERATION_MAX_PENDING
+from Agents.voice_calibration import VoiceCalibrationAgent, samples_key
+from Agents.profiler import gantt_chart
+from Agents.style_digest import attach_style_digest
+from Scripts.profile_registry import ProfileReadError, get_registry, notify_profile_saved
+from Scripts.uploads import cleanup_stale_uploads, discard_upload, ingest_uploaded_video, store_upload
+from Scripts.history_store import recent_runs, related_runs, search_runs
+from job_queue import QueueFull, get_queue
+import uuid
+import time
 import re
 from dotenv import load_dotenv
 
@@ -19,48 +26,133 @@ st.set_page_config(page_title="AI Content Studio", page_icon="🎬", layout="wid
 def get_project_root():
     return os.path.dirname(os.path.abspath(__file__))
 
+@st.cache_resource
+def sweep_stale_uploads():
+    """Once per server process: delete uploads left behind by crashed runs."""
+    return cleanup_stale_uploads()
+
+def get_upload_session_id():
+    """Unique per browser session, so concurrent uploads never share a temp file."""
+    if "upload_session_id" not in st.session_state:
+        st.session_state["upload_session_id"] = uuid.uuid4().hex
+    return st.session_state["upload_session_id"]
+
+INGEST_WORKERS = 2
+INGEST_STAGES = ["queued", "transcribing", "cleaning", "analyzing", "merging", "done"]
+
+def get_ingest_queue():
+    """Ingestion jobs shared by all sessions of this server process."""
+    return get_queue("ingest", max_workers=INGEST_WORKERS)
+
+@st.fragment(run_every=2)
+def show_ingest_jobs(platform):
+    """Polls the job queue; reruns only this block every 2 seconds."""
+    jobs = [j for j in get_ingest_queue().recent(limit=10) if j["meta"].get("platform") == platform]
+    if not jobs:
+        return
+    st.markdown("#### 📋 Recent ingestion jobs")
+    for job in jobs:
+        meta = job["meta"]
+        label = f"**{meta.get('influencer')}** · {meta.get('file')} · `{job['id']}`"
+        if job["status"] == "failed" or job["status"] == "interrupted":
+            st.error(f"❌ {label}: {job['error']}")
+        elif job["status"] == "done":
+            count = (job.get("result") or {}).get("analysis_count")
+            st.success(f"✅ {label}: done ({count} analyses in profile)")
+        else:
+            step = INGEST_STAGES.index(job["stage"]) if job["stage"] in INGEST_STAGES else 0
+            elapsed = time.time() - job["created"]
+            st.progress(step / (len(INGEST_STAGES) - 1), text=f"⏳ {label}: {job['stage']}… ({elapsed:.0f}s)")
+
+def get_generation_queue():
+    """Script generations shared by all sessions; size via GENERATION_WORKERS / GENERATION_MAX_PENDING."""
+    return get_queue("generate", max_workers=GENERATION_WORKERS, max_pending=GENERATION_MAX_PENDING)
+
+# Pipeline nodes of one pass, and the extra nodes of each revision lap
+BASE_PIPELINE_STEPS = ["research", "write_script", "edit_script", "post_process", "evaluate_quality"]
+REVISION_LAP_STEPS = 4
+NODE_LABELS = {
+    "research": "🔍 Research done",
+    "write_script": "✍️ Draft written",
+    "shortform_script": "✍️ Short-form draft written",
+    "edit_script": "🧹 Edited for clarity",
+    "post_process": "🧩 Post-processed",
+    "evaluate_quality": "🧠 Quality evaluated",
+    "revise_script": "🔁 Revised with feedback",
+}
+NEXT_STEP_LABELS = {
+    "research": "✍️ Writing draft script...",
+    "write_script": "🧹 Editing for clarity...",
+    "shortform_script": "🧹 Editing for clarity...",
+    "revise_script": "🧹 Editing the revision...",
+    "edit_script": "🧩 Post-processing...",
+    "post_process": "🧠 Evaluating quality...",
+    "evaluate_quality": "✅ Finalizing...",
+}
+
+@st.fragment(run_every=1)
+def show_generation_progress(job_id):
+    """Polls one generation job; reruns the whole page once it has finished."""
+    job = get_generation_queue().get(job_id)
+    if job is None or job["status"] not in ("queued", "running"):
+        st.rerun()
+
+    if job["status"] == "queued":
+        ahead = get_generation_queue().queued_ahead(job_id)
+        st.progress(0.0, text=f"🚦 Waiting for a free worker ({ahead} generation(s) ahead in the queue)...")
+        return
+
+    node_events = [e for e in job["stages"] if e["stage"] in NODE_LABELS]
+    laps = sum(1 for e in node_events if e["stage"] == "revise_script")
+    expected_steps = len(BASE_PIPELINE_STEPS) + laps * REVISION_LAP_STEPS
+    last = node_events[-1]["stage"] if node_events else None
+    next_label = NEXT_STEP_LABELS.get(last, "🔍 Researching topic...")
+    st.progress(min(len(node_events) / expected_steps, 0.99), text=next_label)
+
+    with st.status("Agents are collaborating... please wait ⏳", expanded=True):
+        for event in node_events:
+            label = NODE_LABELS[event["stage"]]
+            st.write(f"{label} · {event.get('elapsed', 0):.1f}s")
+            if event.get("preview"):
+                with st.expander(f"📝 {label}"):
+                    st.text(remove_influencer(event["preview"]))
+            if event["stage"] == "evaluate_quality":
+                st.write(f"🧠 Style match: **{event.get('score', 'n/a')}** (lap {event.get('lap', 1)})")
+
 def remove_influencer(text: str) -> str:
     # \b ensures it matches 'Influencer' as a whole word
     return re.sub(r'\bInfluencer\b', '', text, flags=re.IGNORECASE).strip()
 
 def load_influencers():
-    """Lists all influencer profiles (works on both local and server)"""
-    project_root = get_project_root()
-    styles_path = os.path.join(project_root, "influencer_styles")
-
-    if not os.path.exists(styles_path):
-        st.error(f"❌ 'influencer_styles' folder not found.\nExpected at: {styles_path}")
-        return []
-    return [os.path.splitext(f)[0] for f in os.listdir(styles_path) if f.endswith(".json")]
+    """Lists all influencer profiles (served from the in-memory registry)"""
+    return get_registry().names("youtube")
 
 def load_style_profile(name):
-    project_root = get_project_root()
-    style_path = os.path.join(project_root, "influencer_styles", f"{name}.json")
-    if not os.path.exists(style_path):
-        st.error(f"❌ Style file not found at: {style_path}")
+    try:
+        profile = get_registry().get("youtube", name)
+    except ProfileReadError as e:
+        st.error(f"❌ Style file for {name} could not be read: {e}")
         st.stop()
-    with open(style_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    if profile is None:
+        st.error(f"❌ Style file not found for: {name}")
+        st.stop()
+    return profile
     
 
 def load_IG_influencers():
-    """Lists all influencer profiles (works on both local and server)"""
-    project_root = get_project_root()
-    styles_path = os.path.join(project_root, "IG_influencer_styles")
-
-    if not os.path.exists(styles_path):
-        st.error(f"❌ 'IG_influencer_styles' folder not found.\nExpected at: {styles_path}")
-        return []
-    return [os.path.splitext(f)[0] for f in os.listdir(styles_path) if f.endswith(".json")]
+    """Lists all influencer profiles (served from the in-memory registry)"""
+    return get_registry().names("instagram")
 
 def load_IG_style_profile(name):
-    project_root = get_project_root()
-    style_path = os.path.join(project_root, "IG_influencer_styles", f"{name}.json")
-    if not os.path.exists(style_path):
-        st.error(f"❌ Style file not found at: {style_path}")
+    try:
+        profile = get_registry().get("instagram", name)
+    except ProfileReadError as e:
+        st.error(f"❌ Style file for {name} could not be read: {e}")
         st.stop()
-    with open(style_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    if profile is None:
+        st.error(f"❌ Style file not found for: {name}")
+        st.stop()
+    return profile
 
 
 def save_new_style(name, data):
@@ -69,8 +161,10 @@ def save_new_style(name, data):
     styles_path = os.path.join(project_root, "influencer_styles")
     os.makedirs(styles_path, exist_ok=True)
     path = os.path.join(styles_path, f"{name}.json")
+    attach_style_digest(data)
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4)
+    notify_profile_saved("youtube", name)
     return path
 
 # ---------- Dummy Function (replace with your actual logic) ----------
@@ -87,6 +181,8 @@ def process_youtube_video(video_path, influencer_profile):
         "styled_output": f"Influencer '{influencer_profile['name']}' style applied successfully."
     }
 
+sweep_stale_uploads()
+
 # ---------- Tabs ----------
 st.title("🎬 AI Multi-Agent Content Studio")
 tabs = st.tabs(["🧠 Script Generator", "🎥 YouTube Influencer Profile Enhancer", "🎥 Instagram Influencer Profile Enhancer"])
@@ -146,6 +242,21 @@ with tabs[0]:
         key="tab1_topic_input"
     )
 
+    # --- Optional: reuse research/hooks of an earlier run on a related topic ---
+    reuse_run = None
+    related = related_runs(topic) if topic.strip() else []
+    if related:
+        reuse_labels = {
+            run["id"]: f"{run['topic']} · {run['influencer']} · {time.strftime('%Y-%m-%d', time.localtime(run['created']))}"
+            for run in related
+        }
+        if st.checkbox("♻️ Reuse research (and hooks) from a previous run on a related topic",
+                       value=False, key="tab1_reuse_history"):
+            reuse_id = st.selectbox("Previous run", list(reuse_labels), format_func=reuse_labels.get,
+                                    key="tab1_reuse_run")
+            reuse_run = next(run for run in related if run["id"] == reuse_id)
+            st.caption("Research is skipped; hooks are reused only when the influencer is the same.")
+
    # ================================
     # OPTIONAL VOICE CALIBRATION
     # ================================
@@ -158,21 +269,47 @@ with tabs[0]:
         key="creator_samples_uploader"
     )
 
-    creator_style = None
     vc_agent = VoiceCalibrationAgent()
 
+    # ✅ The extracted style lives in session_state, so it survives the Generate rerun
     if uploaded_samples:
-        sample_texts = [file.read().decode("utf-8") for file in uploaded_samples]
-
-        if st.button("Analyze My Writing Style", use_container_width=True):
+        sample_texts = [file.getvalue().decode("utf-8") for file in uploaded_samples]
+        current_key = samples_key(sample_texts)
+        if st.session_state.get("creator_samples_key") != current_key:
+            # New set of samples: reuse a previous analysis of the same files if there is one
+            st.session_state["creator_samples_key"] = current_key
+            st.session_state["creator_style"] = vc_agent.cached_creator_style(sample_texts)
+
+        if st.session_state.get("creator_style"):
+            st.success("🎯 Your writing style is ready and will be used for generation.")
+            with st.expander("Your extracted style"):
+                st.json(st.session_state["creator_style"])
+        elif st.button("Analyze My Writing Style", use_container_width=True):
             with st.spinner("Analyzing your writing style..."):
-                creator_style = vc_agent.analyze_creator_style(sample_texts)
-            st.success("🎯 Your writing style has been extracted!")
-            st.json(creator_style)
+                extracted = vc_agent.analyze_creator_style(sample_texts)
+            if "raw_output" in extracted:
+                # Unparsed analysis: keep calibration off and the button available for a retry
+                st.error("❌ Could not extract your writing style. Please try again.")
+            else:
+                st.session_state["creator_style"] = extracted
+                st.success("🎯 Your writing style has been extracted!")
+                st.json(extracted)
+    else:
+        # Removing the samples turns calibration off again
+        st.session_state.pop("creator_samples_key", None)
+        st.session_state.pop("creator_style", None)
+
+    creator_style = st.session_state.get("creator_style")
 
     # ================================
     # GENERATE SCRIPT
     # ================================
+    show_timeline = st.checkbox(
+        "⏱️ Show run timeline (per-agent profiler)",
+        value=False,
+        key="tab1_show_timeline"
+    )
+
     if st.button("🚀 Generate Script", use_container_width=True, key="tab1_generate_button"):
         if not topic.strip():
             st.warning("Please enter a topic.")
@@ -191,14 +328,17 @@ with tabs[0]:
                 influencer_style = style_profile.get("merged_profile") or style_profile.get("style_profile") or style_profile
                 style_profile = vc_agent.merge_styles(creator_style, influencer_style)
             merged_name = f"{influencer_name}_personalized"
-            save_path = save_new_style(merged_name, style_profile)
-            st.success(f"🎉 Voice Calibration Applied! Saved as: {merged_name}")
+            try:
+                saved = get_registry().get("youtube", merged_name) or {}
+            except ProfileReadError:
+                saved = {}   # unreadable earlier copy; overwritten below
+            if saved.get("merge_key") and saved.get("merge_key") == style_profile.get("merge_key"):
+                st.success(f"🎉 Voice Calibration Applied! (unchanged, reusing: {merged_name})")
+            else:
+                save_path = save_new_style(merged_name, style_profile)
+                st.success(f"🎉 Voice Calibration Applied! Saved as: {merged_name}")
 
 
-        st.info(f"🎯 Generating {content_key.capitalize()} script for **{influencer_name}** on topic: *{topic}* ...")
-
-        # Build the LangGraph pipeline
-        graph = build_script_graph()
         state = {
             "topic": topic,
             "influencer": influencer_name,
@@ -206,43 +346,80 @@ with tabs[0]:
             "duration": duration,
             "content_type": content_key
         }
-
-        with st.spinner("Agents are collaborating... please wait ⏳"):
-            
-
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # Simulated progress (LangGraph doesn't expose real-time progress easily)
-            import time
-            for i in range(100):
-                progress_bar.progress(i + 1)
-                if i < 20:
-                    status_text.text("🔍 Researching topic...")
-                elif i < 50:
-                    status_text.text("✍️ Writing draft script...")
-                elif i < 70:
-                    status_text.text("🧹 Editing for clarity...")
-                elif i < 90:
-                    status_text.text("🧠 Evaluating quality...")
-                else:
-                    status_text.text("✅ Finalizing...")
-                time.sleep(0.05)
-
-            result = graph.invoke(state)
-            
-
-        # --- Display results ---
-        st.success("✅ Script Generation Complete!")
+        if reuse_run:
+            state["research_notes"] = reuse_run["research_notes"]
+            if reuse_run["influencer"] == influencer_name and reuse_run.get("hooks"):
+                state["hooks"] = reuse_run["hooks"]
+
+        # ✅ The graph runs on the shared generation pool; this session only polls the job
+        active_job = get_generation_queue().get(st.session_state.get("generation_job_id", ""))
+        if active_job and active_job["status"] in ("queued", "running"):
+            st.warning("⏳ Your previous script is still being generated — please wait for it to finish.")
+        else:
+            try:
+                job_id = get_generation_queue().submit(
+                    run_script_graph, state, profile=show_timeline,
+                    meta={"topic": topic, "influencer": influencer_name, "content_type": content_key,
+                          "session": get_upload_session_id()},
+                )
+                st.session_state["generation_job_id"] = job_id
+                st.info(f"🎯 Generating {content_key.capitalize()} script for **{influencer_name}** on topic: *{topic}* ...")
+            except QueueFull:
+                st.error("🚦 The studio is busy right now — please try again in a minute.")
+
+    # --- Progress / results of this session's latest generation (survives reruns) ---
+    generation_job_id = st.session_state.get("generation_job_id")
+    generation_job = get_generation_queue().get(generation_job_id) if generation_job_id else None
+    if generation_job and generation_job["status"] in ("queued", "running"):
+        show_generation_progress(generation_job_id)
+    elif generation_job and generation_job["status"] == "done":
+        result = generation_job["result"]
+        st.success(f"✅ Script Generation Complete! ({result.get('seconds', 0):.1f}s)")
         st.subheader("🧾 Final Script")
         st.text_area(
             "Generated Script", 
-            remove_influencer(result["processed_script"]), 
+            remove_influencer(result["processed_script"] or ""), 
             height=400, 
             key="tab1_final_script_box")
         st.subheader("💬 Quality Report")
         st.json(result["quality_report"])
 
+        timeline = result.get("timeline")
+        if timeline:
+            with st.expander("⏱️ Run Timeline", expanded=True):
+                totals = timeline["totals"]
+                cols = st.columns(4)
+                cols[0].metric("Wall time", f"{totals['wall_seconds']:.1f}s")
+                cols[1].metric("LLM time", f"{totals['llm_seconds']:.1f}s")
+                cols[2].metric("Local time", f"{totals['local_seconds']:.2f}s")
+                cols[3].metric("Revision laps", totals["revision_laps"])
+                st.altair_chart(gantt_chart(timeline["segments"]), use_container_width=True)
+                st.dataframe(timeline["summary"], use_container_width=True)
+                st.download_button(
+                    "⬇️ Download Chrome trace (JSON)",
+                    json.dumps(timeline["chrome_trace"]),
+                    file_name=f"{result['influencer']}_trace.json",
+                    mime="application/json",
+                    key="tab1_trace_download"
+                )
+    elif generation_job:
+        st.error(f"❌ Generation {generation_job['status']}: {generation_job['error']}")
+
+    # --- Script history (every finished run is stored in .cache/history.sqlite3) ---
+    with st.expander("🗂️ Script history"):
+        history_query = st.text_input("Search topics, influencers and scripts", key="tab1_history_search")
+        runs = search_runs(history_query, limit=20) if history_query.strip() else recent_runs(limit=10)
+        if not runs:
+            st.caption("No matching runs yet." if history_query.strip() else "No runs saved yet.")
+        for run in runs:
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["created"]))
+            score = f" · score {run['style_score']:.2f}" if run.get("style_score") is not None else ""
+            st.markdown(f"**{run['topic']}** · {run['influencer']} ({run['platform']}, {run['duration']}s) · {when}{score}")
+            if run.get("snippet"):
+                st.caption(run["snippet"])
+            with st.popover("Show script"):
+                st.text(remove_influencer(run.get("final_script") or ""))
+
 # =====================================================
 # 🎥 TAB 2: YouTube Analyzer
 # =====================================================
@@ -260,26 +437,25 @@ with tabs[1]:
     else:
         new_name = st.text_input("New Influencer Name", key="youtube_new_influencer_name")
         
-    if uploaded_file and st.button("🚀 Process Video", use_container_width=True):
-        temp_path = os.path.join(get_project_root(), "temp_video.mp4")
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.read())
-
-        st.info("⚙️ Processing video with influencer style...")
-        with st.spinner("Analyzing video and applying style..."):
-            result = generate_influencer_style(
-                influencer_name if mode == "Use Existing Influencer" else new_name,
-                temp_path
+    if uploaded_file and st.button("🚀 Process Video", use_container_width=True, key="youtube_process_button"):
+        target_name = influencer_name if mode == "Use Existing Influencer" else new_name
+        if not target_name:
+            st.warning("⚠️ Please enter an influencer name.")
+        else:
+            # ✅ Runs in the background: the tab stays usable and a refresh doesn't kill the work.
+            # The upload goes to disk now, so the queued job only carries its path.
+            path = store_upload(uploaded_file, get_upload_session_id())
+            try:
+                job_id = get_ingest_queue().submit(
+                    ingest_uploaded_video, "youtube", target_name, path,
+                    meta={"platform": "youtube", "influencer": target_name, "file": uploaded_file.name, "path": path}
                 )
+            except Exception:
+                discard_upload(path)
+                raise
+            st.success(f"✅ Queued as job {job_id}. Progress is shown below.")
 
-        st.success("✅ Video processed successfully!")
-        st.subheader("🗒️ Profile Created Successfully.")
-        # st.text_area("Video Transcript", result["transcript"], height=300)
-        # st.subheader("🎙️ Styled Output")
-        # st.text_area("Influencer Styled Output", result["styled_output"], height=200)
-
-        # Optionally delete file
-        os.remove(temp_path)
+    show_ingest_jobs("youtube")
 
 # =====================================================
 # 🎥 TAB 2: Instagram Analyzer
@@ -298,23 +474,22 @@ with tabs[2]:
     else:
         new_name = st.text_input("New Influencer Name", key="insta_new_influencer_name")
         
-    if uploaded_file and st.button("🚀 Process Video", use_container_width=True):
-        temp_path = os.path.join(get_project_root(), "temp_video.mp4")
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.read())
-
-        st.info("⚙️ Processing video with influencer style...")
-        with st.spinner("Analyzing video and applying style..."):
-            result = generate_IG_style_profile(
-                influencer_name if mode == "Use Existing Influencer" else new_name,
-                temp_path
+    if uploaded_file and st.button("🚀 Process Video", use_container_width=True, key="insta_process_button"):
+        target_name = influencer_name if mode == "Use Existing Influencer" else new_name
+        if not target_name:
+            st.warning("⚠️ Please enter an influencer name.")
+        else:
+            # ✅ Runs in the background: the tab stays usable and a refresh doesn't kill the work.
+            # The upload goes to disk now, so the queued job only carries its path.
+            path = store_upload(uploaded_file, get_upload_session_id())
+            try:
+                job_id = get_ingest_queue().submit(
+                    ingest_uploaded_video, "instagram", target_name, path,
+                    meta={"platform": "instagram", "influencer": target_name, "file": uploaded_file.name, "path": path}
                 )
+            except Exception:
+                discard_upload(path)
+                raise
+            st.success(f"✅ Queued as job {job_id}. Progress is shown below.")
 
-        st.success("✅ Video processed successfully!")
-        st.subheader("🗒️ Profile Created Successfully.")
-        # st.text_area("Video Transcript", result["transcript"], height=300)
-        # st.subheader("🎙️ Styled Output")
-        # st.text_area("Influencer Styled Output", result["styled_output"], height=200)
-
-        # Optionally delete file
-        os.remove(temp_path)
+    show_ingest_jobs("instagram")
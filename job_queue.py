@@ -0,0 +1,195 @@
+"""
+Background jobs for the Streamlit app.
+
+Long work (video ingestion, script generation) used to run inside the
+Streamlit button handler: the tab was blocked for minutes and a browser
+refresh killed it. A JobQueue runs such work on a shared thread pool in the
+server process instead. `submit()` returns a job id at once; the job reports
+stage changes through a `progress(stage, **info)` callback, and every change
+is persisted to .cache/jobs/<queue>/<id>.json so any session (or a reloaded
+tab) can poll it.
+
+Jobs still queued or running when the process died are marked "interrupted"
+the next time the queue is created.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from Agents.config import CACHE_DIR
+
+JOBS_DIR = os.path.join(CACHE_DIR, "jobs")
+ACTIVE_STATUSES = ("queued", "running")
+KEEP_FINISHED = 200     # finished jobs kept per queue (in memory and on disk)
+
+
+class QueueFull(RuntimeError):
+    """Raised by submit() when the queue already holds `max_pending` unfinished jobs."""
+
+
+class JobQueue:
+    def __init__(self, name: str, max_workers: int = 2, max_pending: int | None = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.dir = os.path.join(JOBS_DIR, name)
+        os.makedirs(self.dir, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"job-{name}")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        # job id → last version written to disk (guards file writes made outside self._lock)
+        self._write_lock = threading.Lock()
+        self._written = {}
+        self._recover()
+
+    # ---------- persistence ----------
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.dir, f"{job_id}.json")
+
+    def _snapshot(self, job: dict) -> tuple:
+        """(id, version, JSON text) of the job's current state. Call with self._lock held."""
+        job["version"] = job.get("version", 0) + 1
+        self._written.setdefault(job["id"], 0)
+        return job["id"], job["version"], json.dumps(job, indent=2, ensure_ascii=False, default=str)
+
+    def _save(self, snapshot: tuple):
+        """Write a snapshot outside self._lock; a slower writer never replaces a newer version."""
+        job_id, version, text = snapshot
+        tmp_path = f"{self._path(job_id)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        with self._write_lock:
+            last = self._written.get(job_id)
+            # A pruned job (no longer in _written) stays deleted
+            if last is not None and version > last:
+                os.replace(tmp_path, self._path(job_id))
+                self._written[job_id] = version
+                return
+        os.remove(tmp_path)
+
+    def _prune(self) -> list[str]:
+        """Drop finished jobs beyond KEEP_FINISHED from memory. Call with self._lock held."""
+        finished = sorted((j for j in self._jobs.values() if j["status"] not in ACTIVE_STATUSES),
+                          key=lambda j: j["created"], reverse=True)
+        stale = [j["id"] for j in finished[KEEP_FINISHED:]]
+        for job_id in stale:
+            del self._jobs[job_id]
+        return stale
+
+    def _remove(self, job_ids: list[str]):
+        with self._write_lock:
+            for job_id in job_ids:
+                self._written.pop(job_id, None)
+                try:
+                    os.remove(self._path(job_id))
+                except FileNotFoundError:
+                    pass
+
+    def _recover(self):
+        snapshots = []
+        for file_name in os.listdir(self.dir):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.dir, file_name), "r", encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            self._jobs[job["id"]] = job
+            self._written[job["id"]] = job.get("version", 0)
+            if job.get("status") in ACTIVE_STATUSES:
+                job.update(status="interrupted", error="Server stopped before the job finished.", updated=time.time())
+                snapshots.append(self._snapshot(job))
+        for snapshot in snapshots:
+            self._save(snapshot)
+        self._remove(self._prune())
+
+    def _update(self, job_id: str, **fields):
+        stale = []
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields, updated=time.time())
+            snapshot = self._snapshot(job)
+            if job["status"] not in ACTIVE_STATUSES:
+                stale = self._prune()
+        self._save(snapshot)
+        self._remove(stale)
+
+    # ---------- public API ----------
+    def pending(self, **meta) -> int:
+        """Unfinished jobs, optionally only those whose meta matches all given fields."""
+        with self._lock:
+            return sum(
+                1 for j in self._jobs.values()
+                if j["status"] in ACTIVE_STATUSES and all(j["meta"].get(k) == v for k, v in meta.items())
+            )
+
+    def queued_ahead(self, job_id: str) -> int:
+        """Queued (not yet running) jobs submitted before `job_id`; the pool runs jobs in order."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return 0
+            return sum(1 for j in self._jobs.values() if j["status"] == "queued" and j["created"] < job["created"])
+
+    def submit(self, fn, *args, meta: dict | None = None, **kwargs) -> str:
+        """
+        Run `fn(*args, progress=..., **kwargs)` in the background and return the job id.
+        `progress(stage, **info)` records a stage change; the return value is stored as the result.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        job = {
+            "id": job_id, "queue": self.name, "status": "queued", "stage": "queued",
+            "stages": [{"stage": "queued", "at": now}], "meta": meta or {},
+            "result": None, "error": None, "created": now, "updated": now,
+        }
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if j["status"] in ACTIVE_STATUSES)
+            if self.max_pending is not None and active >= self.max_pending:
+                raise QueueFull(f"{self.name}: {active} jobs already waiting, try again shortly.")
+            self._jobs[job_id] = job
+            snapshot = self._snapshot(job)
+        self._save(snapshot)
+
+        def progress(stage: str, **info):
+            with self._lock:
+                stages = self._jobs[job_id]["stages"] + [{"stage": stage, "at": time.time(), **info}]
+            self._update(job_id, stage=stage, stages=stages)
+
+        def run():
+            self._update(job_id, status="running", started=time.time())
+            try:
+                result = fn(*args, progress=progress, **kwargs)
+                self._update(job_id, status="done", stage="done", result=result, finished=time.time())
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {e}")
+                self._update(job_id, status="failed", error=str(e), finished=time.time())
+
+        self._pool.submit(run)
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job, default=str)) if job else None
+
+    def recent(self, limit: int = 20) -> list[dict]:
+        """Most recent jobs first."""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j["created"], reverse=True)[:limit]
+            return json.loads(json.dumps(jobs, default=str))
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_queue(name: str, max_workers: int = 2, max_pending: int | None = None) -> JobQueue:
+    """Process-wide queue per name (shared by all Streamlit sessions)."""
+    with _queues_lock:
+        if name not in _queues:
+            _queues[name] = JobQueue(name, max_workers=max_workers, max_pending=max_pending)
+        return _queues[name]
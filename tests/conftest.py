@@ -0,0 +1,4 @@
+import os
+
+# llm_client refuses to import without a key; no test here talks to a real API
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,36 @@
+import os
+from openai import OpenAI
+from Scripts import audio_prep
+from Scripts.fake_llm_server import serve_in_background
+
+
+def _write_chunks(out_dir, sizes):
+    for i, size in sizes.items():
+        with open(os.path.join(out_dir, f"chunk_{i:03d}.mp3"), "wb") as f:
+            f.write(b"\0" * size)
+
+
+def test_split_audio_lists_only_written_chunks(tmp_path, monkeypatch):
+    # ffmpeg wrote chunks 0 and 1; the cut at 900s was past the end of the audio
+    monkeypatch.setattr(audio_prep, "_run_ffmpeg", lambda args: _write_chunks(tmp_path, {0: 4000, 1: 4000}))
+    chunks = audio_prep.split_audio(str(tmp_path / "audio.mp3"), [300.0, 900.0], str(tmp_path))
+    assert chunks == [(0.0, str(tmp_path / "chunk_000.mp3")), (300.0, str(tmp_path / "chunk_001.mp3"))]
+
+
+def test_chunked_transcription_against_fake_server(tmp_path, monkeypatch):
+    _write_chunks(tmp_path, {0: 8000, 1: 4000, 2: 2000})
+    chunks = [(0.0, str(tmp_path / "chunk_000.mp3")), (2.0, str(tmp_path / "chunk_001.mp3")),
+              (3.0, str(tmp_path / "chunk_002.mp3"))]
+    url, stop = serve_in_background(transcribe_base=0.0, transcribe_per_mb=0.0)
+    try:
+        monkeypatch.setattr(audio_prep, "llm_client", OpenAI(api_key="fake", base_url=url))
+        parts = audio_prep.transcribe_chunks(chunks, 3.5, model="whisper-1")
+    finally:
+        stop()
+    result = audio_prep.stitch_transcripts(parts)
+
+    assert [p["offset"] for p in parts] == [0.0, 2.0, 3.0]
+    assert [s["start"] for s in result["segments"]] == [0.0, 2.0, 3.0]
+    # The fake server reports 4000 bytes per second of audio
+    assert [s["end"] for s in result["segments"]] == [2.0, 3.0, 3.5]
+    assert result["text"].startswith("Fake transcript of chunk_000.mp3")
@@ -0,0 +1,92 @@
+import threading
+import time
+import job_queue
+from job_queue import JobQueue, QueueFull
+
+
+def _wait(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while queue.get(job_id)["status"] in job_queue.ACTIVE_STATUSES:
+        assert time.time() < deadline, "job did not finish"
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+
+def _blocked_queue(tmp_path, monkeypatch, **kwargs):
+    """A one-worker queue whose first job holds the worker until `release` is set."""
+    monkeypatch.setattr(job_queue, "JOBS_DIR", str(tmp_path))
+    queue = JobQueue("test", max_workers=1, **kwargs)
+    release = threading.Event()
+    first = queue.submit(lambda progress: release.wait(5))
+    return queue, release, first
+
+
+def test_submit_refuses_when_full(tmp_path, monkeypatch):
+    queue, release, first = _blocked_queue(tmp_path, monkeypatch, max_pending=2)
+    queue.submit(lambda progress: None)
+    try:
+        queue.submit(lambda progress: None)
+    except QueueFull:
+        pass
+    else:
+        raise AssertionError("a third job must not be admitted")
+    finally:
+        release.set()
+    _wait(queue, first)
+    # Finished jobs free their slot
+    queue.submit(lambda progress: None)
+
+
+def test_pending_filters_by_meta(tmp_path, monkeypatch):
+    queue, release, first = _blocked_queue(tmp_path, monkeypatch)
+    queue.submit(lambda progress: None, meta={"session": "a"})
+    queue.submit(lambda progress: None, meta={"session": "b"})
+    assert queue.pending() == 3
+    assert queue.pending(session="a") == 1
+    release.set()
+
+
+def test_queue_position_counts_earlier_queued_jobs(tmp_path, monkeypatch):
+    queue, release, first = _blocked_queue(tmp_path, monkeypatch)
+    later = []
+    for _ in range(3):
+        later.append(queue.submit(lambda progress: None))
+        time.sleep(0.001)   # distinct creation times
+    while queue.get(first)["status"] != "running":
+        time.sleep(0.01)
+    assert [queue.queued_ahead(j) for j in [first] + later] == [0, 0, 1, 2]
+    release.set()
+
+
+def test_progress_result_and_failure_are_recorded(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOBS_DIR", str(tmp_path))
+    queue = JobQueue("test", max_workers=2)
+
+    def work(progress):
+        progress("writing", target=0)
+        return {"script": "done"}
+
+    def fail(progress):
+        raise ValueError("boom")
+
+    ok = _wait(queue, queue.submit(work))
+    assert ok["status"] == "done" and ok["result"] == {"script": "done"}
+    assert [s["stage"] for s in ok["stages"]] == ["queued", "writing"]
+    failed = _wait(queue, queue.submit(fail))
+    assert failed["status"] == "failed" and failed["error"] == "boom"
+
+    # A new queue in the same directory (a restarted server) sees the saved jobs
+    queue._pool.shutdown(wait=True)     # job files are written after the in-memory state
+    assert {j["id"] for j in JobQueue("test").recent()} == {ok["id"], failed["id"]}
+
+
+def test_finished_jobs_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOBS_DIR", str(tmp_path))
+    monkeypatch.setattr(job_queue, "KEEP_FINISHED", 3)
+    queue = JobQueue("test", max_workers=1)
+    ids = [queue.submit(lambda progress: None) for _ in range(6)]
+    _wait(queue, ids[-1])
+    queue._pool.shutdown(wait=True)
+    kept = [j["id"] for j in queue.recent()]
+    assert kept == ids[:-4:-1]
+    assert sorted(p.stem for p in (tmp_path / "test").glob("*.json")) == sorted(kept)
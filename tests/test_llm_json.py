@@ -0,0 +1,74 @@
+import httpx
+import openai
+from Agents import llm_json
+from Agents.llm_json import extract_json, request_json, schema_from_example
+
+
+def _bad_request(message, param=None):
+    response = httpx.Response(400, request=httpx.Request("POST", "http://test/v1/chat/completions"))
+    return openai.BadRequestError(message, response=response, body={"message": message, "param": param})
+
+
+def test_plain_object_parses_directly():
+    assert extract_json('{"score": 0.9}') == ({"score": 0.9}, "direct")
+
+
+def test_fenced_object_with_chatter_is_extracted():
+    text = 'Sure! Here it is:\n```json\n{"score": 0.9, "notes": "a {brace} inside"}\n```\nHope that helps {:'
+    assert extract_json(text) == ({"score": 0.9, "notes": "a {brace} inside"}, "extracted")
+
+
+def test_no_object_fails():
+    assert extract_json("no json here [1, 2]") == (None, "failed")
+    assert extract_json(None) == (None, "failed")
+
+
+def test_schema_from_example_is_strict():
+    schema = schema_from_example({"name": "", "tags": [""], "score": 0.0, "ok": True})
+    assert schema["required"] == ["name", "tags", "score", "ok"]
+    assert schema["additionalProperties"] is False
+    assert schema["properties"]["tags"] == {"type": "array", "items": {"type": "string"}}
+    assert schema["properties"]["score"] == {"type": "number"}
+    assert schema["properties"]["ok"] == {"type": "boolean"}
+
+
+def test_request_json_retries_unparseable_reply(monkeypatch):
+    monkeypatch.setattr(llm_json, "_schema_unsupported", False)
+    replies = iter(["not json", '{"a": 1}'])
+    assert request_json(lambda response_format: next(replies), "test_retry", {"a": 0}) == {"a": 1}
+
+
+def test_request_json_gives_up_with_raw_output(monkeypatch):
+    monkeypatch.setattr(llm_json, "_schema_unsupported", False)
+    assert request_json(lambda response_format: "still not json", "test_give_up", {"a": 0}) == {
+        "raw_output": "still not json"}
+
+
+def test_rejected_response_format_falls_back_without_schema(monkeypatch):
+    monkeypatch.setattr(llm_json, "_schema_unsupported", False)
+    formats = []
+
+    def complete(response_format):
+        formats.append(response_format)
+        if response_format is not None:
+            raise _bad_request("response_format json_schema is not supported", param="response_format")
+        return '{"a": 1}'
+
+    assert request_json(complete, "test_fallback", {"a": 0}) == {"a": 1}
+    assert formats[0]["type"] == "json_schema" and formats[1:] == [None]
+    assert llm_json._schema_unsupported
+
+
+def test_other_bad_requests_are_raised(monkeypatch):
+    monkeypatch.setattr(llm_json, "_schema_unsupported", False)
+
+    def complete(response_format):
+        raise _bad_request("This model's maximum context length is 8192 tokens", param="messages")
+
+    try:
+        request_json(complete, "test_raise", {"a": 0})
+    except openai.BadRequestError:
+        pass
+    else:
+        raise AssertionError("context length errors must reach the caller")
+    assert not llm_json._schema_unsupported
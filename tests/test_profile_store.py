@@ -0,0 +1,64 @@
+import threading
+import Agents.config
+from Scripts import phrase_miner, profile_store
+
+
+def _use_tmp_styles(tmp_path, monkeypatch):
+    monkeypatch.setitem(Agents.config.STYLE_DIRS, "youtube", str(tmp_path))
+
+
+def test_same_source_is_appended_once(tmp_path, monkeypatch):
+    _use_tmp_styles(tmp_path, monkeypatch)
+    profile_store.append_analysis("youtube", "Zed", {"tone": "a"}, source_id="youtube:v1")
+    profile = profile_store.append_analysis("youtube", "Zed", {"tone": "b"}, source_id="youtube:v1")
+    assert profile["analysis_count"] == 1
+    assert profile_store.list_sources("youtube", "Zed") == ["youtube:v1"]
+    assert profile_store.has_source("youtube", "Zed", "youtube:v1")
+
+
+def test_sources_appended_by_another_writer_are_seen(tmp_path, monkeypatch):
+    _use_tmp_styles(tmp_path, monkeypatch)
+    profile_store.append_analysis("youtube", "Zed", {"tone": "a"}, source_id="youtube:v1")
+    assert not profile_store.has_source("youtube", "Zed", "youtube:v2")
+    with open(profile_store._paths("youtube", "zed")["sources"], "a", encoding="utf-8") as f:
+        f.write("youtube:v2\n")
+    assert profile_store.has_source("youtube", "Zed", "youtube:v2")
+
+
+def test_concurrent_appends_of_one_source_count_once(tmp_path, monkeypatch):
+    _use_tmp_styles(tmp_path, monkeypatch)
+    threads = [
+        threading.Thread(target=profile_store.append_analysis, args=("youtube", "Zed", {"tone": str(i)}),
+                         kwargs={"source_id": "youtube:v1"})
+        for i in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert profile_store.load_profile("youtube", "Zed")["analysis_count"] == 1
+    assert len(profile_store.read_analyses("youtube", "Zed")) == 1
+
+
+def test_compaction_shifts_merged_through(tmp_path, monkeypatch):
+    _use_tmp_styles(tmp_path, monkeypatch)
+    # The same analysis without a source id twice, then two distinct ones
+    for tone in ("a", "a", "b", "c"):
+        profile_store.append_analysis("youtube", "Zed", {"tone": tone})
+    with profile_store.profile_lock("youtube", "zed"):
+        kept, merged_through = profile_store.compact_log("youtube", "Zed", merged_through=2)
+    assert kept == 3
+    assert merged_through == 1
+    assert [a["tone"] for a in profile_store.read_analyses("youtube", "Zed")] == ["a", "b", "c"]
+
+
+def test_phrase_counts_update_only_for_new_sources(tmp_path, monkeypatch):
+    _use_tmp_styles(tmp_path, monkeypatch)
+    text = "Here is the deal. Here is the deal, my friend."
+    for _ in range(2):
+        profile_store.append_analysis(
+            "youtube", "Zed", {"tone": "a"}, source_id="youtube:v1",
+            on_append=lambda: phrase_miner.ingest_phrases("youtube", "Zed", text, locked=True),
+        )
+    store = phrase_miner._load_store(phrase_miner._store_path("youtube", "zed"))
+    assert store["docs"] == 1
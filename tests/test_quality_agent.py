@@ -0,0 +1,50 @@
+from Agents.quality_agent import QualityAgent, plan_batches
+from Agents.tokens import count_tokens
+
+STYLE = {"style_profile": {"tone": "blunt", "signature_phrases": ["here's the deal"]}}
+
+
+def _report(index, score=0.9):
+    return {"index": index, "style_match_score": score, "clarity_score": 0.8, "storytelling_score": 0.7,
+            "feedback": f"script {index}"}
+
+
+def test_batches_respect_size():
+    assert plan_batches(["short script"] * 5, "tone: blunt", batch_size=2, token_budget=100_000) == [
+        [0, 1], [2, 3], [4]]
+
+
+def test_batches_respect_token_budget():
+    script = "word " * 200
+    budget = count_tokens(script) * 2 + 400
+    batches = plan_batches([script] * 4, "tone: blunt", batch_size=10, token_budget=budget)
+    assert all(len(batch) <= 2 for batch in batches)
+    assert sum(batches, []) == [0, 1, 2, 3]
+
+
+def test_oversized_script_gets_its_own_request():
+    assert plan_batches(["word " * 500, "tiny"], "tone: blunt", batch_size=10, token_budget=50) == [[0], [1]]
+
+
+def test_scripts_missing_from_batch_reply_are_reasked(monkeypatch):
+    asked = []
+
+    def call_llm_json(self, prompt, name, example, **kwargs):
+        asked.append(name)
+        if name == "quality_batch":
+            # Script 1 is missing, script 0 is reported twice, 7 is out of range
+            return {"reports": [_report(2), _report(0), _report(0, 0.1), _report(7)]}
+        return {k: v for k, v in _report(1, 0.5).items() if k != "index"}
+
+    monkeypatch.setattr(QualityAgent, "call_llm_json", call_llm_json)
+    reports = QualityAgent().evaluate_batch(["first", "second", "third"], STYLE)
+    assert asked == ["quality_batch", "quality_report"]
+    assert [r["style_match_score"] for r in reports] == [0.9, 0.5, 0.9]
+    assert all(r["judge"] == "llm" for r in reports)
+
+
+def test_unparseable_reply_falls_back_to_neutral_report(monkeypatch):
+    monkeypatch.setattr(QualityAgent, "call_llm_json", lambda self, *a, **kw: {"raw_output": "oops"})
+    [report] = QualityAgent().evaluate_batch(["only script"], STYLE)
+    assert report["style_match_score"] == 0.5
+    assert report["raw_output"] == "oops"
@@ -0,0 +1,77 @@
+from Agents import voice_calibration
+from Agents.voice_calibration import VoiceCalibrationAgent, samples_key, style_fingerprint
+from Scripts import source_cache
+
+STYLE = {"tone": "blunt", "structure": "", "sentence_pattern": "", "signature_phrases": ["here's the deal"],
+         "persona": "", "vocabulary_patterns": [], "emotional_markers": [], "sentence_rhythm": ""}
+
+
+def _counting_llm(monkeypatch, reply):
+    calls = []
+
+    def call_llm_json(self, prompt, name, example, **kwargs):
+        calls.append(name)
+        return dict(reply)
+
+    monkeypatch.setattr(VoiceCalibrationAgent, "call_llm_json", call_llm_json)
+    return calls
+
+
+def test_samples_key_ignores_order_and_edges():
+    assert samples_key(["One sample.", "Two samples. "]) == samples_key(["Two samples.", "One sample."])
+    assert samples_key(["One sample."]) != samples_key(["Another sample."])
+
+
+def test_style_fingerprint_ignores_bookkeeping_keys():
+    assert style_fingerprint(dict(STYLE, merge_key="x", raw_output="y")) == style_fingerprint(STYLE)
+    assert style_fingerprint(dict(STYLE, tone="calm")) != style_fingerprint(STYLE)
+
+
+def test_creator_style_is_cached_by_samples(tmp_path, monkeypatch):
+    monkeypatch.setattr(voice_calibration, "CREATOR_STYLE_CACHE_DIR", str(tmp_path))
+    calls = _counting_llm(monkeypatch, STYLE)
+    agent = VoiceCalibrationAgent()
+    first = agent.analyze_creator_style(["I write short lines.", "Then a long one follows them."])
+    second = agent.analyze_creator_style(["Then a long one follows them.", "I write short lines."])
+    assert calls == ["creator_style"]
+    assert second == first
+    agent.analyze_creator_style(["Something new entirely."])
+    assert len(calls) == 2
+
+
+def test_merge_is_cached_until_a_style_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(voice_calibration, "MERGE_CACHE_DIR", str(tmp_path))
+    calls = _counting_llm(monkeypatch, STYLE)
+    agent = VoiceCalibrationAgent()
+    influencer = {"merged_profile": {"style_profile": STYLE}}
+    merged = agent.merge_styles(STYLE, influencer)
+    assert agent.merge_styles(STYLE, influencer) == merged
+    assert merged["merge_key"] == VoiceCalibrationAgent.merge_cache_key(STYLE, influencer)
+    agent.merge_styles(dict(STYLE, tone="calm"), influencer)
+    assert calls == ["merged_style", "merged_style"]
+
+
+def test_source_key_by_video_id_or_content(tmp_path):
+    assert source_cache.source_key("https://www.youtube.com/watch?v=abc123&t=5") == "youtube:abc123"
+    assert source_cache.source_key("https://youtu.be/abc123") == "youtube:abc123"
+    a, b = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    a.write_bytes(b"same bytes")
+    b.write_bytes(b"same bytes")
+    assert source_cache.source_key(str(a)) == source_cache.source_key(str(b))
+
+
+def test_cached_transcript_fetches_and_cleans_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(source_cache, "TRANSCRIPT_CACHE_DIR", str(tmp_path))
+    calls = []
+
+    def fetch():
+        calls.append("fetch")
+        return "raw words"
+
+    def clean(raw):
+        calls.append("clean")
+        return raw.upper()
+
+    assert source_cache.cached_transcript("youtube:abc123", fetch, clean) == "RAW WORDS"
+    assert source_cache.cached_transcript("youtube:abc123", fetch, clean) == "RAW WORDS"
+    assert calls == ["fetch", "clean"]
@@ -0,0 +1,72 @@
+import random
+import numpy as np
+from Agents.config import QUALITY_THRESHOLD
+from Scripts import style_similarity
+from Scripts.style_similarity import LOCAL_ACCEPT, LOCAL_REJECT, build_corpus, split_passages, to_match_score
+
+WORDS = ("look here's the deal you gotta sell the offer make it so good people feel stupid "
+         "saying no money leads customers grow the business").split()
+OFF_STYLE = ("Notwithstanding the aforementioned considerations, the committee's deliberations, which were "
+             "protracted and occasionally contentious, ultimately culminated in a comprehensive recommendation "
+             "concerning municipal infrastructure, environmental stewardship, and fiscal accountability. ") * 6
+
+
+def _talk(rng, sentences):
+    return " ".join(" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 9))).capitalize() + "."
+                    for _ in range(sentences))
+
+
+def _corpus():
+    rng = random.Random(1)
+    passages, groups = [], []
+    for video in range(4):
+        for passage in split_passages(_talk(rng, 120)):
+            passages.append(passage)
+            groups.append(video)
+    return build_corpus(passages, groups)
+
+
+def _fixed_score(monkeypatch, score):
+    monkeypatch.setattr(style_similarity, "load_corpus", lambda platform, name: {})
+    monkeypatch.setattr(style_similarity, "score_script", lambda script, corpus: {
+        "score": score, "percentiles": {"char": 0.5, "word": 0.5, "stylometry": 0.5},
+        "feature_z": np.zeros(len(style_similarity.STYLO_FEATURES)),
+    })
+
+
+def test_match_score_lands_accept_on_threshold():
+    assert to_match_score(LOCAL_ACCEPT) == QUALITY_THRESHOLD
+    assert to_match_score(1.0) == 1.0
+    assert to_match_score(0.0) == 0.0
+    assert to_match_score(LOCAL_REJECT) < QUALITY_THRESHOLD
+
+
+def test_clear_scores_are_decided_locally(monkeypatch):
+    _fixed_score(monkeypatch, LOCAL_ACCEPT)
+    report, local = style_similarity.prefilter("youtube", "Zed", "a draft")
+    assert local["decision"] == "accept"
+    assert report["judge"] == "local" and report["style_match_score"] >= QUALITY_THRESHOLD
+
+    _fixed_score(monkeypatch, LOCAL_REJECT)
+    report, local = style_similarity.prefilter("youtube", "Zed", "a draft")
+    assert local["decision"] == "revise"
+    assert report["style_match_score"] < QUALITY_THRESHOLD
+
+
+def test_ambiguous_band_goes_to_the_llm(monkeypatch):
+    _fixed_score(monkeypatch, (LOCAL_ACCEPT + LOCAL_REJECT) / 2)
+    report, local = style_similarity.prefilter("youtube", "Zed", "a draft")
+    assert report is None
+    assert local["decision"] == "ambiguous"
+
+
+def test_without_corpus_nothing_is_decided(monkeypatch):
+    monkeypatch.setattr(style_similarity, "load_corpus", lambda platform, name: None)
+    assert style_similarity.prefilter("youtube", "Zed", "a draft") == (None, None)
+    assert style_similarity.prefilter("youtube", None, "a draft") == (None, None)
+
+
+def test_off_style_draft_scores_below_reject():
+    corpus = _corpus()
+    assert style_similarity.score_script(OFF_STYLE, corpus)["score"] <= LOCAL_REJECT
+    assert style_similarity.score_script(_talk(random.Random(2), 40), corpus)["score"] > LOCAL_REJECT
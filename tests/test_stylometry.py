@@ -0,0 +1,18 @@
+from Scripts.stylometry import analyze_text, split_sentences, tokenize
+
+
+def test_unpunctuated_lines_are_sentences():
+    text = "so today we talk about money\nand why most people never save any\nThe end."
+    assert split_sentences(text) == [
+        "so today we talk about money",
+        "and why most people never save any",
+        "The end.",
+    ]
+
+
+def test_every_word_is_counted_in_a_sentence():
+    text = "no punctuation on this line\nor this one\nBut this one ends! Right? yes"
+    stats = analyze_text(text)
+    assert stats["word_count"] == len(tokenize(text))
+    assert stats["sentence_count"] == 5
+    assert stats["sentence_length"]["mean"] == stats["word_count"] / stats["sentence_count"]
@@ -0,0 +1,40 @@
+from Scripts.transcript_cleaning import local_clean
+
+
+def test_mm_as_a_unit_is_kept():
+    assert local_clean("The sheet is 5 mm thick.") == "The sheet is 5 mm thick."
+
+
+def test_mhm_alone_is_dropped():
+    assert local_clean("Mhm. Right, that works.") == "Right, that works."
+
+
+def test_discourse_filler_takes_its_commas():
+    assert local_clean("It was, like, amazing.") == "It was amazing."
+
+
+def test_filler_takes_the_comma_before_it():
+    assert local_clean("I think, um, the price is fine.") == "I think the price is fine."
+    assert local_clean("I think, um. The thing is hard.") == "I think. The thing is hard."
+
+
+def test_legit_double_keeps_its_casing():
+    assert local_clean("That that is fine.") == "That that is fine."
+
+
+def test_two_word_repeats_are_kept():
+    assert local_clean("This is very very important.") == "This is very very important."
+    assert local_clean("Bye bye everyone.") == "Bye bye everyone."
+
+
+def test_comma_repeats_are_emphasis():
+    assert local_clean("No, no, no. That is wrong.") == "No, no, no. That is wrong."
+
+
+def test_three_word_stutter_collapses():
+    assert local_clean("I I I think so.") == "I think so."
+    assert local_clean("That that that is it.") == "That that is it."
+
+
+def test_doubled_filler_is_dropped():
+    assert local_clean("Uh uh, wait.") == "Wait."